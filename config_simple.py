@@ -66,15 +66,142 @@ GOOGLE_PLAY_CATEGORIES = {
 SCRAPER_CONFIG = {
     "app_store": {
         "country": "us",
+        "collection": "TOP_FREE",
         "limit": 100,  # 每个分类爬取数量
-        "delay": 2  # 请求延迟（秒）
+        "delay": 2,  # 请求延迟（秒）
+        "streaming": True,  # 流式解析 RSS（逐条解码，不再同时持有完整响应体和整个 feed）
+        # 详细信息（评分、评价数、商店链接）缓存有效期（秒），0 表示不缓存。
+        # 短于每天一次的爬取间隔：只有同一天重新运行时命中，每天的评分和评价数都重新查询
+        "lookup_cache_ttl": 12 * 3600
     },
     "google_play": {
         "country": "us",
         "collection": "TOP_FREE",
         "limit": 100,
-        "delay": 3  # 请求延迟（秒）
+        "delay": 3,  # 请求延迟（秒）
+        "details": {  # 逐个查询应用详情（评分、评价数、安装量、上架时间）
+            "enabled": True,
+            "max_workers": 4,  # 查询线程数（请求节奏由 rate_limit 中的 play.google.com/details 控制）
+            "cache_ttl": 12 * 3600  # 详情缓存有效期（秒），0 表示不缓存；与 lookup_cache_ttl 一样只在同一天重新运行时命中
+        }
     },
     "retry_times": 3,  # 失败重试次数
-    "timeout": 30  # 请求超时时间（秒）
+    "timeout": 30,  # 请求超时时间（秒）
+    "retry": {
+        "base_delay": 1.0,  # 首次退避上限（秒），之后指数增长并随机抖动
+        "max_delay": 20.0  # 单次退避上限（秒）
+    },
+    "circuit_breaker": {
+        "failure_threshold": 5,  # 同一主机连续失败多少次后熔断
+        "reset_timeout": 120  # 熔断多少秒后允许试探请求
+    },
+    "run_deadline": 1800,  # 单次运行的截止时间（秒），超时后跳过剩余分类，已完成的分类照常保存
+    "http_cache": {  # RSS 响应缓存（data/cache/http），重复爬取同一天时节省带宽
+        "enabled": True,
+        "ttl": 3600  # 新鲜期（秒），期内不发请求；过期后发条件请求，304 时复用缓存
+    },
+    "concurrency": {
+        "mode": "thread",  # 分类爬取方式（thread 并发 / sequential 顺序）
+        "max_workers": 6,  # 线程池大小
+        "per_host": {  # 每个主机同时进行的最大请求数
+            "itunes.apple.com": 2,
+            "play.google.com": 2
+        }
+    },
+    "matrix": {  # 爬取矩阵：国家 × 榜单类型 × 全部分类，按 priority 从小到大调度
+        # 主商店（上面 app_store / google_play 的 country + collection）的数据保存在原路径，
+        # 其他组合保存在 raw/{日期}/{平台}/{国家}/{榜单类型}/ 下
+        "app_store": {
+            "countries": ["us"],  # 如 ["us", "gb", "jp", "de", ...]
+            "collections": ["TOP_FREE"],  # TOP_FREE / TOP_PAID / GROSSING
+            "priority": 0
+        },
+        "google_play": {
+            "countries": ["us"],
+            "collections": ["TOP_FREE"],
+            "priority": 1
+        }
+    },
+    "rate_limit": {  # 每个主机的令牌桶限流（速率单位：次/秒），遇到 429/503 自动降速
+        "itunes.apple.com": {"rate": 1.0, "burst": 2, "min_rate": 0.1, "max_rate": 4.0},
+        "play.google.com": {"rate": 0.5, "burst": 1, "min_rate": 0.05, "max_rate": 2.0},
+        # Google Play 应用详情单独限流（不与分类爬取共用令牌），突发数与 details.max_workers 一致
+        "play.google.com/details": {"rate": 2.0, "burst": 4, "min_rate": 0.2, "max_rate": 4.0}
+    },
+    "fixtures": {  # 录制 / 回放真实响应，用于离线基准测试和回归测试
+        "mode": "off",  # off / record（正常爬取并录制响应）/ replay（从替身服务器回放，结果保存在 dir/output）
+        "dir": os.path.join(DATA_DIR, "fixtures"),
+        "replay_url": "http://127.0.0.1:8765",  # 替身服务器地址（python scrapers/fixture_server.py）
+        "server": {  # 替身服务器参数
+            "host": "127.0.0.1",
+            "port": 8765,
+            "latency": 0.0,  # 每个请求的固定延迟（秒）
+            "jitter": 0.0,  # 额外随机延迟上限（秒）
+            "error_rate": 0.0,  # 注入错误的概率（0~1）
+            "error_status": 503,  # 注入错误的状态码（429 / 500 / 503 ...）
+            "retry_after": None,  # 注入错误时返回的 Retry-After（秒）
+            "seed": 0  # 随机种子，相同的种子和请求得到相同的延迟和错误
+        }
+    }
+}
+
+# 榜单存储配置（utils/data_storage.open_ranking_store）
+STORAGE_CONFIG = {
+    # json：每个 日期/平台/分类 一个文件（Web 页面直接读取 data/raw）
+    # snapshot：每天一个合并快照 raw/{日期}.snapshot.jsonl，头部记录各分类的字节偏移
+    # catalog：应用目录 catalog/apps.json（元数据去重、按变化分版本）+ 每日紧凑排名表 catalog/days/{日期}.json
+    # sqlite：全部日期保存在 data/rankings.db（WAL 模式），按日期/分类和 app_id 建索引
+    # objects：内容相同的分类（不计日期和抓取时间）只保存一份 objects/{摘要}.json，每天一个引用文件 refs/{日期}.json
+    # 转换已有数据：python scripts/migrate_data.py snapshot / catalog / sqlite / objects
+    # json / objects 不重写内容未变化（不计抓取时间）的文件；爬虫结束时记录本次写入的文件数和字节数
+    # 爬虫和识别器也可以用 --storage 临时指定格式
+    "format": "json",
+    # 分类文件和新上榜结果的压缩：None（不压缩）/ "gzip" / "zstd"（需 pip install zstandard，未安装时用 gzip）
+    # 压缩后保存为 .json.gz / .json.zst，读取时按文件头自动识别；转换已有数据：python scripts/migrate_data.py compress
+    "compression": None,
+    # 规范化布局（提交到 Git 的数据建议开启）：键排序、每个应用一行、不保存每个应用的抓取时间，
+    # 相邻日期的文件只有变化的应用所在行不同；改写已有数据：python scripts/migrate_data.py layout --layout canonical
+    # 仓库打包大小和克隆耗时对比：python scripts/repo_size.py compare
+    "canonical": False,
+    # 按月归档：python scripts/migrate_data.py archive 将早于 keep_days 天的日期目录合并为 raw/archive/{年-月}.archive
+    # （头部索引 + 逐个压缩的分类文件），加载函数和 /api/dates 自动读取归档；展开：migrate_data.py unarchive
+    "archive": {
+        "keep_days": 90,
+        "compression": "zstd"
+    }
+}
+
+# 分析数据配置
+ANALYTICS_CONFIG = {
+    # 排名立方体（utils/rank_cube.py，需要 numpy）：爬虫保存主商店榜单后向 data/cube 追加当天的排名切片，
+    # 流失率、排名波动等跨日期统计直接在数组上计算；重建：python scripts/rank_cube.py build
+    "rank_cube": {
+        "enabled": True
+    },
+    # 应用历史索引（utils/app_history.py）：爬虫保存主商店榜单后把每个应用当天的 (排名, 评价数) 写入 data/history，
+    # GET /api/apps/<app_id>/history 一次定位读取即可返回应用的排名轨迹；重建：python scripts/app_history.py build
+    "app_history": {
+        "enabled": True
+    },
+    # 上榜位图索引（utils/presence_index.py）：爬虫保存主商店榜单后更新 data/presence，
+    # 识别器的 first-seen / reentry / streak 模式（--mode 或 POST /api/detect 的 mode）用位运算判断；
+    # 重建：python scripts/presence_index.py build
+    "presence": {
+        "enabled": True,
+        # reentry：至少离榜的天数
+        "min_absent_days": 7,
+        # streak：连续在榜的天数
+        "streak_days": 7
+    },
+    # 排名变化（需要 numpy）：识别器每次运行时把今天和对比日期的榜单对齐为数组，计算排名变化和评价数增速，
+    # 结果写入 data/movers/{日期}.json（climbers / fallers / breakouts）
+    "movers": {
+        "enabled": True,
+        # 排名上升或下降至少为榜单长度的比例（App Store 100 名 → 20 名，Google Play 30 名 → 6 名）
+        "min_rank_jump_ratio": 0.2,
+        # 评价数日增长率的 z 分数阈值
+        "z_threshold": 3.0,
+        # 对比日期评价数少于该值的应用不计算增长率（避免 0 → 1 之类的噪声）
+        "min_rating_count": 20
+    }
 }
@@ -6,7 +6,6 @@
 
 import os
 import sys
-import json
 import argparse
 from datetime import datetime
 from typing import Dict, List, Optional
@@ -15,7 +14,8 @@ from typing import Dict, List, Optional
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from utils.logger import setup_logger
-from utils.data_storage import save_to_json, load_from_json
+from utils.data_storage import save_to_json, load_from_json, decode_json, JSON_FILE_SUFFIXES
+from utils.analyzed_registry import open_analyzed_registry
 import anthropic
 
 
@@ -256,14 +256,14 @@ def find_app_in_new_apps(app_id: str, platform: str) -> Optional[Dict]:
 
     # 遍历new_apps目录下的JSON文件
     for filename in sorted(os.listdir(new_apps_dir), reverse=True):
-        if not filename.endswith('.json'):
+        if not filename.endswith(JSON_FILE_SUFFIXES):
             continue
 
         file_path = os.path.join(new_apps_dir, filename)
 
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
+            with open(file_path, 'rb') as f:
+                data = decode_json(f.read())
 
             new_apps = data.get('new_apps', [])
 
@@ -327,6 +327,8 @@ def main():
 
     if result:
         save_analysis_result(args.app_id, result, date_str)
+        # 记录到已分析产品登记（与识别器、Web 任务并发写入时由文件锁保护）
+        open_analyzed_registry(DATA_DIR).add([args.app_id], source="analyzer")
         logger.info("=" * 60)
         logger.info(f"✓ 分析成功: {app.get('name')}")
         logger.info(f"  保存位置: data/analysis/{date_str}/{args.app_id}.json")
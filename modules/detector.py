@@ -6,121 +6,105 @@
 import sys
 import os
 import argparse
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timedelta
-from typing import List, Dict, Set
+from itertools import repeat
+from typing import Dict, Iterable, List, Optional, Set
 
 # 添加项目根目录到路径
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from config_simple import (
+    ANALYTICS_CONFIG,
     APP_STORE_CATEGORIES,
     GOOGLE_PLAY_CATEGORIES,
+    STORAGE_CONFIG,
     DATA_DIR,
     LOG_DIR
 )
 from utils.logger import setup_logger
-from utils.data_storage import load_from_json, save_to_json
+from utils.analyzed_registry import open_analyzed_registry
+from utils.data_storage import (
+    JSON_FILE_SUFFIXES,
+    RANKING_STORES,
+    compressed_path,
+    iter_store_days,
+    load_from_json,
+    open_ranking_store,
+    resolve_compression,
+    save_compressed_json,
+    save_to_json
+)
 from utils.date_utils import get_today, get_yesterday, get_date_before, is_valid_date
+from utils.detection_engine import DetectionEngine
+from utils.rank_cube import NUMPY_AVAILABLE
+from utils.presence_index import PRESENCE_MODES, PresenceIndex
+
+
+if NUMPY_AVAILABLE:
+    import numpy as np
+
+
+# 识别模式：new 为与对比日期比较（默认），其余基于上榜位图索引
+DETECTION_MODES = ("new",) + PRESENCE_MODES
+
+# 平台 -> 分类（识别顺序：先 App Store 后 Google Play）
+PLATFORM_CATEGORIES = {"app_store": APP_STORE_CATEGORIES, "google_play": GOOGLE_PLAY_CATEGORIES}
+PLATFORM_NAMES = {"app_store": "App Store", "google_play": "Google Play"}
 
 
 class NewAppDetector:
     """新上榜产品识别器"""
 
-    def __init__(self, date_str=None):
+    def __init__(self, date_str=None, storage_format=None):
         """
         初始化识别器
 
         Args:
             date_str: 日期字符串（YYYY-MM-DD），默认今天
+            storage_format: 榜单存储格式（json / snapshot / catalog / sqlite），默认读取配置
         """
         self.date = date_str or get_today()
+        self.storage_format = storage_format or STORAGE_CONFIG.get("format", "json")
         self.logger = setup_logger(
             "detector",
             os.path.join(LOG_DIR, "detector.log")
         )
 
-        # 已分析产品记录文件
-        self.analyzed_apps_file = os.path.join(DATA_DIR, "analyzed_apps.json")
-
-    def load_ranking_data(self, date_str: str, platform: str, category: str) -> List[Dict]:
-        """
-        加载指定日期的榜单数据
-
-        Args:
-            date_str: 日期字符串
-            platform: 平台（app_store / google_play）
-            category: 分类key
-
-        Returns:
-            List[Dict]: 应用列表
-        """
-        file_path = os.path.join(
-            DATA_DIR, "raw", date_str, platform, f"{category}.json"
-        )
-
-        data = load_from_json(file_path)
-        if not data:
-            return []
+        # 已分析产品登记（只追加的日志，多进程安全），analyzed_apps.json 为供 Web 页面读取的导出文件
+        self.analyzed_registry = open_analyzed_registry(DATA_DIR)
 
-        return data.get("apps", [])
+        # 榜单存储（与爬虫使用相同的存储格式）
+        self.store = open_ranking_store(DATA_DIR, self.storage_format)
 
-    def get_app_ids(self, apps: List[Dict]) -> Set[str]:
-        """
-        从应用列表中提取app_id集合
+        # 识别引擎：每个日期的全部分类并行加载一次，按 app_id 建立索引
+        self.engine = DetectionEngine(self.store, PLATFORM_CATEGORIES)
 
-        Args:
-            apps: 应用列表
+        # 识别结果的压缩格式和布局（与榜单分类文件相同）
+        self.compression = resolve_compression(STORAGE_CONFIG.get("compression"))
+        self.canonical = STORAGE_CONFIG.get("canonical", False)
 
-        Returns:
-            Set[str]: app_id集合
+    def find_compare_date(self, max_lookback_days=3, date_str=None) -> str:
         """
-        return {app.get("app_id") for app in apps if app.get("app_id")}
-
-    def find_new_apps(self, today_apps: List[Dict], yesterday_apps: List[Dict]) -> List[Dict]:
-        """
-        找出新上榜的应用
-
-        Args:
-            today_apps: 今天的应用列表
-            yesterday_apps: 昨天的应用列表
-
-        Returns:
-            List[Dict]: 新上榜的应用列表
-        """
-        today_ids = self.get_app_ids(today_apps)
-        yesterday_ids = self.get_app_ids(yesterday_apps)
-
-        # 新上榜 = 今天有但昨天没有
-        new_ids = today_ids - yesterday_ids
-
-        # 返回完整的应用信息
-        new_apps = [app for app in today_apps if app.get("app_id") in new_ids]
-
-        return new_apps
-
-    def find_compare_date(self, max_lookback_days=3) -> str:
-        """
-        查找可用的对比日期（向前查找最多N天）
+        查找可用的对比日期（从识别日期向前查找最多N天）
 
         Args:
             max_lookback_days: 最多向前查找的天数
+            date_str: 识别日期，默认 self.date
 
         Returns:
             str: 找到的日期，如果都不存在返回空字符串
         """
+        date_str = date_str or self.date
         for days in range(1, max_lookback_days + 1):
-            compare_date = get_date_before(days)
-
-            # 检查该日期是否有数据（检查一个文件即可）
-            test_file = os.path.join(
-                DATA_DIR, "raw", compare_date, "app_store", "health_fitness.json"
-            )
+            compare_date = get_date_before(days, date_str)
 
-            if os.path.exists(test_file):
+            # 检查该日期是否有数据（检查一个分类即可）
+            if self.store.exists(compare_date, "app_store", "health_fitness"):
                 self.logger.info(f"找到对比日期: {compare_date} (向前{days}天)")
                 return compare_date
 
-        self.logger.warning(f"未找到可用的对比日期（向前查找{max_lookback_days}天）")
+        self.logger.warning(f"未找到可用的对比日期（{date_str} 向前查找{max_lookback_days}天）")
         return ""
 
     def load_analyzed_apps(self) -> Set[str]:
@@ -130,22 +114,19 @@ class NewAppDetector:
         Returns:
             Set[str]: 已分析的app_id集合
         """
-        data = load_from_json(self.analyzed_apps_file)
-        return set(data.get("analyzed_apps", []))
+        return self.analyzed_registry.app_ids()
 
-    def save_analyzed_apps(self, app_ids: Set[str]):
+    def record_analyzed_apps(self, app_ids: Iterable[str]) -> int:
         """
-        保存已分析的产品记录
+        记录已分析的产品（只追加新增的记录，并导出 analyzed_apps.json）
 
         Args:
-            app_ids: app_id集合
+            app_ids: app_id列表
+
+        Returns:
+            int: 新增的记录数
         """
-        data = {
-            "analyzed_apps": list(app_ids),
-            "last_updated": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-            "total_count": len(app_ids)
-        }
-        save_to_json(data, self.analyzed_apps_file)
+        return self.analyzed_registry.add(app_ids, source="detector")
 
     def detect_all_platforms(self, compare_date: str, skip_analyzed=True) -> Dict:
         """
@@ -164,85 +145,269 @@ class NewAppDetector:
         self.logger.info(f"对比: {compare_date}")
         self.logger.info("=" * 60)
 
-        all_new_apps = []
         analyzed_apps = self.load_analyzed_apps() if skip_analyzed else set()
 
-        # 检测 App Store
-        self.logger.info("检测 App Store...")
-        for category_key, category_info in APP_STORE_CATEGORIES.items():
-            category_name = category_info["name_cn"]
+        # 两天的榜单各只加载一次，一次遍历得到全部平台和分类的新上榜产品
+        new_entries = self.engine.new_entries(self.date, compare_date)
+        all_new_apps = self.collect_new_apps(self.date, new_entries, analyzed_apps)
 
-            today_apps = self.load_ranking_data(self.date, "app_store", category_key)
-            yesterday_apps = self.load_ranking_data(compare_date, "app_store", category_key)
+        result = self.build_result(self.date, compare_date, all_new_apps)
+        if self.save_result(result):
+            self.logger.info(f"结果已保存: {compressed_path(self.result_file(self.date), self.compression)}")
+            self.logger.info(f"识别完成，共 {len(all_new_apps)} 个新上榜产品")
+        else:
+            self.logger.error("结果保存失败")
 
-            if not today_apps:
-                self.logger.warning(f"{category_name} - 今天无数据")
-                continue
+        self.logger.info("=" * 60)
+        self.logger.info(f"识别完成，共发现 {len(all_new_apps)} 个新上榜产品")
+        self.logger.info("=" * 60)
 
-            if not yesterday_apps:
-                self.logger.warning(f"{category_name} - 对比日期无数据")
-                continue
+        return result
 
-            new_apps = self.find_new_apps(today_apps, yesterday_apps)
+    def collect_new_apps(self, date_str: str, new_entries: Dict, analyzed_apps: Set[str],
+                         verbose: bool = True) -> List[Dict]:
+        """
+        汇总各分类的新上榜产品（按平台、分类顺序）
+
+        Args:
+            date_str: 识别日期
+            new_entries: DetectionEngine.new_entries 的结果
+            analyzed_apps: 需要跳过的 app_id
+            verbose: 是否逐个分类记录日志
+
+        Returns:
+            List[Dict]: 新上榜产品列表
+        """
+        all_new_apps = []
+        current_platform = None
+        for (platform, category_key), new_apps in new_entries.items():
+            if verbose and platform != current_platform:
+                current_platform = platform
+                self.logger.info(f"检测 {PLATFORM_NAMES[platform]}...")
+            category_name = PLATFORM_CATEGORIES[platform][category_key]["name_cn"]
+
+            if new_apps is None:
+                if not verbose:
+                    continue
+                if not self.engine.load(date_str).has((platform, category_key)):
+                    self.logger.warning(f"{category_name} - 今天无数据")
+                else:
+                    self.logger.warning(f"{category_name} - 对比日期无数据")
+                continue
 
             # 过滤已分析的产品
-            if skip_analyzed:
+            if analyzed_apps:
                 new_apps = [app for app in new_apps if app.get("app_id") not in analyzed_apps]
 
-            if new_apps:
-                self.logger.info(f"{category_name} - 发现 {len(new_apps)} 个新上榜产品")
-                all_new_apps.extend(new_apps)
-            else:
-                self.logger.info(f"{category_name} - 无新上榜产品")
+            if verbose:
+                if new_apps:
+                    self.logger.info(f"{category_name} - 发现 {len(new_apps)} 个新上榜产品")
+                else:
+                    self.logger.info(f"{category_name} - 无新上榜产品")
+            all_new_apps.extend(new_apps)
+        return all_new_apps
+
+    def result_file(self, date_str: str) -> str:
+        """识别结果文件路径（未加压缩后缀）"""
+        return os.path.join(DATA_DIR, "new_apps", f"{date_str}.json")
+
+    def load_result(self, date_str: str) -> Dict:
+        """读取已保存的识别结果（不存在时为空字典）"""
+        return load_from_json(self.result_file(date_str))
+
+    @staticmethod
+    def result_dates() -> List[str]:
+        """data/new_apps 中已有识别结果的日期（升序）"""
+        new_apps_dir = os.path.join(DATA_DIR, "new_apps")
+        if not os.path.isdir(new_apps_dir):
+            return []
+        return sorted({
+            name.split('.json')[0] for name in os.listdir(new_apps_dir)
+            if name.endswith(JSON_FILE_SUFFIXES) and is_valid_date(name.split('.json')[0])
+        })
+
+    @staticmethod
+    def build_result(date_str: str, compare_date: str, new_apps: List[Dict]) -> Dict:
+        """识别结果"""
+        return {
+            "date": date_str,
+            "compare_date": compare_date,
+            "total_count": len(new_apps),
+            "new_apps": new_apps,
+            "generated_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        }
+
+    def save_result(self, result: Dict) -> bool:
+        """保存识别结果到 data/new_apps/{日期}.json（按配置压缩）"""
+        return save_compressed_json(result, self.result_file(result["date"]), self.compression, self.canonical)
+
+    def load_presence_index(self) -> PresenceIndex:
+        """
+        打开上榜位图索引；索引不存在或晚于榜单存储的最早日期开始时（如新检出的仓库只有爬虫增量写入的当天），
+        从榜单存储重建
+
+        Returns:
+            PresenceIndex: 上榜位图索引
+        """
+        presence_dir = os.path.join(DATA_DIR, "presence")
+        index = PresenceIndex(presence_dir)
+        dates = [date_str for date_str in self.store.list_dates() if date_str <= self.date]
+        if dates and not index.covers(min(dates)):
+            self.logger.info(f"上榜位图索引缺失或不完整，从榜单存储重建（{len(dates)} 天）...")
+            index = PresenceIndex.rebuild(presence_dir, iter_store_days(self.store, PLATFORM_CATEGORIES))
+            self.logger.info(f"上榜位图索引已重建: {len(index)} 个应用")
+        return index
+
+    def detect_presence(self, mode: str, min_absent_days: int = None, streak_days: int = None) -> Dict:
+        """
+        基于上榜位图索引识别（不与单个对比日期比较，也不过滤已分析产品）
 
-        # 检测 Google Play
-        self.logger.info("检测 Google Play...")
-        for category_key, category_info in GOOGLE_PLAY_CATEGORIES.items():
-            category_name = category_info["name_cn"]
+        - first-seen：首次上榜，此前从未出现在任何分类的榜单上
+        - reentry：离开该分类至少 min_absent_days 天后重新上榜
+        - streak：在该分类连续在榜恰好 streak_days 天
 
-            today_apps = self.load_ranking_data(self.date, "google_play", category_key)
-            yesterday_apps = self.load_ranking_data(compare_date, "google_play", category_key)
+        结果保存到 data/new_apps/{模式}/{日期}.json，结构与新上榜结果相同
 
-            if not today_apps:
+        Args:
+            mode: 识别模式（PRESENCE_MODES）
+            min_absent_days: reentry 的最少离榜天数，默认读取 ANALYTICS_CONFIG["presence"]
+            streak_days: streak 的连续天数，默认读取 ANALYTICS_CONFIG["presence"]
+
+        Returns:
+            Dict: 识别结果
+        """
+        presence_config = ANALYTICS_CONFIG.get("presence", {})
+        params = {}
+        if mode == "reentry":
+            params["min_absent_days"] = min_absent_days or presence_config.get("min_absent_days", 7)
+        elif mode == "streak":
+            params["streak_days"] = streak_days or presence_config.get("streak_days", 7)
+
+        self.logger.info("=" * 60)
+        self.logger.info(f"上榜位图识别（{mode}）")
+        self.logger.info(f"今天: {self.date}")
+        for name, value in params.items():
+            self.logger.info(f"{name}: {value}")
+        self.logger.info("=" * 60)
+
+        index = self.load_presence_index()
+        today = self.engine.load(self.date)
+        all_apps = []
+        current_platform = None
+        for platform, category_key in self.engine.sections:
+            if platform != current_platform:
+                current_platform = platform
+                self.logger.info(f"检测 {PLATFORM_NAMES[platform]}...")
+            category_name = PLATFORM_CATEGORIES[platform][category_key]["name_cn"]
+
+            if not today.has((platform, category_key)):
                 self.logger.warning(f"{category_name} - 今天无数据")
                 continue
-
-            if not yesterday_apps:
-                self.logger.warning(f"{category_name} - 对比日期无数据")
+            if not index.observed_on(self.date, platform, category_key):
+                self.logger.warning(f"{category_name} - 位图索引中无今天的数据（可运行 python scripts/presence_index.py build 重建）")
+                continue
+            if not index.has_history(self.date, platform, category_key):
+                self.logger.warning(f"{category_name} - 位图索引中无今天之前的数据，无法判断，跳过")
                 continue
 
-            new_apps = self.find_new_apps(today_apps, yesterday_apps)
-
-            # 过滤已分析的产品
-            if skip_analyzed:
-                new_apps = [app for app in new_apps if app.get("app_id") not in analyzed_apps]
+            apps = today.sections[(platform, category_key)]
+            app_ids = [app["app_id"] for app in apps if app.get("app_id")]
+            if mode == "first-seen":
+                matched = index.first_seen(self.date, platform, category_key, app_ids)
+            elif mode == "reentry":
+                matched = index.reentered(self.date, platform, category_key, app_ids, params["min_absent_days"])
+            else:
+                matched = index.streak(self.date, platform, category_key, app_ids, params["streak_days"])
 
-            if new_apps:
-                self.logger.info(f"{category_name} - 发现 {len(new_apps)} 个新上榜产品")
-                all_new_apps.extend(new_apps)
+            matched = set(matched)
+            found = [app for app in apps if app.get("app_id") in matched]
+            if found:
+                self.logger.info(f"{category_name} - 发现 {len(found)} 个产品")
+                all_apps.extend(found)
             else:
-                self.logger.info(f"{category_name} - 无新上榜产品")
+                self.logger.info(f"{category_name} - 无符合条件的产品")
 
-        # 保存结果
         result = {
             "date": self.date,
-            "compare_date": compare_date,
-            "total_count": len(all_new_apps),
-            "new_apps": all_new_apps,
+            "mode": mode,
+            **params,
+            "total_count": len(all_apps),
+            "new_apps": all_apps,
             "generated_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         }
-
-        output_file = os.path.join(DATA_DIR, "new_apps", f"{self.date}.json")
-        if save_to_json(result, output_file):
-            self.logger.info(f"结果已保存: {output_file}")
-            self.logger.info(f"识别完成，共 {len(all_new_apps)} 个新上榜产品")
+        output_file = os.path.join(DATA_DIR, "new_apps", mode, f"{self.date}.json")
+        if save_compressed_json(result, output_file, self.compression, self.canonical):
+            self.logger.info(f"结果已保存: {compressed_path(output_file, self.compression)}")
         else:
             self.logger.error("结果保存失败")
 
         self.logger.info("=" * 60)
-        self.logger.info(f"识别完成，共发现 {len(all_new_apps)} 个新上榜产品")
+        self.logger.info(f"识别完成，共发现 {len(all_apps)} 个产品")
         self.logger.info("=" * 60)
+        return result
+
+    def build_movers(self, date_str: str, compare_date: str) -> Dict:
+        """
+        全部分类的排名变化（见 find_rank_movers），参数读取 ANALYTICS_CONFIG["movers"]
 
+        Args:
+            date_str: 日期
+            compare_date: 对比日期
+
+        Returns:
+            Dict: 排名变化结果
+        """
+        movers_config = ANALYTICS_CONFIG.get("movers", {})
+        ratio = movers_config.get("min_rank_jump_ratio", 0.2)
+        z_threshold = movers_config.get("z_threshold", 3.0)
+        min_rating_count = movers_config.get("min_rating_count", 20)
+        days = (datetime.strptime(date_str, "%Y-%m-%d") - datetime.strptime(compare_date, "%Y-%m-%d")).days
+
+        today, before = self.engine.load(date_str), self.engine.load(compare_date)
+        movers = {"climbers": [], "fallers": [], "breakouts": []}
+        for section in self.engine.sections:
+            if today.has(section) and before.has(section):
+                for kind, apps in find_rank_movers(
+                    today.sections[section], before.sections[section], days, ratio, z_threshold, min_rating_count
+                ).items():
+                    movers[kind].extend(apps)
+        return {
+            "date": date_str,
+            "compare_date": compare_date,
+            "min_rank_jump_ratio": ratio,
+            "z_threshold": z_threshold,
+            "min_rating_count": min_rating_count,
+            **{f"{kind}_count": len(apps) for kind, apps in movers.items()},
+            **movers,
+            "generated_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        }
+
+    def save_movers(self, result: Dict) -> bool:
+        """保存排名变化结果到 data/movers/{日期}.json（按配置压缩）"""
+        output_file = os.path.join(DATA_DIR, "movers", f"{result['date']}.json")
+        return save_compressed_json(result, output_file, self.compression, self.canonical)
+
+    def detect_movers(self, compare_date: str) -> Optional[Dict]:
+        """
+        识别排名变化并保存（需要 numpy）
+
+        Args:
+            compare_date: 对比日期
+
+        Returns:
+            Optional[Dict]: 排名变化结果，未安装 numpy 时返回 None
+        """
+        if not NUMPY_AVAILABLE:
+            self.logger.warning("numpy 未安装，跳过排名变化识别")
+            return None
+        result = self.build_movers(self.date, compare_date)
+        if self.save_movers(result):
+            self.logger.info(
+                f"排名变化: 上升 {result['climbers_count']} 个，下降 {result['fallers_count']} 个，"
+                f"评价数异常增长 {result['breakouts_count']} 个"
+            )
+        else:
+            self.logger.error("排名变化结果保存失败")
         return result
 
     def run(self, force=False):
@@ -267,50 +432,212 @@ class NewAppDetector:
 
         # 3. 更新已分析记录（如果不是force模式）
         if not force and result["new_apps"]:
-            analyzed_apps = self.load_analyzed_apps()
-            new_app_ids = {app["app_id"] for app in result["new_apps"]}
-            analyzed_apps.update(new_app_ids)
-            self.save_analyzed_apps(analyzed_apps)
-            self.logger.info(f"已更新分析记录（共 {len(analyzed_apps)} 个产品）")
+            added = self.record_analyzed_apps(app["app_id"] for app in result["new_apps"])
+            self.logger.info(f"已更新分析记录（新增 {added} 个，共 {len(self.analyzed_registry)} 个产品）")
+
+        # 4. 排名变化（上升、下降、评价数异常增长）
+        if ANALYTICS_CONFIG.get("movers", {}).get("enabled"):
+            self.detect_movers(compare_date)
 
         end_time = datetime.now()
         duration = (end_time - start_time).total_seconds()
         self.logger.info(f"耗时: {duration:.1f} 秒")
 
+    def backfill(self, start_date: str, end_date: str, force=False, workers=None, max_lookback_days=3) -> List[Dict]:
+        """
+        回填日期范围内每天的识别结果
+
+        范围内有数据的日期按顺序切成连续的段，由进程池并行识别（段内相邻日期共用识别引擎的缓存，
+        每天只加载一次，既作为"今天"也作为后一天的对比日期）；结果按日期顺序在主进程中去重并保存，
+        开启排名变化时同时写入 data/movers/{日期}.json。
+        已有识别结果的日期保留原文件（其中的产品计为已报告），只补齐缺少结果的日期；
+        去重按日期顺序重放：开始日期之前的识别结果和范围内更早日期报告过的产品不再报告。
+        分析器单独记录的产品没有对应日期，不参与过滤，补齐的结果可能比当天实际运行时多。
+
+        Args:
+            start_date: 开始日期（含）
+            end_date: 结束日期（含）
+            force: 覆盖已有结果，不去重，保存每天与对比日期的完整差集，也不更新已分析记录
+            workers: 进程数，默认 CPU 核数
+            max_lookback_days: 对比日期最多向前查找的天数
+
+        Returns:
+            List[Dict]: 已保存的识别结果（按日期升序）
+        """
+        start_time = datetime.now()
+        dates = sorted(date_str for date_str in self.store.list_dates() if start_date <= date_str <= end_date)
+        if not dates:
+            self.logger.warning(f"{start_date} ~ {end_date} 没有榜单数据")
+            return []
+
+        workers = max(1, min(workers or os.cpu_count() or 1, len(dates)))
+        size = -(-len(dates) // workers)
+        chunks = [dates[i:i + size] for i in range(0, len(dates), size)]
+        self.logger.info("=" * 60)
+        self.logger.info(f"回填新上榜产品: {dates[0]} ~ {dates[-1]}，{len(dates)} 天，{len(chunks)} 个进程")
+        self.logger.info("=" * 60)
+
+        if len(chunks) > 1:
+            with ProcessPoolExecutor(max_workers=len(chunks)) as executor:
+                detected = [
+                    day for chunk in executor.map(
+                        _detect_range, chunks, repeat(self.storage_format), repeat(max_lookback_days)
+                    ) for day in chunk
+                ]
+        else:
+            detected = _detect_range(dates, self.storage_format, max_lookback_days)
+
+        results = []
+        reported = set()
+        if not force:
+            for date_str in self.result_dates():
+                if date_str < dates[0]:
+                    reported.update(app.get("app_id") for app in self.load_result(date_str).get("new_apps", []))
+            self.logger.info(f"{dates[0]} 之前的识别结果中已报告 {len(reported)} 个产品")
+
+        for date_str, compare_date, new_entries, movers in detected:
+            if new_entries is None:
+                self.logger.warning(f"{date_str} - 未找到对比日期，跳过")
+                continue
+            if movers is not None and not self.save_movers(movers):
+                self.logger.error(f"{date_str} - 排名变化结果保存失败")
+            existing = {} if force else self.load_result(date_str)
+            if existing:
+                reported.update(app.get("app_id") for app in existing.get("new_apps", []))
+                self.logger.info(f"{date_str} - 已有识别结果，保留（--force 覆盖）")
+                continue
+            new_apps = self.collect_new_apps(date_str, new_entries, reported, verbose=False)
+            if not force:
+                reported.update(app["app_id"] for app in new_apps)
+            result = self.build_result(date_str, compare_date, new_apps)
+            if not self.save_result(result):
+                self.logger.error(f"{date_str} - 结果保存失败")
+                continue
+            self.logger.info(f"{date_str}（对比 {compare_date}）- {len(new_apps)} 个新上榜产品")
+            results.append(result)
+
+        if not force and reported:
+            added = self.record_analyzed_apps(
+                app["app_id"] for result in results for app in result["new_apps"]
+            )
+            self.logger.info(f"已更新分析记录（新增 {added} 个，共 {len(self.analyzed_registry)} 个产品）")
+
+        duration = (datetime.now() - start_time).total_seconds()
+        self.logger.info(f"回填完成: 保存 {len(results)} 天，耗时 {duration:.1f} 秒")
+        return results
+
 
-def update_new_apps_dates_json(date_str):
+def _detect_range(dates: List[str], storage_format: str, max_lookback_days: int) -> List[tuple]:
+    """
+    进程池任务：按日期顺序识别一段连续日期
+
+    Returns:
+        List[Tuple]: (日期, 对比日期, DetectionEngine.new_entries 的结果, 排名变化结果)；
+                     没有对比日期时后三项为 "" 和 None，未开启排名变化或未安装 numpy 时最后一项为 None
+    """
+    detector = NewAppDetector(dates[0], storage_format=storage_format)
+    with_movers = NUMPY_AVAILABLE and ANALYTICS_CONFIG.get("movers", {}).get("enabled")
+    results = []
+    with detector.engine:
+        for date_str in dates:
+            compare_date = detector.find_compare_date(max_lookback_days, date_str)
+            if not compare_date:
+                results.append((date_str, compare_date, None, None))
+                continue
+            new_entries = detector.engine.new_entries(date_str, compare_date)
+            movers = detector.build_movers(date_str, compare_date) if with_movers else None
+            results.append((date_str, compare_date, new_entries, movers))
+    return results
+
+
+def find_rank_movers(today_apps: List[Dict], before_apps: List[Dict], days: int,
+                     min_rank_jump_ratio: float, z_threshold: float, min_rating_count: int) -> Dict[str, List[Dict]]:
+    """
+    一个分类的排名变化：两天的榜单按今天的应用顺序对齐为数组，用 NumPy 计算排名变化、评价数增速和 z 分数
+
+    Args:
+        today_apps: 今天的应用列表
+        before_apps: 对比日期的应用列表
+        days: 两个日期相隔的天数
+        min_rank_jump_ratio: 排名变化至少为榜单长度的比例（100 名的榜单取 0.2 即 20 名）
+        z_threshold: 评价数日增长率的 z 分数阈值
+        min_rating_count: 对比日期评价数少于该值的应用不计算增长率（避免 0 → 1 之类的噪声）
+
+    Returns:
+        Dict: {"climbers": 排名上升, "fallers": 排名下降, "breakouts": 评价数增长异常快}，
+              每项为应用信息加上变化字段，按变化幅度排序
+    """
+    before = {app["app_id"]: app for app in before_apps if app.get("app_id")}
+    apps = [app for app in today_apps if app.get("app_id")]
+    if not apps or not before:
+        return {"climbers": [], "fallers": [], "breakouts": []}
+
+    def column(source, field):
+        return np.array([
+            value if (value := item.get(field)) is not None else np.nan for item in source
+        ], dtype=np.float64)
+
+    previous = [before.get(app["app_id"], {}) for app in apps]
+    rank, previous_rank = column(apps, "rank"), column(previous, "rank")
+    rating_count, previous_rating_count = column(apps, "rating_count"), column(previous, "rating_count")
+
+    # 排名变化（正数为上升）；对比日期不在榜的应用为 NaN，不参与比较
+    rank_change = previous_rank - rank
+    threshold = max(1, round(min_rank_jump_ratio * len(today_apps)))
+
+    # 评价数每天增加的数量和相对增长率，对增长率计算 z 分数
+    velocity = (rating_count - previous_rating_count) / max(days, 1)
+    growth = velocity / np.maximum(previous_rating_count, 1)
+    valid = np.isfinite(growth) & (np.nan_to_num(previous_rating_count) >= min_rating_count)
+    z_score = np.full(len(apps), np.nan)
+    if valid.sum() >= 3 and growth[valid].std() > 0:
+        z_score[valid] = (growth[valid] - growth[valid].mean()) / growth[valid].std()
+
+    def entries(indices, order, **fields):
+        indices = indices[np.argsort(order[indices], kind="stable")]
+        return [
+            {**apps[i], **{name: convert(values[i]) for name, (values, convert) in fields.items()}}
+            for i in indices
+        ]
+
+    rank_fields = {"previous_rank": (previous_rank, int), "rank_change": (rank_change, int)}
+    climbers = np.flatnonzero(rank_change >= threshold)
+    fallers = np.flatnonzero(rank_change <= -threshold)
+    breakouts = np.flatnonzero(valid & (velocity > 0) & (np.nan_to_num(z_score) >= z_threshold))
+    return {
+        "climbers": entries(climbers, -rank_change, **rank_fields),
+        "fallers": entries(fallers, rank_change, **rank_fields),
+        "breakouts": entries(
+            breakouts, -z_score,
+            previous_rating_count=(previous_rating_count, int),
+            rating_velocity=(velocity, lambda value: round(float(value), 1)),
+            rating_growth=(growth, lambda value: round(float(value), 5)),
+            z_score=(z_score, lambda value: round(float(value), 2))
+        )
+    }
+
+
+def update_new_apps_dates_json(*date_strs):
     """
     更新new_apps/dates.json文件，添加新日期
+
+    列出 new_apps 目录中全部有识别结果的日期，不限制数量
     
     Args:
-        date_str: 日期字符串（YYYY-MM-DD）
+        date_strs: 日期字符串（YYYY-MM-DD），回填时一次传入全部日期
     """
-    import json
-    dates_file = os.path.join(DATA_DIR, "new_apps", "dates.json")
+    new_apps_dir = os.path.join(DATA_DIR, "new_apps")
+    dates_file = os.path.join(new_apps_dir, "dates.json")
     
-    # 读取现有的dates.json
-    dates = []
-    if os.path.exists(dates_file):
-        try:
-            with open(dates_file, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                dates = data.get('dates', [])
-        except Exception as e:
-            print(f"读取new_apps/dates.json失败: {e}")
+    # 读取现有的dates.json（不存在或读取失败时为空列表），补上目录中实际存在的结果文件
+    existing = load_from_json(dates_file).get('dates', [])
+    dates = sorted(set(existing) | set(NewAppDetector.result_dates()) | set(date_strs), reverse=True)
     
-    # 添加新日期（如果不存在）
-    if date_str not in dates:
-        dates.insert(0, date_str)  # 插入到最前面
-        # 限制只保留最近30天的数据
-        dates = dates[:30]
-        
-        # 保存dates.json
-        try:
-            with open(dates_file, 'w', encoding='utf-8') as f:
-                json.dump({'dates': dates}, f, indent=2, ensure_ascii=False)
-            print(f"✓ 已更新new_apps/dates.json，添加日期: {date_str}")
-        except Exception as e:
-            print(f"保存new_apps/dates.json失败: {e}")
+    if dates != existing:
+        # 保存dates.json（需要人工查看，保持缩进格式）
+        if save_to_json({'dates': dates}, dates_file):
+            added = ", ".join(date_strs) if len(date_strs) <= 3 else f"{len(date_strs)} 个日期"
+            print(f"✓ 已更新new_apps/dates.json，添加日期: {added}（共 {len(dates)} 天）")
 
 
 def main():
@@ -323,6 +650,12 @@ def main():
   python detector.py                    # 检测今天的新上榜产品
   python detector.py --date 2026-02-12  # 检测指定日期
   python detector.py --force            # 强制重新识别（不跳过已分析）
+  python detector.py --storage sqlite   # 从 SQLite 数据库读取榜单
+  python detector.py --from 2026-02-17 --to 2026-08-22             # 补齐日期范围内缺少的识别结果
+  python detector.py --from 2026-02-17 --workers 4 --force         # 4 个进程并行回填，覆盖已有结果，不去重
+  python detector.py --mode first-seen                             # 首次上榜（此前从未上过任何榜单）
+  python detector.py --mode reentry --min-absent-days 14           # 离榜至少 14 天后重新上榜
+  python detector.py --mode streak --streak-days 7                 # 连续在榜满 7 天
         """
     )
 
@@ -338,16 +671,84 @@ def main():
         help="强制重新识别（不跳过已分析的产品）"
     )
 
+    parser.add_argument(
+        "--storage",
+        type=str,
+        choices=list(RANKING_STORES),
+        help="榜单存储格式（默认读取 STORAGE_CONFIG）"
+    )
+
+    parser.add_argument(
+        "--mode",
+        type=str,
+        choices=DETECTION_MODES,
+        default="new",
+        help="识别模式：new（与对比日期比较，默认）/ first-seen / reentry / streak（基于上榜位图索引）"
+    )
+
+    parser.add_argument(
+        "--min-absent-days",
+        type=int,
+        help="reentry 模式的最少离榜天数（默认读取 ANALYTICS_CONFIG）"
+    )
+
+    parser.add_argument(
+        "--streak-days",
+        type=int,
+        help="streak 模式的连续在榜天数（默认读取 ANALYTICS_CONFIG）"
+    )
+
+    parser.add_argument(
+        "--from",
+        dest="from_date",
+        type=str,
+        help="回填开始日期（YYYY-MM-DD），与 --to 一起识别范围内有数据的每一天"
+    )
+
+    parser.add_argument(
+        "--to",
+        dest="to_date",
+        type=str,
+        help="回填结束日期（YYYY-MM-DD），默认今天"
+    )
+
+    parser.add_argument(
+        "--workers",
+        type=int,
+        help="回填使用的进程数（默认 CPU 核数）"
+    )
+
     args = parser.parse_args()
 
     # 验证日期
-    if args.date and not is_valid_date(args.date):
-        print(f"错误: 无效的日期格式: {args.date}")
-        print("请使用格式: YYYY-MM-DD")
-        sys.exit(1)
+    for value in (args.date, args.from_date, args.to_date):
+        if value and not is_valid_date(value):
+            print(f"错误: 无效的日期格式: {value}")
+            print("请使用格式: YYYY-MM-DD")
+            sys.exit(1)
+
+    if args.mode != "new":
+        if args.from_date or args.to_date:
+            print("错误: 回填只支持 new 模式")
+            sys.exit(1)
+        detector = NewAppDetector(args.date, storage_format=args.storage)
+        detector.detect_presence(args.mode, args.min_absent_days, args.streak_days)
+        return
+
+    if args.from_date or args.to_date:
+        if not args.from_date:
+            print("错误: 回填需要指定 --from")
+            sys.exit(1)
+        detector = NewAppDetector(storage_format=args.storage)
+        results = detector.backfill(args.from_date, args.to_date or get_today(), force=args.force, workers=args.workers)
+
+        # 全部结果保存后只更新一次new_apps/dates.json
+        if results:
+            update_new_apps_dates_json(*(result["date"] for result in results))
+        return
 
     # 创建识别器并运行
-    detector = NewAppDetector(args.date)
+    detector = NewAppDetector(args.date, storage_format=args.storage)
     detector.run(force=args.force)
     
     # 更新new_apps/dates.json
@@ -5,8 +5,11 @@
 
 import sys
 import os
+import math
 import argparse
 from datetime import datetime
+from typing import List, Dict
+from urllib.parse import urlparse
 
 # 添加项目根目录到路径
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -15,25 +18,40 @@ from config_simple import (
     APP_STORE_CATEGORIES,
     GOOGLE_PLAY_CATEGORIES,
     SCRAPER_CONFIG,
+    STORAGE_CONFIG,
+    ANALYTICS_CONFIG,
     DATA_DIR,
     LOG_DIR
 )
-from scrapers.app_store_scraper import AppStoreScraper
+from scrapers.app_store_scraper import AppStoreScraper, LOOKUP_BATCH_SIZE
+from scrapers.http_client import HttpClient
+from scrapers.http_cache import HttpCache
 from scrapers.google_play_scraper import GooglePlayScraper, GOOGLE_PLAY_AVAILABLE
+from scrapers.fixtures import FixtureStore
 from utils.logger import setup_logger
-from utils.data_storage import save_to_json, get_data_file_path
+from utils.data_storage import RANKING_STORES, load_from_json, open_ranking_store, save_to_json
 from utils.date_utils import get_today, is_valid_date
+from utils.rate_limiter import HostRateLimiter
+from utils.retry import RetryPolicy, CircuitBreaker, Deadline
+from utils.ttl_cache import TTLCache
+from utils.concurrency import CategoryTask, run_category_tasks
+from utils.rank_cube import NUMPY_AVAILABLE, RankCube, slot_key
+from utils.app_history import AppHistoryIndex
+from utils.presence_index import PresenceIndex
 
 
 class RankingMonitorScraper:
     """榜单监控爬虫主类"""
 
-    def __init__(self, date_str=None):
+    def __init__(self, date_str=None, mode=None, fixture_mode=None, storage_format=None):
         """
         初始化爬虫
 
         Args:
             date_str: 日期字符串（YYYY-MM-DD），默认今天
+            mode: 分类爬取方式（thread / sequential），默认读取配置
+            fixture_mode: 录制 / 回放方式（off / record / replay），默认读取配置
+            storage_format: 榜单存储格式（json / snapshot / catalog / sqlite），默认读取配置
         """
         self.date = date_str or get_today()
         self.logger = setup_logger(
@@ -41,30 +59,489 @@ class RankingMonitorScraper:
             os.path.join(LOG_DIR, "scraper.log")
         )
 
+        # 录制 / 回放：回放时请求发往替身服务器，结果保存在录制目录下，不覆盖真实数据
+        fixtures_config = SCRAPER_CONFIG.get("fixtures", {})
+        self.fixture_mode = fixture_mode or fixtures_config.get("mode", "off")
+        self.data_dir = DATA_DIR
+        self.recorder = None
+        replay_url = None
+        if self.fixture_mode == "record":
+            self.recorder = FixtureStore(fixtures_config["dir"])
+            self.logger.info(f"录制模式：响应保存到 {fixtures_config['dir']}")
+        elif self.fixture_mode == "replay":
+            replay_url = fixtures_config["replay_url"]
+            self.data_dir = os.path.join(fixtures_config["dir"], "output")
+            self.logger.info(f"回放模式：请求发往 {replay_url}，结果保存到 {self.data_dir}")
+        # 录制和回放时不使用详细信息缓存，保证每个 lookup / 详情请求都被录制和回放
+        use_data_caches = self.fixture_mode not in ("record", "replay")
+
+        # 榜单存储（按配置的格式保存，缓冲写入的格式在每次爬取结束时统一落盘）
+        self.store = open_ranking_store(self.data_dir, storage_format or STORAGE_CONFIG.get("format", "json"),
+                                        STORAGE_CONFIG.get("compression"), STORAGE_CONFIG.get("canonical", False))
+
+        # 排名立方体、应用历史索引、上榜位图索引：本次保存的主商店榜单在落盘时（详细信息补全之后）统一写入
+        self._primary_sections = {}
+        self.rank_cube = None
+        if ANALYTICS_CONFIG.get("rank_cube", {}).get("enabled"):
+            if NUMPY_AVAILABLE:
+                self.rank_cube = RankCube(os.path.join(self.data_dir, "cube"))
+            else:
+                self.logger.warning("numpy 未安装，不更新排名立方体")
+        self.app_history = None
+        if ANALYTICS_CONFIG.get("app_history", {}).get("enabled"):
+            self.app_history = AppHistoryIndex(os.path.join(self.data_dir, "history"))
+        self.presence_index = None
+        if ANALYTICS_CONFIG.get("presence", {}).get("enabled"):
+            self.presence_index = PresenceIndex(os.path.join(self.data_dir, "presence"))
+
+        # 并发配置
+        self.concurrency_config = SCRAPER_CONFIG.get("concurrency", {})
+        self.mode = mode or self.concurrency_config.get("mode", "sequential")
+
+        # 两个爬虫共享的按主机限流器
+        self.rate_limiter = HostRateLimiter(SCRAPER_CONFIG.get("rate_limit", {}), logger=self.logger)
+
+        # 两个爬虫共享的重试策略、熔断器和运行截止时间
+        self.retry_policy = RetryPolicy(
+            retry_times=SCRAPER_CONFIG.get("retry_times", 3),
+            **SCRAPER_CONFIG.get("retry", {})
+        )
+        self.circuit_breaker = CircuitBreaker(logger=self.logger, **SCRAPER_CONFIG.get("circuit_breaker", {}))
+        self.deadline = Deadline(SCRAPER_CONFIG.get("run_deadline"))
+
+        # 本次运行共享的 HTTP 连接池，大小与该主机的并发上限一致
+        # （回放时两个平台的请求发往同一个替身服务器，连接池大小取两者之和）
+        app_store_host = urlparse(AppStoreScraper.BASE_URL).netloc
+        pool_size = 1
+        if self.mode == "thread":
+            per_host = self.concurrency_config.get("per_host", {})
+            if replay_url:
+                pool_size = sum(per_host.values()) or 1
+            else:
+                pool_size = per_host.get(app_store_host, 1)
+        http_cache_config = SCRAPER_CONFIG.get("http_cache", {})
+        self.http_cache = None
+        if http_cache_config.get("enabled") and not replay_url:
+            self.http_cache = HttpCache(
+                os.path.join(DATA_DIR, "cache", "http"),
+                ttl=http_cache_config.get("ttl", 3600)
+            )
+        self.http_client = HttpClient(
+            pool_size=pool_size,
+            timeout=SCRAPER_CONFIG["timeout"],
+            logger=self.logger,
+            rate_limiter=self.rate_limiter,
+            retry_policy=self.retry_policy,
+            circuit_breaker=self.circuit_breaker,
+            deadline=self.deadline,
+            http_cache=self.http_cache,
+            recorder=self.recorder
+        )
+
         # 初始化爬虫实例
         app_store_config = SCRAPER_CONFIG["app_store"]
+        self.lookup_cache = None
+        if app_store_config.get("lookup_cache_ttl") and use_data_caches:
+            self.lookup_cache = TTLCache(
+                os.path.join(DATA_DIR, "cache", "itunes_lookup.json"),
+                app_store_config["lookup_cache_ttl"]
+            )
         self.app_store_scraper = AppStoreScraper(
             country=app_store_config["country"],
             limit=app_store_config["limit"],
             delay=app_store_config["delay"],
             timeout=SCRAPER_CONFIG["timeout"],
-            logger=self.logger
+            logger=self.logger,
+            http_client=self.http_client,
+            lookup_cache=self.lookup_cache,
+            base_url=replay_url
         )
+        # 各分类爬取结果，等待统一查询详细信息后保存
+        self._app_store_results = {}
+        self._google_play_results = {}
 
-        if GOOGLE_PLAY_AVAILABLE:
+        if GOOGLE_PLAY_AVAILABLE or replay_url:
             google_play_config = SCRAPER_CONFIG["google_play"]
+            details_config = google_play_config.get("details", {})
+            self.details_cache = None
+            if details_config.get("cache_ttl") and use_data_caches:
+                self.details_cache = TTLCache(
+                    os.path.join(DATA_DIR, "cache", "google_play_details.json"),
+                    details_config["cache_ttl"]
+                )
             self.google_play_scraper = GooglePlayScraper(
                 country=google_play_config["country"],
                 collection=google_play_config["collection"],
                 limit=google_play_config["limit"],
                 delay=google_play_config["delay"],
                 timeout=SCRAPER_CONFIG["timeout"],
-                logger=self.logger
+                logger=self.logger,
+                rate_limiter=self.rate_limiter,
+                retry_policy=self.retry_policy,
+                circuit_breaker=self.circuit_breaker,
+                deadline=self.deadline,
+                details_cache=self.details_cache,
+                details_workers=details_config.get("max_workers", 4),
+                base_url=replay_url,
+                http_client=self.http_client,
+                recorder=self.recorder
             )
         else:
             self.google_play_scraper = None
             self.logger.warning("Google Play 爬虫不可用（缺少依赖）")
 
+    def close(self):
+        """关闭共享的 HTTP 连接池和榜单存储（录制模式下同时写入录制索引）"""
+        self.http_client.close()
+        self.store.close()
+        if self.recorder is not None and self.recorder.save():
+            self.logger.info(f"已录制 {len(self.recorder)} 个响应")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def _is_primary(self, platform_key: str, country: str, collection: str) -> bool:
+        """是否为主商店（配置中的默认国家和榜单类型）"""
+        platform_config = SCRAPER_CONFIG[platform_key]
+        return (country, collection) == (platform_config["country"], platform_config.get("collection", "TOP_FREE"))
+
+    def _matrix(self, platform_key: str):
+        """
+        展开爬取矩阵
+
+        Returns:
+            List[Tuple]: (国家, 榜单类型, 优先级) 列表，主商店在前
+        """
+        platform_config = SCRAPER_CONFIG[platform_key]
+        matrix = SCRAPER_CONFIG.get("matrix", {}).get(platform_key, {})
+        countries = matrix.get("countries") or [platform_config["country"]]
+        collections = matrix.get("collections") or [platform_config.get("collection", "TOP_FREE")]
+        base_priority = matrix.get("priority", 0)
+
+        combos = [
+            (country, collection, base_priority + country_index + collection_index)
+            for country_index, country in enumerate(countries)
+            for collection_index, collection in enumerate(collections)
+        ]
+        # 主商店优先
+        combos.sort(key=lambda combo: not self._is_primary(platform_key, combo[0], combo[1]))
+        return combos
+
+    def _save_category(self, platform_key: str, platform_name: str, category_key: str,
+                       category_name: str, apps: List[Dict], country: str, collection: str) -> int:
+        """
+        保存单个分类的榜单数据
+
+        Returns:
+            int: 保存成功的应用数量（失败返回0）
+        """
+        data = {
+            "date": self.date,
+            "platform": platform_name,
+            "country": country,
+            "collection": collection,
+            "category": category_name,
+            "category_key": category_key,
+            "total_apps": len(apps),
+            "apps": apps
+        }
+
+        if self._is_primary(platform_key, country, collection):
+            saved = self.store.save_category(self.date, platform_key, category_key, data)
+            if saved:
+                self._primary_sections[(platform_key, category_key)] = apps
+        else:
+            saved = self.store.save_category(self.date, platform_key, category_key, data, country, collection)
+
+        if saved:
+            self.logger.info(f"{platform_name} - {category_name} ({country}/{collection}) 保存成功")
+            return len(apps)
+        self.logger.error(f"{platform_name} - {category_name} ({country}/{collection}) 保存失败")
+        return 0
+
+    def _flush_store(self):
+        """将本次爬取缓冲的数据一次性写入存储（快照等格式），并更新排名立方体、应用历史索引和上榜位图索引"""
+        if not self.store.flush():
+            self.logger.error(f"榜单数据写入失败（存储格式: {self.store.storage_format}）")
+
+        sections, self._primary_sections = self._primary_sections, {}
+        if not sections:
+            return
+        if self.rank_cube is not None:
+            cube_sections = {slot_key(platform, category): apps for (platform, category), apps in sections.items()}
+            if not self.rank_cube.add_day(self.date, cube_sections):
+                self.logger.error("排名立方体更新失败（可运行 python scripts/rank_cube.py build 重建）")
+        if self.app_history is not None:
+            saved = all([
+                self.app_history.add_category(self.date, platform, category, apps)
+                for (platform, category), apps in sections.items()
+            ])
+            if not (self.app_history.save() and saved):
+                self.logger.error("应用历史索引更新失败（可运行 python scripts/app_history.py build 重建）")
+        if self.presence_index is not None:
+            for (platform, category), apps in sections.items():
+                self.presence_index.add_category(self.date, platform, category, apps)
+            if not self.presence_index.save():
+                self.logger.error("上榜位图索引更新失败（可运行 python scripts/presence_index.py build 重建）")
+
+    def _scrape_app_store_category(self, category_key: str, country: str, collection: str) -> int:
+        """
+        爬取单个 App Store 分类的榜单
+
+        详细信息（评分、评价数）不在这里查询，所有分类爬取完成后
+        由 _enrich_and_save_app_store 跨分类去重批量查询并保存。
+
+        Args:
+            category_key: 分类key
+            country: 国家代码
+            collection: 榜单类型
+
+        Returns:
+            int: 获取到的应用数量（失败返回0）
+        """
+        category_info = APP_STORE_CATEGORIES[category_key]
+        category_name = category_info["name_cn"]
+        genre_id = category_info["genre_id"]
+
+        if self.deadline.expired():
+            self.logger.warning(f"App Store - {category_name} ({country}/{collection}) 超出运行截止时间，跳过")
+            return 0
+
+        try:
+            # 爬取数据
+            if SCRAPER_CONFIG["app_store"].get("streaming"):
+                # 只有解析是流式的：详细信息要在全部分类爬取完成后跨分类批量查询，
+                # 每个分类也整体保存为一个文件，解析出的应用记录仍需全部保留
+                apps = list(self.app_store_scraper.iter_category(
+                    genre_id, category_name, country=country, collection=collection
+                ))
+            else:
+                apps = self.app_store_scraper.scrape_category(
+                    genre_id, category_name, enrich=False, country=country, collection=collection
+                )
+
+            if apps:
+                self._app_store_results[(country, collection, category_key)] = apps
+                return len(apps)
+            self.logger.warning(f"App Store - {category_name} ({country}/{collection}) 未获取到数据")
+
+        except Exception as e:
+            self.logger.error(f"App Store - {category_name} ({country}/{collection}) 爬取异常: {e}")
+
+        return 0
+
+    def _enrich_and_save_app_store(self, tasks: List[CategoryTask]):
+        """
+        对本次爬取到的所有 App Store 分类按国家统一查询详细信息，然后逐个分类保存
+
+        Args:
+            tasks: App Store 分类任务列表（保存结果写回 task.app_count）
+        """
+        results, self._app_store_results = self._app_store_results, {}
+
+        countries = list(dict.fromkeys(country for country, _, _ in results))
+        for country in countries:
+            country_results = [apps for key, apps in results.items() if key[0] == country]
+            all_apps = [app for apps in country_results for app in apps]
+
+            self.logger.info(f"正在获取 App Store 详细信息（{country}）...")
+            cache_hits = self.lookup_cache.hits if self.lookup_cache else 0
+            lookup_requests = self.app_store_scraper.enrich_app_details(all_apps, country)
+
+            # 按分类单独查询时需要的请求次数，用于对比
+            per_category_requests = sum(
+                math.ceil(len({app["itunes_id"] for app in apps if app.get("itunes_id")}) / LOOKUP_BATCH_SIZE)
+                for apps in country_results
+            )
+            unique_ids = len({app["itunes_id"] for app in all_apps if app.get("itunes_id")})
+            self.logger.info(
+                f"Lookup 请求（{country}）: {lookup_requests} 次（按分类查询需 {per_category_requests} 次），"
+                f"应用 {len(all_apps)} 个，去重后 {unique_ids} 个，"
+                f"缓存命中 {(self.lookup_cache.hits if self.lookup_cache else 0) - cache_hits} 个"
+            )
+
+        for task in tasks:
+            apps = results.get(task.key)
+            if apps:
+                country, collection, category_key = task.key
+                category_name = APP_STORE_CATEGORIES[category_key]["name_cn"]
+                task.app_count = self._save_category(
+                    "app_store", "App Store", category_key, category_name, apps, country, collection
+                )
+            else:
+                task.app_count = 0
+
+    def _scrape_google_play_category(self, category_key: str, country: str, collection: str) -> int:
+        """
+        爬取单个 Google Play 分类的榜单
+
+        开启详情查询时，所有分类爬取完成后由 _enrich_and_save_google_play 统一查询并保存；
+        否则立即保存。
+
+        Args:
+            category_key: 分类key
+            country: 国家代码
+            collection: 榜单类型
+
+        Returns:
+            int: 获取到的应用数量（失败返回0）
+        """
+        category_info = GOOGLE_PLAY_CATEGORIES[category_key]
+        category_name = category_info["name_cn"]
+        category_en = category_info["name_en"]
+
+        if self.deadline.expired():
+            self.logger.warning(f"Google Play - {category_name} ({country}/{collection}) 超出运行截止时间，跳过")
+            return 0
+
+        try:
+            # 爬取数据
+            apps = self.google_play_scraper.scrape_category(
+                category_en, category_name, country=country, collection=collection
+            )
+
+            if apps:
+                if SCRAPER_CONFIG["google_play"].get("details", {}).get("enabled"):
+                    self._google_play_results[(country, collection, category_key)] = apps
+                    return len(apps)
+                return self._save_category(
+                    "google_play", "Google Play", category_key, category_name, apps, country, collection
+                )
+            self.logger.warning(f"Google Play - {category_name} ({country}/{collection}) 未获取到数据")
+
+        except Exception as e:
+            self.logger.error(f"Google Play - {category_name} ({country}/{collection}) 爬取异常: {e}")
+
+        return 0
+
+    def _enrich_and_save_google_play(self, tasks: List[CategoryTask]):
+        """
+        对本次爬取到的所有 Google Play 分类按国家并发查询应用详情，然后逐个分类保存
+
+        Args:
+            tasks: Google Play 分类任务列表（保存结果写回 task.app_count）
+        """
+        if not SCRAPER_CONFIG["google_play"].get("details", {}).get("enabled"):
+            return
+
+        results, self._google_play_results = self._google_play_results, {}
+
+        countries = list(dict.fromkeys(country for country, _, _ in results))
+        for country in countries:
+            all_apps = [app for key, apps in results.items() if key[0] == country for app in apps]
+
+            self.logger.info(f"正在获取 Google Play 应用详情（{country}）...")
+            start = datetime.now()
+            stats = self.google_play_scraper.enrich_app_details(all_apps, country)
+            self.logger.info(
+                f"Google Play 详情（{country}）: 查询 {stats['requests']} 个，缓存命中 {stats['cached']} 个，"
+                f"失败 {stats['failed']} 个，耗时 {(datetime.now() - start).total_seconds():.1f} 秒"
+            )
+
+        for task in tasks:
+            apps = results.get(task.key)
+            if apps:
+                country, collection, category_key = task.key
+                category_name = GOOGLE_PLAY_CATEGORIES[category_key]["name_cn"]
+                task.app_count = self._save_category(
+                    "google_play", "Google Play", category_key, category_name, apps, country, collection
+                )
+            else:
+                task.app_count = 0
+
+    def _app_store_tasks(self, categories=None) -> List[CategoryTask]:
+        """将 App Store 爬取矩阵展开为任务列表"""
+        target_categories = []
+        for category_key in categories or list(APP_STORE_CATEGORIES.keys()):
+            if category_key not in APP_STORE_CATEGORIES:
+                self.logger.warning(f"未知分类: {category_key}")
+                continue
+            target_categories.append(category_key)
+
+        tasks = []
+        for country, collection, priority in self._matrix("app_store"):
+            for category_key in target_categories:
+                tasks.append(CategoryTask(
+                    f"App Store - {APP_STORE_CATEGORIES[category_key]['name_cn']} ({country}/{collection})",
+                    self.app_store_scraper.host,
+                    lambda key=category_key, c=country, col=collection: self._scrape_app_store_category(key, c, col),
+                    key=(country, collection, category_key),
+                    priority=priority
+                ))
+        return tasks
+
+    def _google_play_tasks(self, categories=None) -> List[CategoryTask]:
+        """将 Google Play 爬取矩阵展开为任务列表"""
+        target_categories = []
+        for category_key in categories or list(GOOGLE_PLAY_CATEGORIES.keys()):
+            if category_key not in GOOGLE_PLAY_CATEGORIES:
+                self.logger.warning(f"未知分类: {category_key}")
+                continue
+            target_categories.append(category_key)
+
+        tasks = []
+        for country, collection, priority in self._matrix("google_play"):
+            for category_key in target_categories:
+                tasks.append(CategoryTask(
+                    f"Google Play - {GOOGLE_PLAY_CATEGORIES[category_key]['name_cn']} ({country}/{collection})",
+                    self.google_play_scraper.host,
+                    lambda key=category_key, c=country, col=collection: self._scrape_google_play_category(key, c, col),
+                    key=(country, collection, category_key),
+                    priority=priority
+                ))
+        return tasks
+
+    def _run_tasks(self, tasks: List[CategoryTask]) -> float:
+        """
+        按配置的并发方式执行任务，并输出每个分类的耗时
+
+        Returns:
+            float: 总耗时（秒）
+        """
+        wall_time = run_category_tasks(
+            tasks,
+            mode=self.mode,
+            max_workers=self.concurrency_config.get("max_workers", 4),
+            host_limits=self.concurrency_config.get("per_host", {})
+        )
+
+        for task in tasks:
+            if task.error:
+                self.logger.error(f"{task.label} 任务异常: {task.error}")
+            self.logger.info(f"{task.label} 耗时: {task.elapsed:.1f} 秒")
+
+        return wall_time
+
+    def _log_summary(self, platform_name: str, tasks: List[CategoryTask]):
+        """输出单个平台的爬取汇总"""
+        success_count = sum(1 for task in tasks if task.app_count)
+        total_apps = sum(task.app_count for task in tasks)
+
+        self.logger.info(f"{platform_name} 爬取完成")
+        self.logger.info(f"成功: {success_count}/{len(tasks)} 个分类")
+        self.logger.info(f"应用总数: {total_apps}")
+
+    def _log_speedup(self, tasks: List[CategoryTask], wall_time: float):
+        """
+        输出并发加速比（各分类耗时之和即顺序执行的预估耗时）
+        """
+        sequential_time = sum(task.elapsed for task in tasks)
+        if wall_time > 0 and tasks:
+            self.logger.info(
+                f"模式: {self.mode}，分类耗时合计: {sequential_time:.1f} 秒，"
+                f"实际耗时: {wall_time:.1f} 秒，加速比: {sequential_time / wall_time:.2f}x"
+            )
+
+    def _fetch_count(self) -> int:
+        """本次运行发出的请求总数（RSS、lookup、Google Play，含重试）"""
+        count = self.http_client.connection_stats()["requests"]
+        if self.google_play_scraper:
+            count += self.google_play_scraper.request_count
+        return count
+
     def scrape_app_store(self, categories=None):
         """
         爬取 App Store 榜单
@@ -76,53 +553,13 @@ class RankingMonitorScraper:
         self.logger.info("开始爬取 App Store 榜单")
         self.logger.info("=" * 60)
 
-        target_categories = categories or list(APP_STORE_CATEGORIES.keys())
-        success_count = 0
-        total_apps = 0
+        tasks = self._app_store_tasks(categories)
+        wall_time = self._run_tasks(tasks)
+        self._enrich_and_save_app_store(tasks)
+        self._flush_store()
 
-        for category_key in target_categories:
-            if category_key not in APP_STORE_CATEGORIES:
-                self.logger.warning(f"未知分类: {category_key}")
-                continue
-
-            category_info = APP_STORE_CATEGORIES[category_key]
-            category_name = category_info["name_cn"]
-            genre_id = category_info["genre_id"]
-
-            try:
-                # 爬取数据
-                apps = self.app_store_scraper.scrape_category(genre_id, category_name)
-
-                if apps:
-                    # 保存数据
-                    data = {
-                        "date": self.date,
-                        "platform": "App Store",
-                        "category": category_name,
-                        "category_key": category_key,
-                        "total_apps": len(apps),
-                        "apps": apps
-                    }
-
-                    file_path = get_data_file_path(
-                        self.date, "app_store", category_key, DATA_DIR
-                    )
-
-                    if save_to_json(data, file_path):
-                        success_count += 1
-                        total_apps += len(apps)
-                        self.logger.info(f"App Store - {category_name} 保存成功")
-                    else:
-                        self.logger.error(f"App Store - {category_name} 保存失败")
-                else:
-                    self.logger.warning(f"App Store - {category_name} 未获取到数据")
-
-            except Exception as e:
-                self.logger.error(f"App Store - {category_name} 爬取异常: {e}")
-
-        self.logger.info(f"App Store 爬取完成")
-        self.logger.info(f"成功: {success_count}/{len(target_categories)} 个分类")
-        self.logger.info(f"应用总数: {total_apps}")
+        self._log_summary("App Store", tasks)
+        self._log_speedup(tasks, wall_time)
 
     def scrape_google_play(self, categories=None):
         """
@@ -139,115 +576,119 @@ class RankingMonitorScraper:
         self.logger.info("开始爬取 Google Play 榜单")
         self.logger.info("=" * 60)
 
-        target_categories = categories or list(GOOGLE_PLAY_CATEGORIES.keys())
-        success_count = 0
-        total_apps = 0
-
-        for category_key in target_categories:
-            if category_key not in GOOGLE_PLAY_CATEGORIES:
-                self.logger.warning(f"未知分类: {category_key}")
-                continue
+        tasks = self._google_play_tasks(categories)
+        wall_time = self._run_tasks(tasks)
+        self._enrich_and_save_google_play(tasks)
+        self._flush_store()
 
-            category_info = GOOGLE_PLAY_CATEGORIES[category_key]
-            category_name = category_info["name_cn"]
-            category_en = category_info["name_en"]
-
-            try:
-                # 爬取数据
-                apps = self.google_play_scraper.scrape_category(category_en, category_name)
-
-                if apps:
-                    # 保存数据
-                    data = {
-                        "date": self.date,
-                        "platform": "Google Play",
-                        "category": category_name,
-                        "category_key": category_key,
-                        "total_apps": len(apps),
-                        "apps": apps
-                    }
-
-                    file_path = get_data_file_path(
-                        self.date, "google_play", category_key, DATA_DIR
-                    )
-
-                    if save_to_json(data, file_path):
-                        success_count += 1
-                        total_apps += len(apps)
-                        self.logger.info(f"Google Play - {category_name} 保存成功")
-                    else:
-                        self.logger.error(f"Google Play - {category_name} 保存失败")
-                else:
-                    self.logger.warning(f"Google Play - {category_name} 未获取到数据")
-
-            except Exception as e:
-                self.logger.error(f"Google Play - {category_name} 爬取异常: {e}")
-
-        self.logger.info(f"Google Play 爬取完成")
-        self.logger.info(f"成功: {success_count}/{len(target_categories)} 个分类")
-        self.logger.info(f"应用总数: {total_apps}")
+        self._log_summary("Google Play", tasks)
+        self._log_speedup(tasks, wall_time)
 
     def scrape_all(self, platform=None, categories=None):
         """
         爬取所有榜单
 
+        爬取矩阵（国家 × 榜单类型 × 分类）展开为任务队列，App Store 和 Google Play 的任务
+        由同一个调度器按优先级执行，每主机并发上限控制对单个站点的压力。
+        整次运行受 run_deadline 限制，超时后剩余分类被跳过，已完成的分类照常保存。
+
         Args:
             platform: 指定平台（app_store / google_play），None表示全部
             categories: 指定分类列表，None表示全部
         """
         start_time = datetime.now()
+        start_fetches = self._fetch_count()
+        self.deadline.restart()
         self.logger.info("=" * 60)
         self.logger.info(f"榜单监控 - 数据爬取")
         self.logger.info(f"日期: {self.date}")
+        self.logger.info(f"模式: {self.mode}")
         self.logger.info("=" * 60)
 
+        app_store_tasks = []
+        google_play_tasks = []
+
         if platform is None or platform == "app_store":
-            self.scrape_app_store(categories)
+            app_store_tasks = self._app_store_tasks(categories)
 
         if platform is None or platform == "google_play":
-            self.scrape_google_play(categories)
+            if self.google_play_scraper:
+                google_play_tasks = self._google_play_tasks(categories)
+            else:
+                self.logger.warning("Google Play 爬虫不可用，请安装: pip install google-play-scraper")
+
+        tasks = app_store_tasks + google_play_tasks
+        wall_time = self._run_tasks(tasks)
+        if app_store_tasks:
+            self._enrich_and_save_app_store(app_store_tasks)
+        if google_play_tasks:
+            self._enrich_and_save_google_play(google_play_tasks)
+        self._flush_store()
+
+        if app_store_tasks:
+            self._log_summary("App Store", app_store_tasks)
+        if google_play_tasks:
+            self._log_summary("Google Play", google_play_tasks)
 
         end_time = datetime.now()
         duration = (end_time - start_time).total_seconds()
 
+        http_stats = self.http_client.connection_stats()
+        fetches = self._fetch_count() - start_fetches
+
         self.logger.info("=" * 60)
+        self._log_speedup(tasks, wall_time)
+        if duration > 0:
+            self.logger.info(
+                f"任务: {len(tasks)} 个，请求: {fetches} 次，吞吐: {fetches / duration:.2f} 次/秒"
+            )
+        self.logger.info(
+            f"HTTP 请求: {http_stats['requests']} 次，"
+            f"新建连接（握手）: {http_stats['connections']} 次，连接池大小: {self.http_client.pool_size}"
+        )
+        if self.http_cache:
+            cache_stats = self.http_cache.stats
+            self.logger.info(
+                f"HTTP 缓存: 直接命中 {cache_stats['fresh']} 次，304 复用 {cache_stats['revalidated']} 次，"
+                f"完整下载 {cache_stats['misses']} 次（{cache_stats['bytes_downloaded'] / 1024:.1f} KB），"
+                f"节省 {cache_stats['bytes_saved'] / 1024:.1f} KB"
+            )
+        self.rate_limiter.log_stats()
+        store_stats = self.store.stats
+        self.logger.info(
+            f"存储写入（{self.store.storage_format}）: {store_stats['files_written']} 个文件，"
+            f"{store_stats['bytes_written'] / 1024:.1f} KB，内容未变化跳过 {store_stats['files_skipped']} 个"
+        )
+        if self.deadline.expired():
+            self.logger.warning(
+                f"已超出运行截止时间（{self.deadline.seconds} 秒），仅保存了部分结果"
+            )
         self.logger.info(f"全部爬取完成，耗时: {duration:.1f} 秒")
         self.logger.info("=" * 60)
 
 
-def update_dates_json(date_str):
+def update_dates_json(date_str, base_dir=DATA_DIR, storage_format=None):
     """
     更新dates.json文件，添加新日期
+
+    列出全部有数据的日期（含按月归档中的日期），不限制数量
     
     Args:
         date_str: 日期字符串（YYYY-MM-DD）
+        base_dir: 数据根目录
+        storage_format: 榜单存储格式（与本次爬取使用的格式相同），默认读取配置
     """
-    dates_file = os.path.join(DATA_DIR, "raw", "dates.json")
+    dates_file = os.path.join(base_dir, "raw", "dates.json")
     
-    # 读取现有的dates.json
-    dates = []
-    if os.path.exists(dates_file):
-        try:
-            import json
-            with open(dates_file, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                dates = data.get('dates', [])
-        except Exception as e:
-            print(f"读取dates.json失败: {e}")
+    # 读取现有的dates.json（不存在或读取失败时为空列表），补上存储中实际存在的日期
+    existing = load_from_json(dates_file).get('dates', [])
+    with open_ranking_store(base_dir, storage_format or STORAGE_CONFIG.get("format", "json")) as store:
+        dates = sorted(set(existing) | set(store.list_dates()) | {date_str}, reverse=True)
     
-    # 添加新日期（如果不存在）
-    if date_str not in dates:
-        dates.insert(0, date_str)  # 插入到最前面
-        # 限制只保留最近30天的数据
-        dates = dates[:30]
-        
-        # 保存dates.json
-        try:
-            with open(dates_file, 'w', encoding='utf-8') as f:
-                json.dump({'dates': dates}, f, indent=2, ensure_ascii=False)
-            print(f"✓ 已更新dates.json，添加日期: {date_str}")
-        except Exception as e:
-            print(f"保存dates.json失败: {e}")
+    if dates != existing:
+        # 保存dates.json（需要人工查看，保持缩进格式）
+        if save_to_json({'dates': dates}, dates_file):
+            print(f"✓ 已更新dates.json，添加日期: {date_str}（共 {len(dates)} 天）")
 
 
 def main():
@@ -262,6 +703,10 @@ def main():
   python scraper.py --platform app_store      # 只爬取 App Store
   python scraper.py --platform google_play    # 只爬取 Google Play
   python scraper.py --category health_fitness # 只爬取指定分类
+  python scraper.py --sequential              # 顺序爬取（用于对比并发加速比）
+  python scraper.py --record                  # 正常爬取并录制响应（data/fixtures）
+  python scraper.py --replay                  # 从本地替身服务器回放录制的响应
+  python scraper.py --storage sqlite          # 保存到 SQLite 数据库（data/rankings.db）
         """
     )
 
@@ -284,6 +729,35 @@ def main():
         help="指定分类（如 health_fitness）"
     )
 
+    parser.add_argument(
+        "--sequential",
+        action="store_true",
+        help="顺序爬取各分类（忽略并发配置）"
+    )
+
+    fixture_group = parser.add_mutually_exclusive_group()
+    fixture_group.add_argument(
+        "--record",
+        action="store_const",
+        const="record",
+        dest="fixture_mode",
+        help="录制本次运行的响应"
+    )
+    fixture_group.add_argument(
+        "--replay",
+        action="store_const",
+        const="replay",
+        dest="fixture_mode",
+        help="从替身服务器回放录制的响应（需先启动 scrapers/fixture_server.py）"
+    )
+
+    parser.add_argument(
+        "--storage",
+        type=str,
+        choices=list(RANKING_STORES),
+        help="榜单存储格式（默认读取 STORAGE_CONFIG）"
+    )
+
     args = parser.parse_args()
 
     # 验证日期
@@ -296,11 +770,16 @@ def main():
     categories = [args.category] if args.category else None
 
     # 创建爬虫实例并执行
-    scraper = RankingMonitorScraper(args.date)
-    scraper.scrape_all(args.platform, categories)
+    with RankingMonitorScraper(
+        args.date,
+        mode="sequential" if args.sequential else None,
+        fixture_mode=args.fixture_mode,
+        storage_format=args.storage
+    ) as scraper:
+        scraper.scrape_all(args.platform, categories)
     
     # 更新dates.json
-    update_dates_json(scraper.date)
+    update_dates_json(scraper.date, scraper.data_dir, scraper.store.storage_format)
 
 
 if __name__ == "__main__":
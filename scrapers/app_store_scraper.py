@@ -3,69 +3,155 @@ App Store 爬虫模块
 使用 iTunes RSS API 获取榜单数据
 """
 
+import os
+import sys
 import requests
-import time
-from typing import List, Dict, Optional
+from typing import Iterator, List, Dict, Optional
 from datetime import datetime
+from urllib.parse import urlparse
 import urllib3
 import logging
 
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scrapers.http_client import HttpClient
+from scrapers.feed_parser import iter_feed_entries
+from utils import json_codec
+from utils.rate_limiter import HostRateLimiter
+from utils.retry import CircuitOpenError, DeadlineExceeded
+
 # 禁用SSL警告
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
+# iTunes lookup 接口单次最多查询的ID数量
+LOOKUP_BATCH_SIZE = 200
+
+# 榜单类型对应的 RSS feed 名称
+RSS_FEEDS = {
+    "TOP_FREE": "topfreeapplications",
+    "TOP_PAID": "toppaidapplications",
+    "GROSSING": "topgrossingapplications"
+}
+
 
 class AppStoreScraper:
     """App Store 爬虫类"""
 
-    def __init__(self, country="us", limit=100, delay=2, timeout=30, logger=None):
+    BASE_URL = "https://itunes.apple.com"
+
+    def __init__(self, country="us", limit=100, delay=2, timeout=30, logger=None, http_client=None,
+                 lookup_cache=None, base_url=None):
         """
         初始化爬虫
 
         Args:
             country: 国家代码（默认 us）
             limit: 每个分类爬取数量（默认 100）
-            delay: 请求延迟（秒）
+            delay: 请求间隔（秒），未传入 http_client 时换算为该主机的限流速率
             timeout: 请求超时时间（秒）
             logger: 日志记录器（可选）
+            http_client: 共享的 HttpClient（可选，不传则自行创建并负责关闭）
+            lookup_cache: 详细信息的 TTLCache（可选，以 iTunes ID 为键）
+            base_url: 接口地址（可选，默认 BASE_URL；回放时指向本地替身服务器）
         """
         self.country = country
         self.limit = limit
         self.delay = delay
         self.timeout = timeout
-        self.base_url = "https://itunes.apple.com"
+        self.base_url = (base_url or self.BASE_URL).rstrip("/")
+        # 限流、熔断和并发控制始终按真实商店主机计算
+        self.host = urlparse(self.BASE_URL).netloc
         self.logger = logger or logging.getLogger(__name__)
+        self.lookup_cache = lookup_cache
+        self.lookup_requests = 0
+
+        # 整个爬虫生命周期内复用同一个连接池
+        self._owns_client = http_client is None
+        if http_client is None:
+            rate_limiter = HostRateLimiter(
+                {self.host: {"rate": 1.0 / max(delay, 0.01)}}, logger=self.logger
+            )
+            http_client = HttpClient(timeout=timeout, logger=self.logger, rate_limiter=rate_limiter)
+        self.http_client = http_client
+
+    def close(self):
+        """关闭自行创建的 HTTP 客户端"""
+        if self._owns_client:
+            self.http_client.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def _feed_url(self, category_id: str, country: str, collection: str) -> str:
+        feed = RSS_FEEDS.get(collection, RSS_FEEDS["TOP_FREE"])
+        return f"{self.base_url}/{country}/rss/{feed}/limit={self.limit}/genre={category_id}/json"
+
+    def iter_category(self, category_id: str, category_name: str, country: Optional[str] = None,
+                      collection: str = "TOP_FREE") -> Iterator[Dict]:
+        """
+        流式爬取指定分类的榜单，逐个生成应用记录（不查询详细信息）
+
+        响应体按块读取，每次只解码一个 feed 条目，解析出需要的字段后即丢弃原始条目：
+        不再同时持有完整的响应体和解码后的整个 feed，但调用方收集的应用记录仍与榜单长度成正比。
 
-    def scrape_category(self, category_id: str, category_name: str) -> List[Dict]:
+        Args:
+            category_id: 分类ID（genre_id）
+            category_name: 分类名称（中文）
+            country: 国家代码，默认使用初始化时的 country
+            collection: 榜单类型（TOP_FREE / TOP_PAID / GROSSING）
+
+        Yields:
+            Dict: 应用数据（rating / rating_count 为0，之后由 enrich_app_details 填充）
+
+        Raises:
+            requests.RequestException: 请求失败
+        """
+        country = country or self.country
+        url = self._feed_url(category_id, country, collection)
+        self.logger.info(f"正在爬取 App Store - {category_name}...")
+
+        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        count = 0
+        with self.http_client.open_body(url, timeout=self.timeout, host=self.host) as stream:
+            for rank, entry in enumerate(iter_feed_entries(stream), start=1):
+                app = self._parse_app_entry(entry, rank, category_name, timestamp)
+                if app:
+                    count += 1
+                    yield app
+
+        if count:
+            self.logger.info(f"{category_name} 爬取成功，共 {count} 个应用")
+        else:
+            self.logger.warning(f"{category_name} 未获取到数据")
+
+    def scrape_category(self, category_id: str, category_name: str, enrich: bool = True,
+                        country: Optional[str] = None, collection: str = "TOP_FREE") -> List[Dict]:
         """
         爬取指定分类的榜单
 
         Args:
             category_id: 分类ID（genre_id）
             category_name: 分类名称（中文）
+            enrich: 是否立即查询详细信息（跨分类批量查询时传 False，之后统一调用 enrich_app_details）
+            country: 国家代码，默认使用初始化时的 country
+            collection: 榜单类型（TOP_FREE / TOP_PAID / GROSSING）
 
         Returns:
             List[Dict]: 应用列表
         """
-        url = f"{self.base_url}/{self.country}/rss/topfreeapplications/limit={self.limit}/genre={category_id}/json"
+        country = country or self.country
+        url = self._feed_url(category_id, country, collection)
 
         try:
             self.logger.info(f"正在爬取 App Store - {category_name}...")
 
-            # 添加请求头，模拟真实浏览器
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-                'Accept': 'application/json',
-                'Accept-Language': 'en-US,en;q=0.9'
-            }
+            body = self.http_client.get_body(url, timeout=self.timeout, host=self.host)
 
-            # 使用session，并禁用SSL验证（如果仍然失败）
-            session = requests.Session()
-            session.headers.update(headers)
-
-            response = session.get(url, timeout=self.timeout, verify=True)
-            response.raise_for_status()
-
-            data = response.json()
+            data = json_codec.loads(body)
             entries = data.get("feed", {}).get("entry", [])
 
             if not entries:
@@ -82,14 +168,16 @@ class AppStoreScraper:
                     apps.append(app)
 
             # 第二步：批量获取详细信息（评分、评价数）
-            if apps:
+            if apps and enrich:
                 self.logger.info(f"正在获取详细信息...")
-                self._enrich_app_details(apps, session)
+                self.enrich_app_details(apps, country)
 
             self.logger.info(f"{category_name} 爬取成功，共 {len(apps)} 个应用")
-            time.sleep(self.delay)  # 延迟避免请求过快
             return apps
 
+        except (CircuitOpenError, DeadlineExceeded) as e:
+            self.logger.error(f"{category_name} 已跳过: {e}")
+            return []
         except requests.RequestException as e:
             self.logger.error(f"{category_name} 爬取失败: {e}")
             return []
@@ -193,66 +281,88 @@ class AppStoreScraper:
         except:
             return ""
 
-    def _enrich_app_details(self, apps: List[Dict], session: requests.Session):
+    def enrich_app_details(self, apps: List[Dict], country: Optional[str] = None) -> int:
         """
-        批量获取应用详细信息（评分、评价数）
+        批量获取应用详细信息（评分、评价数、商店链接）
+
+        apps 可以来自多个分类：iTunes ID 先去重，缓存未命中的 ID 再按每批200个查询。
 
         Args:
-            apps: 应用列表
-            session: requests session
+            apps: 应用列表（同一个国家）
+            country: 查询的商店国家，默认使用初始化时的 country
+
+        Returns:
+            int: 发出的 lookup 请求次数
         """
+        country = country or self.country
+        request_count = 0
         try:
-            # 提取iTunes ID（最多200个）
-            itunes_ids = [app.get("itunes_id") for app in apps if app.get("itunes_id")]
+            # 提取去重后的iTunes ID
+            itunes_ids = list(dict.fromkeys(app.get("itunes_id") for app in apps if app.get("itunes_id")))
             if not itunes_ids:
-                return
+                return 0
+
+            # 创建ID到详细信息的映射（先取缓存）
+            details_map = {}
+            if self.lookup_cache is not None:
+                for itunes_id in itunes_ids:
+                    details = self.lookup_cache.get(f"{country}:{itunes_id}")
+                    if details is not None:
+                        details_map[itunes_id] = details
+            missing_ids = [itunes_id for itunes_id in itunes_ids if itunes_id not in details_map]
 
             # 分批查询（每批200个）
-            batch_size = 200
-            for i in range(0, len(itunes_ids), batch_size):
-                batch_ids = itunes_ids[i:i + batch_size]
+            for i in range(0, len(missing_ids), LOOKUP_BATCH_SIZE):
+                batch_ids = missing_ids[i:i + LOOKUP_BATCH_SIZE]
                 ids_str = ",".join(batch_ids)
 
                 # 调用iTunes Search API
-                lookup_url = f"https://itunes.apple.com/lookup?id={ids_str}"
-                response = session.get(lookup_url, timeout=self.timeout)
-
-                if response.status_code == 200:
-                    data = response.json()
-                    results = data.get("results", [])
-
-                    # 创建ID到详细信息的映射
-                    details_map = {}
-                    for result in results:
-                        track_id = str(result.get("trackId", ""))
-                        details_map[track_id] = {
-                            "rating": result.get("averageUserRating", 0),
-                            "rating_count": result.get("userRatingCount", 0),
-                            "store_url": result.get("trackViewUrl", "")  # 使用正确的商店链接
-                        }
-
-                    # 更新应用信息
-                    for app in apps:
-                        itunes_id = app.get("itunes_id")
-                        if itunes_id in details_map:
-                            details = details_map[itunes_id]
-                            app["rating"] = details.get("rating", 0)
-                            app["rating_count"] = details.get("rating_count", 0)
-                            # 修复商店链接
-                            if details.get("store_url"):
-                                app["store_url"] = details.get("store_url")
-
-                time.sleep(1)  # 批量请求之间的延迟
+                lookup_url = f"{self.base_url}/lookup?id={ids_str}&country={country}"
+                response = self.http_client.get(lookup_url, timeout=self.timeout, host=self.host)
+                request_count += 1
+
+                if response.status_code != 200:
+                    continue
+
+                data = json_codec.loads(response.content)
+                for result in data.get("results", []):
+                    track_id = str(result.get("trackId", ""))
+                    details = {
+                        "rating": result.get("averageUserRating", 0),
+                        "rating_count": result.get("userRatingCount", 0),
+                        "store_url": result.get("trackViewUrl", "")  # 使用正确的商店链接
+                    }
+                    details_map[track_id] = details
+                    if self.lookup_cache is not None:
+                        self.lookup_cache.set(f"{country}:{track_id}", details)
+
+            # 更新应用信息
+            for app in apps:
+                itunes_id = app.get("itunes_id")
+                if itunes_id in details_map:
+                    details = details_map[itunes_id]
+                    app["rating"] = details.get("rating", 0)
+                    app["rating_count"] = details.get("rating_count", 0)
+                    # 修复商店链接
+                    if details.get("store_url"):
+                        app["store_url"] = details.get("store_url")
 
         except Exception as e:
             self.logger.error(f"获取详细信息失败: {e}")
             # 即使失败也继续，使用默认值
 
+        finally:
+            self.lookup_requests += request_count
+            if self.lookup_cache is not None:
+                self.lookup_cache.save()
+
+        return request_count
+
 
 if __name__ == "__main__":
     # 测试代码
-    scraper = AppStoreScraper()
-    apps = scraper.scrape_category("6013", "健康与健身")
+    with AppStoreScraper() as scraper:
+        apps = scraper.scrape_category("6013", "健康与健身")
     print(f"\n共获取 {len(apps)} 个应用")
     if apps:
         print(f"第一个应用: {apps[0]}")
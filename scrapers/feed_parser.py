@@ -0,0 +1,126 @@
+"""
+RSS feed 流式解析模块
+逐条解析 iTunes RSS JSON 中的 feed.entry，不把整个响应加载成一棵对象树
+"""
+
+import json
+import codecs
+from typing import Dict, Iterator
+
+try:
+    import ijson
+    IJSON_AVAILABLE = True
+except ImportError:
+    IJSON_AVAILABLE = False
+
+
+CHUNK_SIZE = 64 * 1024
+
+_decoder = json.JSONDecoder()
+_WHITESPACE = " \t\r\n"
+
+
+def iter_feed_entries(stream, chunk_size: int = CHUNK_SIZE) -> Iterator[Dict]:
+    """
+    从二进制流中逐条读取 feed.entry
+
+    安装了 ijson 时使用 ijson；否则使用内置的增量解析：
+    定位到 "entry" 数组后，每次只解码一个条目对象，已解码的文本立即丢弃。
+
+    Args:
+        stream: 二进制文件对象（响应流或缓存文件）
+        chunk_size: 每次读取的字节数
+
+    Yields:
+        Dict: 单个条目
+    """
+    if IJSON_AVAILABLE:
+        yield from _iter_entries_ijson(stream)
+        return
+
+    yield from _iter_entries_stdlib(stream, chunk_size)
+
+
+def _iter_entries_ijson(stream) -> Iterator[Dict]:
+    # entry 可能是数组（前缀 feed.entry.item）也可能是单个对象（前缀 feed.entry），按事件逐个组装
+    builder = None
+    entry_prefix = None
+    for prefix, event, value in ijson.parse(stream):
+        if builder is None:
+            if event == "start_map" and prefix in ("feed.entry", "feed.entry.item"):
+                builder = ijson.ObjectBuilder()
+                entry_prefix = prefix
+                builder.event(event, value)
+            continue
+
+        builder.event(event, value)
+        if event == "end_map" and prefix == entry_prefix:
+            yield builder.value
+            builder = None
+            if entry_prefix == "feed.entry":
+                return
+
+
+def _iter_entries_stdlib(stream, chunk_size: int) -> Iterator[Dict]:
+    reader = codecs.getincrementaldecoder("utf-8")()
+    buffer = ""
+    eof = False
+
+    def fill() -> bool:
+        nonlocal buffer, eof
+        if eof:
+            return False
+        chunk = stream.read(chunk_size)
+        if not chunk:
+            eof = True
+            buffer += reader.decode(b"", final=True)
+            return False
+        buffer += reader.decode(chunk)
+        return True
+
+    # 定位 "entry" 键（在 feed.author 之后，之前只有少量元数据）
+    while True:
+        index = buffer.find('"entry"')
+        if index >= 0:
+            buffer = buffer[index + len('"entry"'):]
+            break
+        # 保留末尾几个字符，防止键名被切断在两个分块之间
+        buffer = buffer[-8:]
+        if not fill():
+            return
+
+    # 跳过冒号，判断是数组还是单个对象（只有一条数据时 entry 是对象）
+    while True:
+        stripped = buffer.lstrip(_WHITESPACE + ":")
+        if stripped:
+            buffer = stripped
+            break
+        buffer = ""
+        if not fill():
+            return
+
+    single = buffer[0] == "{"
+    if not single:
+        buffer = buffer[1:]
+
+    while True:
+        buffer = buffer.lstrip(_WHITESPACE + ",")
+        if not buffer:
+            if not fill():
+                return
+            continue
+        if buffer[0] == "]":
+            return
+
+        try:
+            entry, end = _decoder.raw_decode(buffer)
+        except ValueError:
+            # 当前缓冲区里的对象不完整，继续读取
+            if not fill():
+                raise
+            continue
+
+        buffer = buffer[end:]
+        yield entry
+        if single:
+            return
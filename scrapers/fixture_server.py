@@ -0,0 +1,261 @@
+"""
+本地替身商店服务器
+回放录制的 RSS、/lookup 和 Google Play 响应，可注入延迟和错误，用于离线基准测试
+
+用法:
+  python scrapers/fixture_server.py                              # 使用 config_simple.py 中的配置
+  python scrapers/fixture_server.py --latency 0.2 --jitter 0.05  # 每个请求 0.2~0.25 秒延迟
+  python scrapers/fixture_server.py --error-rate 0.1 --error-status 429
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import hashlib
+import argparse
+import threading
+import logging
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional
+from urllib.parse import parse_qs, urlparse
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scrapers.fixtures import FixtureStore, request_key
+
+
+class _Handler(BaseHTTPRequestHandler):
+    # HTTP/1.1 长连接，使客户端的连接池复用行为与真实商店一致
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        self.server.fixture_server.handle(self)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class FixtureServer:
+    """
+    替身商店服务器（在后台线程中运行，支持 with 语句）
+
+    错误注入按 (录制键, 该键的第几次请求, seed) 决定，与线程调度顺序无关，
+    同样的配置和同样的请求序列每次得到相同的结果。
+    """
+
+    def __init__(self, fixture_dir: str, host: str = "127.0.0.1", port: int = 0, latency: float = 0.0,
+                 jitter: float = 0.0, error_rate: float = 0.0, error_status: int = 503,
+                 retry_after: Optional[float] = None, seed: int = 0, logger=None):
+        """
+        Args:
+            fixture_dir: 录制数据目录
+            host: 监听地址
+            port: 监听端口（0 表示随机分配）
+            latency: 每个请求的固定延迟（秒）
+            jitter: 额外随机延迟的上限（秒）
+            error_rate: 注入错误的概率（0~1）
+            error_status: 注入错误的状态码（如 503 / 429 / 500）
+            retry_after: 注入错误时返回的 Retry-After（秒，可选）
+            seed: 随机种子
+            logger: 日志记录器（可选）
+        """
+        self.store = FixtureStore(fixture_dir)
+        self.host = host
+        self.port = port
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.retry_after = retry_after
+        self.seed = seed
+        self.logger = logger or logging.getLogger(__name__)
+
+        self._lock = threading.Lock()
+        self._attempts = {}
+        self._lookup_index = None
+        self._httpd = None
+        self._thread = None
+        self.stats = {"requests": 0, "errors": 0, "not_found": 0, "not_modified": 0}
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    def start(self) -> str:
+        """
+        在后台线程中启动服务器
+
+        Returns:
+            str: 服务器地址
+        """
+        self._httpd = ThreadingHTTPServer((self.host, self.port), _Handler)
+        self._httpd.daemon_threads = True
+        self._httpd.fixture_server = self
+        self.port = self._httpd.server_address[1]
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        self.logger.info(f"替身商店服务器已启动: {self.base_url}（录制 {len(self.store)} 个响应）")
+        return self.base_url
+
+    def serve_forever(self):
+        """在当前线程中运行（命令行使用）"""
+        self.start()
+        try:
+            self._thread.join()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.stop()
+
+    def stop(self):
+        """停止服务器"""
+        if self._httpd:
+            self._httpd.shutdown()
+            self._httpd.server_close()
+            self._httpd = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+    def _should_fail(self, key: str) -> bool:
+        with self._lock:
+            attempt = self._attempts.get(key, 0)
+            self._attempts[key] = attempt + 1
+        if self.error_rate <= 0:
+            return False
+        return random.Random(f"{self.seed}:{key}:{attempt}").random() < self.error_rate
+
+    def _delay(self, key: str) -> float:
+        if not self.jitter:
+            return self.latency
+        return self.latency + random.Random(f"{self.seed}:{key}:delay").uniform(0, self.jitter)
+
+    def _lookup_body(self, url: str) -> Optional[bytes]:
+        """
+        拼装 /lookup 响应：逐个 ID 从全部录制的 lookup 结果中取出
+        （回放时命中缓存的 ID 不同，批次组合可能与录制时不一致）
+        """
+        query = parse_qs(urlparse(url).query)
+        country = query.get("country", [""])[0]
+        ids = [app_id for value in query.get("id", []) for app_id in value.split(",") if app_id]
+
+        with self._lock:
+            if self._lookup_index is None:
+                self._lookup_index = self._build_lookup_index()
+            index = self._lookup_index
+
+        results = [index[(country, app_id)] for app_id in ids if (country, app_id) in index]
+        return json.dumps({"resultCount": len(results), "results": results}).encode('utf-8')
+
+    def _build_lookup_index(self) -> Dict:
+        index = {}
+        for key in self.store.keys():
+            if not key.startswith("/lookup"):
+                continue
+            country = parse_qs(urlparse(key).query).get("country", [""])[0]
+            try:
+                data = json.loads(self.store.get(key) or b"{}")
+            except ValueError:
+                continue
+            for result in data.get("results", []):
+                index[(country, str(result.get("trackId")))] = result
+        return index
+
+    def handle(self, handler: BaseHTTPRequestHandler):
+        key = request_key(handler.path)
+        with self._lock:
+            self.stats["requests"] += 1
+
+        delay = self._delay(key)
+        if delay > 0:
+            time.sleep(delay)
+
+        if self._should_fail(key):
+            with self._lock:
+                self.stats["errors"] += 1
+            headers = {"Retry-After": f"{self.retry_after:g}"} if self.retry_after else {}
+            self._send(handler, self.error_status, b"injected error", headers)
+            return
+
+        body = self.store.get(key)
+        if body is None and key.startswith("/lookup"):
+            body = self._lookup_body(handler.path)
+        if body is None:
+            with self._lock:
+                self.stats["not_found"] += 1
+            self.logger.debug(f"未录制的请求: {key}")
+            self._send(handler, 404, b"not recorded")
+            return
+
+        etag = '"%s"' % hashlib.sha1(body).hexdigest()
+        if handler.headers.get("If-None-Match") == etag:
+            with self._lock:
+                self.stats["not_modified"] += 1
+            self._send(handler, 304, b"", {"ETag": etag})
+            return
+        self._send(handler, 200, body, {"ETag": etag, "Content-Type": "application/json"})
+
+    @staticmethod
+    def _send(handler: BaseHTTPRequestHandler, status: int, body: bytes, headers: Optional[Dict] = None):
+        try:
+            handler.send_response(status)
+            for name, value in (headers or {}).items():
+                handler.send_header(name, value)
+            handler.send_header("Content-Length", str(len(body)))
+            handler.end_headers()
+            if body:
+                handler.wfile.write(body)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+
+def main():
+    """主函数"""
+    from config_simple import SCRAPER_CONFIG
+
+    fixtures_config = SCRAPER_CONFIG.get("fixtures", {})
+    server_config = fixtures_config.get("server", {})
+
+    parser = argparse.ArgumentParser(description="本地替身商店服务器（回放录制的响应）")
+    parser.add_argument("--dir", default=fixtures_config.get("dir"), help="录制数据目录")
+    parser.add_argument("--host", default=server_config.get("host", "127.0.0.1"), help="监听地址")
+    parser.add_argument("--port", type=int, default=server_config.get("port", 8765), help="监听端口")
+    parser.add_argument("--latency", type=float, default=server_config.get("latency", 0.0),
+                        help="每个请求的固定延迟（秒）")
+    parser.add_argument("--jitter", type=float, default=server_config.get("jitter", 0.0),
+                        help="额外随机延迟上限（秒）")
+    parser.add_argument("--error-rate", type=float, default=server_config.get("error_rate", 0.0),
+                        help="注入错误的概率（0~1）")
+    parser.add_argument("--error-status", type=int, default=server_config.get("error_status", 503),
+                        help="注入错误的状态码")
+    parser.add_argument("--retry-after", type=float, default=server_config.get("retry_after"),
+                        help="注入错误时返回的 Retry-After（秒）")
+    parser.add_argument("--seed", type=int, default=server_config.get("seed", 0), help="随机种子")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    server = FixtureServer(
+        args.dir,
+        host=args.host,
+        port=args.port,
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        error_status=args.error_status,
+        retry_after=args.retry_after,
+        seed=args.seed
+    )
+    print("按 Ctrl+C 停止")
+    server.serve_forever()
+    print(f"统计: {server.stats}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""
+HTTP 响应录制模块
+录制真实运行时的 RSS、/lookup 和 Google Play 响应，供本地替身服务器回放
+"""
+
+import hashlib
+import json
+import os
+import threading
+from typing import Dict, Optional
+from urllib.parse import parse_qsl, urlencode, urlparse
+
+from scrapers.http_cache import _write_atomic
+
+
+INDEX_FILE = "index.json"
+
+
+def request_key(url: str) -> str:
+    """
+    生成请求的录制键：路径 + 排序后的查询参数（不含协议和主机）
+
+    Args:
+        url: 完整地址或 路径?查询 形式
+
+    Returns:
+        str: 如 /lookup?country=us&id=1,2
+    """
+    parsed = urlparse(url)
+    query = sorted(parse_qsl(parsed.query, keep_blank_values=True))
+    return f"{parsed.path}?{urlencode(query, safe=',')}" if query else parsed.path
+
+
+class FixtureStore:
+    """
+    录制数据目录（线程安全）
+
+    目录结构：
+        index.json          录制键 -> 响应体文件名
+        <sha1>.body         响应体
+    """
+
+    def __init__(self, fixture_dir: str):
+        """
+        Args:
+            fixture_dir: 录制数据目录
+        """
+        self.fixture_dir = fixture_dir
+        self._lock = threading.Lock()
+        self._index = self._load_index()
+
+    def _load_index(self) -> Dict[str, str]:
+        try:
+            with open(os.path.join(self.fixture_dir, INDEX_FILE), 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            return data.get("requests", {})
+        except (OSError, ValueError):
+            return {}
+
+    def keys(self):
+        """全部录制键"""
+        with self._lock:
+            return list(self._index)
+
+    def get(self, key: str) -> Optional[bytes]:
+        """
+        读取录制的响应体
+
+        Args:
+            key: request_key() 生成的录制键
+
+        Returns:
+            Optional[bytes]: 不存在返回 None
+        """
+        with self._lock:
+            file_name = self._index.get(key)
+        if not file_name:
+            return None
+        try:
+            with open(os.path.join(self.fixture_dir, file_name), 'rb') as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def record(self, url: str, body: bytes):
+        """
+        录制一个响应（同一请求重复录制时覆盖）
+
+        Args:
+            url: 请求地址
+            body: 响应体
+        """
+        key = request_key(url)
+        file_name = f"{hashlib.sha1(key.encode('utf-8')).hexdigest()}.body"
+        try:
+            os.makedirs(self.fixture_dir, exist_ok=True)
+            _write_atomic(os.path.join(self.fixture_dir, file_name), body)
+        except OSError as e:
+            print(f"录制响应失败: {e}")
+            return
+        with self._lock:
+            self._index[key] = file_name
+
+    def record_json(self, path: str, params: Dict, data):
+        """
+        录制一个 JSON 数据（用于 google-play-scraper 等不经过 HttpClient 的接口）
+
+        Args:
+            path: 回放时的请求路径（如 /gp/search）
+            params: 查询参数
+            data: 可序列化为 JSON 的数据（无法序列化的值转为字符串）
+        """
+        body = json.dumps(data, ensure_ascii=False, default=str).encode('utf-8')
+        self.record(f"{path}?{urlencode(params)}", body)
+
+    def save(self) -> bool:
+        """
+        写入索引文件
+
+        Returns:
+            bool: 是否成功
+        """
+        with self._lock:
+            content = json.dumps({"requests": self._index}, ensure_ascii=False, indent=2, sort_keys=True)
+        try:
+            os.makedirs(self.fixture_dir, exist_ok=True)
+            _write_atomic(os.path.join(self.fixture_dir, INDEX_FILE), content.encode('utf-8'))
+            return True
+        except OSError as e:
+            print(f"保存录制索引失败: {e}")
+            return False
+
+    def __len__(self):
+        return len(self._index)
@@ -3,23 +3,43 @@ Google Play 爬虫模块
 使用 google-play-scraper 库获取榜单数据
 """
 
-import time
+import os
+import re
+import sys
+import threading
 from typing import List, Dict, Optional
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlencode
 import logging
 
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scrapers.http_client import HttpClient, RETRY_STATUS_CODES
+from utils import json_codec
+from utils.rate_limiter import HostRateLimiter
+from utils.retry import RetryPolicy, CircuitOpenError, DeadlineExceeded, call_with_retry
+
 try:
     from google_play_scraper import search, app
+    from google_play_scraper.exceptions import NotFoundError
     GOOGLE_PLAY_AVAILABLE = True
 except ImportError:
     GOOGLE_PLAY_AVAILABLE = False
     print("警告: google-play-scraper 未安装，请运行: pip install google-play-scraper")
 
 
+class _TransientError(Exception):
+    """网络错误或 429/5xx 响应（需要重试并计入熔断）"""
+
+
 class GooglePlayScraper:
     """Google Play 爬虫类"""
 
-    def __init__(self, country="us", collection="TOP_FREE", limit=100, delay=3, timeout=30, logger=None):
+    def __init__(self, country="us", collection="TOP_FREE", limit=100, delay=3, timeout=30, logger=None,
+                 rate_limiter=None, retry_policy=None, circuit_breaker=None, deadline=None,
+                 details_cache=None, details_workers=4, base_url=None, http_client=None, recorder=None):
         """
         初始化爬虫
 
@@ -27,11 +47,20 @@ class GooglePlayScraper:
             country: 国家代码（默认 us）
             collection: 榜单类型（TOP_FREE / TOP_PAID / TRENDING）
             limit: 每个分类爬取数量（默认 100）
-            delay: 请求延迟（秒）
+            delay: 请求间隔（秒），未传入 rate_limiter 时换算为限流速率
             timeout: 请求超时时间（秒）
             logger: 日志记录器（可选）
+            rate_limiter: 共享的 HostRateLimiter（可选）
+            retry_policy: 重试策略（可选，默认重试3次）
+            circuit_breaker: 共享的 CircuitBreaker（可选）
+            deadline: 整次运行的 Deadline（可选）
+            details_cache: 详细信息的 TTLCache（可选，以 国家:appId 为键）
+            details_workers: 详细信息查询的线程数
+            base_url: 替身服务器地址（可选，设置后从该服务器获取录制的搜索和详情结果）
+            http_client: 访问替身服务器使用的 HttpClient（可选，仅设置了 base_url 时使用）
+            recorder: 录制搜索和详情结果的 FixtureStore（可选）
         """
-        if not GOOGLE_PLAY_AVAILABLE:
+        if not GOOGLE_PLAY_AVAILABLE and not base_url:
             raise ImportError("google-play-scraper 未安装")
 
         self.country = country
@@ -39,19 +68,49 @@ class GooglePlayScraper:
         self.limit = limit
         self.delay = delay
         self.timeout = timeout
+        self.host = "play.google.com"
+        # 详情查询使用单独的限流和熔断键：按自己的速率发请求，失败也不影响共用 play.google.com 的分类爬取
+        self.details_key = f"{self.host}/details"
         self.logger = logger or logging.getLogger(__name__)
+        self.rate_limiter = rate_limiter or HostRateLimiter(
+            {key: {"rate": 1.0 / max(delay, 0.01)} for key in (self.host, self.details_key)}, logger=self.logger
+        )
+        self.request_count = 0
+        self._count_lock = threading.Lock()
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.circuit_breaker = circuit_breaker
+        self.deadline = deadline
+        self.details_cache = details_cache
+        self.details_workers = max(1, int(details_workers))
+        self.base_url = base_url.rstrip("/") if base_url else None
+        self.recorder = recorder
+        if self.base_url and http_client is None:
+            http_client = HttpClient(
+                pool_size=self.details_workers,
+                timeout=timeout,
+                logger=self.logger,
+                rate_limiter=self.rate_limiter,
+                retry_policy=self.retry_policy,
+                circuit_breaker=self.circuit_breaker,
+                deadline=self.deadline
+            )
+        self.http_client = http_client
 
-    def scrape_category(self, category_key: str, category_name: str) -> List[Dict]:
+    def scrape_category(self, category_key: str, category_name: str, country: Optional[str] = None,
+                        collection: Optional[str] = None) -> List[Dict]:
         """
         爬取指定分类的榜单
 
         Args:
             category_key: 分类键（如 HEALTH_AND_FITNESS）
             category_name: 分类名称（中文）
+            country: 国家代码，默认使用初始化时的 country
+            collection: 榜单类型（搜索方式下不影响结果，仅用于区分输出）
 
         Returns:
             List[Dict]: 应用列表
         """
+        country = country or self.country
         try:
             self.logger.info(f"正在爬取 Google Play - {category_name}...")
 
@@ -69,12 +128,7 @@ class GooglePlayScraper:
             }
 
             keyword = category_keywords.get(category_key, category_name)
-            apps_data = search(
-                keyword,
-                lang="en",
-                country=self.country,
-                n_hits=self.limit
-            )
+            apps_data = self._search(keyword, country)
 
             if not apps_data:
                 self.logger.warning(f"{category_name} 未获取到数据")
@@ -89,13 +143,209 @@ class GooglePlayScraper:
                     apps.append(app_info)
 
             self.logger.info(f"{category_name} 爬取成功，共 {len(apps)} 个应用")
-            time.sleep(self.delay)  # 延迟避免请求过快
             return apps
 
+        except (CircuitOpenError, DeadlineExceeded) as e:
+            self.logger.error(f"{category_name} 已跳过: {e}")
+            return []
         except Exception as e:
             self.logger.error(f"{category_name} 爬取失败: {e}")
             return []
 
+    def enrich_app_details(self, apps: List[Dict], country: Optional[str] = None) -> Dict[str, int]:
+        """
+        并发查询应用详情，补充评分、评价数、安装量和上架时间
+
+        appId 先去重，缓存未命中的应用由线程池逐个调用 app() 查询（请求节奏由限流器控制）；
+        单个应用查询失败不影响其他应用，失败的应用保留默认值。
+
+        Args:
+            apps: 应用列表（同一个国家，可来自多个分类）
+            country: 查询的商店国家，默认使用初始化时的 country
+
+        Returns:
+            Dict: requests（查询次数）、cached（缓存命中数）、failed（失败数）
+        """
+        country = country or self.country
+        app_ids = list(dict.fromkeys(app.get("app_id") for app in apps if app.get("app_id")))
+
+        details_map = {}
+        if self.details_cache is not None:
+            for app_id in app_ids:
+                details = self.details_cache.get(f"{country}:{app_id}")
+                if details is not None:
+                    details_map[app_id] = details
+        missing_ids = [app_id for app_id in app_ids if app_id not in details_map]
+
+        def fetch(app_id):
+            try:
+                details = self._app_details(app_id, country)
+                return app_id, self._parse_app_details(details) if details else None
+            except Exception as e:
+                self.logger.debug(f"Google Play 详情查询失败 {app_id}: {e}")
+                return app_id, None
+
+        failed = 0
+        if missing_ids:
+            with ThreadPoolExecutor(max_workers=self.details_workers) as executor:
+                for app_id, details in executor.map(fetch, missing_ids):
+                    if details is None:
+                        failed += 1
+                        continue
+                    details_map[app_id] = details
+                    if self.details_cache is not None:
+                        self.details_cache.set(f"{country}:{app_id}", details)
+            if self.details_cache is not None:
+                self.details_cache.save()
+
+        for app_info in apps:
+            details = details_map.get(app_info.get("app_id"))
+            if details:
+                app_info.update(details)
+
+        if failed:
+            self.logger.warning(f"Google Play 详情查询失败 {failed}/{len(missing_ids)} 个，保留默认值")
+
+        return {
+            "requests": len(missing_ids),
+            "cached": len(app_ids) - len(missing_ids),
+            "failed": failed
+        }
+
+    def _parse_app_details(self, details: Dict) -> Dict:
+        """
+        从 app() 的返回值中提取需要的字段
+
+        Args:
+            details: google-play-scraper 返回的应用详情
+
+        Returns:
+            Dict: rating / rating_count / installs / release_date
+        """
+        return {
+            "rating": details.get("score") or 0,
+            "rating_count": details.get("ratings") or 0,
+            "installs": details.get("realInstalls") or details.get("minInstalls") or 0,
+            "release_date": self._format_release_date(details.get("released") or "")
+        }
+
+    def _format_release_date(self, date_str: str) -> str:
+        """
+        格式化上架时间为 YYYY/MM/DD 格式
+
+        Args:
+            date_str: Google Play 的日期字符串（如 "Feb 23, 2026"）
+
+        Returns:
+            str: 格式化后的日期（如 "2026/02/23"），无法解析时原样返回
+        """
+        if not date_str:
+            return ""
+        try:
+            return datetime.strptime(date_str, "%b %d, %Y").strftime("%Y/%m/%d")
+        except ValueError:
+            return date_str
+
+    def _search(self, keyword: str, country: str) -> Optional[List[Dict]]:
+        """按关键词搜索应用（回放时从替身服务器获取）"""
+        params = {"q": keyword, "country": country, "n": self.limit}
+        if self.base_url:
+            return self._get_replay("/gp/search", params)
+
+        result = self._call(search, keyword, lang="en", country=country, n_hits=self.limit)
+        if self.recorder is not None and result:
+            self.recorder.record_json("/gp/search", params, result)
+        return result
+
+    def _app_details(self, app_id: str, country: str) -> Optional[Dict]:
+        """查询单个应用的详情（回放时从替身服务器获取），应用不存在返回 None"""
+        params = {"id": app_id, "country": country}
+        if self.base_url:
+            return self._get_replay("/gp/app", params, key=self.details_key)
+
+        result = self._call(app, app_id, lang="en", country=country, key=self.details_key)
+        if self.recorder is not None and result:
+            self.recorder.record_json("/gp/app", params, result)
+        return result
+
+    def _get_replay(self, path: str, params: Dict, key: Optional[str] = None):
+        """
+        从替身服务器获取录制的结果（限流和熔断按 key 计算，默认为真实商店主机）
+
+        Returns:
+            解析后的 JSON，未录制（404）返回 None
+
+        Raises:
+            requests.HTTPError: 重试耗尽后仍返回错误状态码
+        """
+        response = self.http_client.get(
+            f"{self.base_url}{path}?{urlencode(params)}", timeout=self.timeout, host=key or self.host
+        )
+        if response.status_code == 404:
+            return None
+        response.raise_for_status()
+        return json_codec.loads(response.content)
+
+    def _call(self, func, *args, key: Optional[str] = None, **kwargs):
+        """
+        在限流器控制下调用 google-play-scraper 的接口，失败时退避重试，并根据结果调整速率
+
+        只有网络错误和 429/5xx 响应重试并计入熔断；解析错误等其他异常直接抛出
+
+        Args:
+            func: 要调用的函数（search / app）
+            key: 限流器和熔断器的键，默认为主机名
+        """
+        key = key or self.host
+
+        def attempt(attempt_timeout):
+            # google-play-scraper 不支持设置超时，截止时间只在每次尝试前检查
+            self.rate_limiter.acquire(key)
+            with self._count_lock:
+                self.request_count += 1
+            try:
+                result = func(*args, **kwargs)
+            except NotFoundError:
+                # 应用已下架或在该国家不可用，属于正常响应，不重试也不计入熔断
+                self.rate_limiter.on_response(key, 200)
+                return None
+            except Exception as e:
+                status_code = self._status_code_of(e)
+                if status_code:
+                    self.rate_limiter.on_response(key, status_code)
+                if isinstance(e, OSError) or status_code in RETRY_STATUS_CODES:
+                    raise _TransientError(str(e)) from e
+                raise
+            self.rate_limiter.on_response(key, 200)
+            return result
+
+        return call_with_retry(
+            attempt,
+            key,
+            self.retry_policy,
+            breaker=self.circuit_breaker,
+            deadline=self.deadline,
+            timeout=self.timeout,
+            retry_on=(_TransientError,),
+            logger=self.logger
+        )
+
+    @staticmethod
+    def _status_code_of(error: Exception) -> Optional[int]:
+        """从异常中提取 HTTP 状态码（google-play-scraper 不统一暴露状态码）"""
+        code = getattr(error, "code", None)
+        if isinstance(code, int):
+            return code
+        message = str(error)
+        # ExtraHTTPError: "App not found. Status code 503 returned."
+        match = re.search(r"Status code (\d{3})", message)
+        if match:
+            return int(match.group(1))
+        # 批量接口被限流时抛出 PlayGatewayError
+        if "PlayGatewayError" in message:
+            return 429
+        return None
+
     def _parse_app_data(self, app_data: Dict, rank: int, category: str, timestamp: str) -> Optional[Dict]:
         """
         解析单个应用数据
@@ -125,6 +375,8 @@ class GooglePlayScraper:
                 "developer": developer,
                 "store_url": store_url,
                 "icon_url": icon_url,
+                "rating": app_data.get("score") or 0,  # 搜索结果只有评分，其余稍后通过 app() 填充
+                "rating_count": 0,
                 "timestamp": timestamp
             }
 
@@ -0,0 +1,187 @@
+"""
+HTTP 响应缓存模块
+将响应体连同 ETag / Last-Modified 保存在磁盘上，支持 TTL 内直接复用和过期后的条件请求
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Dict, Optional
+
+
+def _write_atomic(path: str, content: bytes):
+    """先写临时文件再替换，避免并发读到半个文件"""
+    tmp_path = f"{path}.{threading.get_ident()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(content)
+    os.replace(tmp_path, path)
+
+
+class CacheEntry:
+    """单个 URL 的缓存条目"""
+
+    def __init__(self, body_path: str, meta: Dict):
+        self.body_path = body_path
+        self.etag = meta.get("etag")
+        self.last_modified = meta.get("last_modified")
+        self.stored_at = meta.get("stored_at", 0)
+        self.size = meta.get("size", 0)
+
+    def read_body(self) -> bytes:
+        """读取缓存的响应体"""
+        with open(self.body_path, 'rb') as f:
+            return f.read()
+
+    def conditional_headers(self) -> Dict[str, str]:
+        """生成条件请求头"""
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+class HttpCache:
+    """磁盘 HTTP 响应缓存（线程安全）"""
+
+    def __init__(self, cache_dir: str, ttl: float = 3600):
+        """
+        初始化缓存
+
+        Args:
+            cache_dir: 缓存目录
+            ttl: 新鲜期（秒），期内直接使用缓存不发请求；过期后发条件请求
+        """
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self.stats = {
+            "fresh": 0,  # 新鲜期内直接命中
+            "revalidated": 0,  # 条件请求返回 304
+            "misses": 0,  # 下载了完整响应
+            "bytes_downloaded": 0,
+            "bytes_saved": 0
+        }
+
+    def _paths(self, url: str):
+        key = hashlib.sha1(url.encode('utf-8')).hexdigest()
+        return (
+            os.path.join(self.cache_dir, f"{key}.body"),
+            os.path.join(self.cache_dir, f"{key}.json")
+        )
+
+    def lookup(self, url: str) -> Optional[CacheEntry]:
+        """
+        查找缓存条目
+
+        Returns:
+            Optional[CacheEntry]: 不存在返回 None
+        """
+        body_path, meta_path = self._paths(url)
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if not os.path.exists(body_path):
+            return None
+        return CacheEntry(body_path, meta)
+
+    def is_fresh(self, entry: CacheEntry) -> bool:
+        """条目是否仍在新鲜期内"""
+        return time.time() - entry.stored_at < self.ttl
+
+    def _write_meta(self, meta_path: str, meta: Dict):
+        _write_atomic(meta_path, json.dumps(meta, ensure_ascii=False).encode('utf-8'))
+
+    def store(self, url: str, body: bytes, etag: Optional[str] = None, last_modified: Optional[str] = None):
+        """
+        保存响应
+
+        Args:
+            url: 请求地址
+            body: 响应体
+            etag: ETag 响应头
+            last_modified: Last-Modified 响应头
+        """
+        body_path, meta_path = self._paths(url)
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            _write_atomic(body_path, body)
+            self._write_meta(meta_path, {
+                "url": url,
+                "etag": etag,
+                "last_modified": last_modified,
+                "stored_at": time.time(),
+                "size": len(body)
+            })
+        except OSError as e:
+            print(f"保存HTTP缓存失败: {e}")
+
+    def store_stream(self, url: str, chunks, etag: Optional[str] = None,
+                     last_modified: Optional[str] = None) -> Optional[CacheEntry]:
+        """
+        边下载边写入缓存（不在内存中保留完整响应体）
+
+        Args:
+            url: 请求地址
+            chunks: 响应体分块迭代器
+            etag: ETag 响应头
+            last_modified: Last-Modified 响应头
+
+        Returns:
+            Optional[CacheEntry]: 写入后的条目，失败返回 None
+        """
+        body_path, meta_path = self._paths(url)
+        meta = {
+            "url": url,
+            "etag": etag,
+            "last_modified": last_modified,
+            "stored_at": time.time(),
+            "size": 0
+        }
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            tmp_path = f"{body_path}.{threading.get_ident()}.tmp"
+            with open(tmp_path, 'wb') as f:
+                for chunk in chunks:
+                    f.write(chunk)
+                    meta["size"] += len(chunk)
+            os.replace(tmp_path, body_path)
+            self._write_meta(meta_path, meta)
+        except OSError as e:
+            print(f"保存HTTP缓存失败: {e}")
+            return None
+        return CacheEntry(body_path, meta)
+
+    def touch(self, url: str, entry: CacheEntry):
+        """收到 304 后刷新条目的新鲜期"""
+        _, meta_path = self._paths(url)
+        try:
+            self._write_meta(meta_path, {
+                "url": url,
+                "etag": entry.etag,
+                "last_modified": entry.last_modified,
+                "stored_at": time.time(),
+                "size": entry.size
+            })
+        except OSError as e:
+            print(f"更新HTTP缓存失败: {e}")
+
+    def record(self, outcome: str, size: int):
+        """
+        记录一次缓存结果
+
+        Args:
+            outcome: fresh / revalidated / misses
+            size: 响应体字节数
+        """
+        with self._lock:
+            self.stats[outcome] += 1
+            if outcome == "misses":
+                self.stats["bytes_downloaded"] += size
+            else:
+                self.stats["bytes_saved"] += size
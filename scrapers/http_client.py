@@ -0,0 +1,271 @@
+"""
+HTTP 客户端模块
+长连接复用的 requests Session 封装，供爬虫在整个运行期间共享
+"""
+
+import io
+import threading
+import logging
+from contextlib import contextmanager
+from typing import Dict, Optional
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from utils.retry import RetryPolicy, call_with_retry
+
+
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+    'Accept': 'application/json',
+    'Accept-Language': 'en-US,en;q=0.9'
+}
+
+# 需要重试的响应状态码
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+
+
+class HttpClient:
+    """带连接池的 HTTP 客户端（支持 with 语句）"""
+
+    def __init__(self, pool_size=4, timeout=30, headers=None, logger=None, rate_limiter=None,
+                 retry_policy=None, circuit_breaker=None, deadline=None, http_cache=None, recorder=None):
+        """
+        初始化客户端
+
+        Args:
+            pool_size: 每个主机的连接池大小（应与该主机的并发上限一致）
+            timeout: 默认请求超时时间（秒）
+            headers: 默认请求头
+            logger: 日志记录器（可选）
+            rate_limiter: 按主机限流的 HostRateLimiter（可选）
+            retry_policy: 重试策略（可选，默认重试3次）
+            circuit_breaker: 按主机的 CircuitBreaker（可选）
+            deadline: 整次运行的 Deadline（可选）
+            http_cache: 响应缓存 HttpCache（可选，仅 get_body 使用）
+            recorder: 录制成功响应的 FixtureStore（可选）
+        """
+        self.pool_size = max(1, int(pool_size))
+        self.timeout = timeout
+        self.rate_limiter = rate_limiter
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.circuit_breaker = circuit_breaker
+        self.deadline = deadline
+        self.http_cache = http_cache
+        self.recorder = recorder
+        self.logger = logger or logging.getLogger(__name__)
+
+        self.session = requests.Session()
+        self.session.headers.update(headers or DEFAULT_HEADERS)
+
+        # pool_block=True：连接数达到上限时等待空闲连接，而不是新建连接
+        self.adapter = HTTPAdapter(
+            pool_connections=10,
+            pool_maxsize=self.pool_size,
+            pool_block=True
+        )
+        self.session.mount("https://", self.adapter)
+        self.session.mount("http://", self.adapter)
+
+        self._lock = threading.Lock()
+        self._request_count = 0
+        self._closed = False
+
+    def get(self, url: str, timeout: Optional[float] = None, host: Optional[str] = None,
+            **kwargs) -> requests.Response:
+        """
+        发送 GET 请求（复用连接池中的连接）
+
+        连接错误、超时和 429/5xx 响应按重试策略退避重试；
+        重试耗尽后抛出最后一次的异常，或返回最后一次的响应由调用方处理。
+
+        Args:
+            url: 请求地址
+            timeout: 超时时间（秒），默认使用客户端配置
+            host: 限流和熔断使用的主机名，默认取 URL 中的主机（指向替身服务器时传入真实商店主机）
+            **kwargs: 透传给 requests 的其他参数
+
+        Returns:
+            requests.Response: 响应对象
+        """
+        if self._closed:
+            raise RuntimeError("HttpClient 已关闭")
+
+        host = host or urlparse(url).netloc
+
+        def attempt(attempt_timeout):
+            if self.rate_limiter:
+                self.rate_limiter.acquire(host)
+
+            with self._lock:
+                self._request_count += 1
+
+            response = self.session.get(url, timeout=attempt_timeout, **kwargs)
+
+            if self.rate_limiter:
+                self.rate_limiter.on_response(
+                    host, response.status_code, response.headers.get("Retry-After")
+                )
+            return response
+
+        response = call_with_retry(
+            attempt,
+            host,
+            self.retry_policy,
+            breaker=self.circuit_breaker,
+            deadline=self.deadline,
+            timeout=timeout or self.timeout,
+            retry_on=(requests.ConnectionError, requests.Timeout),
+            should_retry=lambda response: response.status_code in RETRY_STATUS_CODES,
+            logger=self.logger
+        )
+        if self.recorder is not None and response.status_code == 200 and not kwargs.get("stream"):
+            self.recorder.record(url, response.content)
+        return response
+
+    def get_body(self, url: str, timeout: Optional[float] = None, host: Optional[str] = None) -> bytes:
+        """
+        获取响应体，配置了 http_cache 时优先使用缓存
+
+        新鲜期内直接返回缓存内容；过期后带 If-None-Match / If-Modified-Since 请求，
+        服务端返回 304 时复用缓存内容。
+
+        Args:
+            url: 请求地址
+            timeout: 超时时间（秒）
+            host: 限流和熔断使用的主机名（可选）
+
+        Returns:
+            bytes: 响应体
+
+        Raises:
+            requests.HTTPError: 响应状态码表示失败
+        """
+        if not self.http_cache:
+            response = self.get(url, timeout=timeout, host=host)
+            response.raise_for_status()
+            return response.content
+
+        entry = self.http_cache.lookup(url)
+        if entry and self.http_cache.is_fresh(entry):
+            self.http_cache.record("fresh", entry.size)
+            return self._recorded(url, entry.read_body())
+
+        headers = entry.conditional_headers() if entry else {}
+        response = self.get(url, timeout=timeout, host=host, headers=headers)
+
+        if response.status_code == 304 and entry:
+            self.http_cache.touch(url, entry)
+            self.http_cache.record("revalidated", entry.size)
+            return self._recorded(url, entry.read_body())
+
+        response.raise_for_status()
+        body = response.content
+        self.http_cache.store(
+            url, body, response.headers.get("ETag"), response.headers.get("Last-Modified")
+        )
+        self.http_cache.record("misses", len(body))
+        return body
+
+    def _recorded(self, url: str, body: bytes) -> bytes:
+        """录制未经过网络（命中缓存）的响应体"""
+        if self.recorder is not None:
+            self.recorder.record(url, body)
+        return body
+
+    @contextmanager
+    def open_body(self, url: str, timeout: Optional[float] = None, chunk_size: int = 64 * 1024,
+                  host: Optional[str] = None):
+        """
+        以二进制流的方式打开响应体（用于流式解析）
+
+        配置了 http_cache 时，响应边下载边写入缓存文件，再从缓存文件读取；
+        否则直接读取解压后的响应流。录制模式下读取完整响应体后再包装为流。
+
+        Args:
+            url: 请求地址
+            timeout: 超时时间（秒）
+            chunk_size: 下载分块大小
+            host: 限流和熔断使用的主机名（可选）
+
+        Yields:
+            二进制文件对象
+
+        Raises:
+            requests.HTTPError: 响应状态码表示失败
+        """
+        if self.recorder is not None:
+            yield io.BytesIO(self.get_body(url, timeout=timeout, host=host))
+            return
+
+        entry = self.http_cache.lookup(url) if self.http_cache else None
+        if entry and self.http_cache.is_fresh(entry):
+            self.http_cache.record("fresh", entry.size)
+            with open(entry.body_path, 'rb') as f:
+                yield f
+            return
+
+        headers = entry.conditional_headers() if entry else {}
+        response = self.get(url, timeout=timeout, host=host, headers=headers, stream=True)
+        try:
+            if response.status_code == 304 and entry:
+                self.http_cache.touch(url, entry)
+                self.http_cache.record("revalidated", entry.size)
+            else:
+                response.raise_for_status()
+                if not self.http_cache:
+                    response.raw.decode_content = True
+                    yield response.raw
+                    return
+
+                entry = self.http_cache.store_stream(
+                    url,
+                    response.iter_content(chunk_size),
+                    response.headers.get("ETag"),
+                    response.headers.get("Last-Modified")
+                )
+                if entry is None:
+                    raise IOError(f"写入缓存失败: {url}")
+                self.http_cache.record("misses", entry.size)
+        finally:
+            response.close()
+
+        with open(entry.body_path, 'rb') as f:
+            yield f
+
+    def connection_stats(self) -> Dict[str, int]:
+        """
+        获取连接统计
+
+        Returns:
+            Dict: requests 为请求次数，connections 为新建连接（TCP+TLS 握手）次数
+        """
+        connections = 0
+        pools = self.adapter.poolmanager.pools
+        for key in list(pools.keys()):
+            pool = pools.get(key)
+            if pool is not None:
+                connections += pool.num_connections
+
+        return {
+            "requests": self._request_count,
+            "connections": connections
+        }
+
+    def close(self):
+        """关闭连接池"""
+        if self._closed:
+            return
+        stats = self.connection_stats()
+        self.logger.debug(
+            f"HTTP 客户端关闭: 请求 {stats['requests']} 次，新建连接 {stats['connections']} 次"
+        )
+        self.session.close()
+        self._closed = True
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
@@ -0,0 +1,86 @@
+"""
+已分析产品登记工具：查看、增删记录，压缩日志，导出 analyzed_apps.json
+
+使用示例:
+  python scripts/analyzed_apps.py stats                          # 记录数、日志行数和大小
+  python scripts/analyzed_apps.py add com.example.app            # 标记为已分析
+  python scripts/analyzed_apps.py remove com.example.app         # 取消标记（下次识别时可再次报告）
+  python scripts/analyzed_apps.py compact                        # 去掉墓碑和被删除的记录
+  python scripts/analyzed_apps.py export                         # 重新导出 analyzed_apps.json
+"""
+
+import sys
+import os
+import argparse
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config_simple import DATA_DIR
+from utils.analyzed_registry import open_analyzed_registry
+
+
+def stats(args):
+    """打印记录数和日志大小"""
+    registry = open_analyzed_registry(args.base_dir)
+    count = len(registry)
+    size, lines = 0, 0
+    if os.path.exists(registry.log_path):
+        with open(registry.log_path, 'rb') as f:
+            content = f.read()
+        size, lines = len(content), content.count(b"\n")
+    print(f"{registry.log_path}: {count} 个产品，{lines} 行，{size / 1024:.1f} KB")
+
+
+def add(args):
+    """标记为已分析"""
+    added = open_analyzed_registry(args.base_dir).add(args.app_ids, source=args.source)
+    print(f"新增 {added} 条记录")
+
+
+def remove(args):
+    """取消标记"""
+    removed = open_analyzed_registry(args.base_dir).remove(args.app_ids, source=args.source)
+    print(f"删除 {removed} 条记录")
+
+
+def compact(args):
+    """压缩日志"""
+    lines = open_analyzed_registry(args.base_dir).compact()
+    print(f"压缩完成：{lines} 行")
+
+
+def export(args):
+    """导出 analyzed_apps.json"""
+    registry = open_analyzed_registry(args.base_dir)
+    if registry.export_json():
+        print(f"已导出 {registry.export_path}（{len(registry)} 个产品）")
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(
+        description="已分析产品登记",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=__doc__
+    )
+    parser.add_argument("--base-dir", default=DATA_DIR, help="数据根目录（默认 data/）")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    subparsers.add_parser("stats", help="记录数和日志大小").set_defaults(func=stats)
+
+    for name, func, help_text in (("add", add, "标记为已分析"), ("remove", remove, "取消标记")):
+        sub_parser = subparsers.add_parser(name, help=help_text)
+        sub_parser.add_argument("app_ids", nargs="+", help="应用ID")
+        sub_parser.add_argument("--source", default="manual", help="记录来源（默认 manual）")
+        sub_parser.set_defaults(func=func)
+
+    subparsers.add_parser("compact", help="去掉墓碑和被删除的记录").set_defaults(func=compact)
+    subparsers.add_parser("export", help="重新导出 analyzed_apps.json").set_defaults(func=export)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+应用历史索引工具：从已有榜单重建索引，查询单个应用的排名轨迹
+
+使用示例:
+  python scripts/app_history.py build                           # 从榜单存储重建 data/history（按 STORAGE_CONFIG 的格式读取）
+  python scripts/app_history.py show com.burbn.barcelona        # 应用的全部上榜记录
+  python scripts/app_history.py show com.burbn.barcelona --days 90 --platform app_store
+"""
+
+import sys
+import os
+import time
+import argparse
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config_simple import APP_STORE_CATEGORIES, GOOGLE_PLAY_CATEGORIES, DATA_DIR, STORAGE_CONFIG
+from utils.data_storage import iter_store_days, open_ranking_store
+from utils.app_history import AppHistoryIndex
+
+
+def build(args):
+    """按日期顺序读取全部主商店榜单，写入新的索引后替换原目录"""
+    history_dir = os.path.join(args.base_dir, "history")
+    start = time.perf_counter()
+    categories = {"app_store": APP_STORE_CATEGORIES, "google_play": GOOGLE_PLAY_CATEGORIES}
+    with open_ranking_store(args.base_dir, args.storage or STORAGE_CONFIG.get("format", "json")) as store:
+        index = AppHistoryIndex.rebuild(history_dir, iter_store_days(store, categories))
+    elapsed = time.perf_counter() - start
+    print(
+        f"已重建 {history_dir}: {len(index)} 个应用，{len(index.slots)} 个分类，"
+        f"{index.size / 1024 / 1024:.1f} MB，耗时 {elapsed:.1f} s"
+    )
+
+
+def show(args):
+    """打印应用的上榜记录"""
+    index = AppHistoryIndex(os.path.join(args.base_dir, "history"))
+    start = time.perf_counter()
+    records = index.history(args.app_id, args.days, args.platform)
+    elapsed = (time.perf_counter() - start) * 1000
+    if not records:
+        print(f"没有 {args.app_id} 的上榜记录")
+        return
+    print(f"{args.app_id}: {len(records)} 条记录（{elapsed:.2f} ms）")
+    for record in records:
+        rating_count = record["rating_count"] if record["rating_count"] is not None else "-"
+        print(f"  {record['date']}  {record['platform']:<12} {record['category']:<16} "
+              f"#{record['rank']:<4} {rating_count}")
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(
+        description="应用历史索引",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=__doc__
+    )
+    parser.add_argument("--base-dir", default=DATA_DIR, help="数据根目录（默认 data/）")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    build_parser = subparsers.add_parser("build", help="从榜单存储重建索引")
+    build_parser.add_argument("--storage", type=str, help="读取的存储格式（默认读取 STORAGE_CONFIG）")
+    build_parser.set_defaults(func=build)
+
+    show_parser = subparsers.add_parser("show", help="查询应用的上榜记录")
+    show_parser.add_argument("app_id", help="应用ID（App Store 为 Bundle ID，Google Play 为包名）")
+    show_parser.add_argument("--days", type=int, help="只显示最近 N 天")
+    show_parser.add_argument("--platform", choices=["app_store", "google_play"], help="只显示指定平台")
+    show_parser.set_defaults(func=show)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
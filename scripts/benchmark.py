@@ -0,0 +1,473 @@
+"""
+性能基准测试
+
+使用示例:
+  python scripts/benchmark.py feed-memory                  # 对比 RSS 整体解析与流式解析的峰值内存
+  python scripts/benchmark.py feed-memory --entries 200    # 指定模拟 feed 的条目数
+  python scripts/benchmark.py feed-memory --file feed.json # 使用已保存的真实 feed
+  python scripts/benchmark.py replay --latency 0.2         # 回放录制的响应，对比顺序与并发爬取的吞吐量
+  python scripts/benchmark.py replay --error-rate 0.1      # 同时注入 10% 的 503 错误
+  python scripts/benchmark.py storage                      # 对比不压缩 / gzip / zstd 的写入、读取耗时和占用空间
+  python scripts/benchmark.py storage --level 9            # 指定压缩级别
+  python scripts/benchmark.py json-codec                   # 对比标准库 json 与 json_codec（orjson）的编解码耗时
+  python scripts/benchmark.py rank-cube                    # 对比逐个解析 JSON 与排名立方体计算流失率的耗时
+  python scripts/benchmark.py detection                    # 在全部历史上对比逐分类重复加载与识别引擎的新上榜识别耗时
+  python scripts/benchmark.py detection --compare-days 1 7 30  # 每天分别与 1 / 7 / 30 天前比较
+"""
+
+import sys
+import os
+import json
+import time
+import argparse
+import tempfile
+import tracemalloc
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def _measure(func):
+    """
+    运行函数并记录耗时和峰值内存
+
+    Returns:
+        Tuple: (返回值, 耗时秒数, 峰值字节数)
+    """
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def _print_row(name, elapsed, peak, extra=""):
+    print(f"  {name:<16} 耗时 {elapsed * 1000:8.1f} ms   峰值内存 {peak / 1024 / 1024:8.2f} MB  {extra}")
+
+
+def _fake_feed_entry(index):
+    """构造一条与 iTunes RSS 结构一致的条目（含 summary 等我们不保留的字段）"""
+    return {
+        "im:name": {"label": f"Sample App {index}"},
+        "im:image": [
+            {"label": f"https://is1-ssl.mzstatic.com/image/thumb/{index}/{size}x{size}bb.png",
+             "attributes": {"height": str(size)}}
+            for size in (53, 75, 100)
+        ],
+        "summary": {"label": "A long store description. " * 80},
+        "im:price": {"label": "Get", "attributes": {"amount": "0.00", "currency": "USD"}},
+        "im:contentType": {"attributes": {"term": "Application", "label": "Application"}},
+        "rights": {"label": f"© 2026 Sample Developer {index}"},
+        "title": {"label": f"Sample App {index} - Sample Developer"},
+        "link": [
+            {"attributes": {"rel": "alternate", "type": "text/html",
+                            "href": f"https://apps.apple.com/us/app/sample/id{1000000 + index}?uo=2"}},
+            {"im:duration": {"label": "77000"},
+             "attributes": {"title": "Preview", "rel": "enclosure", "type": "video/x-m4v",
+                            "href": f"https://video.example.com/{index}.m4v"}}
+        ],
+        "id": {"label": f"https://apps.apple.com/us/app/sample/id{1000000 + index}?uo=2",
+               "attributes": {"im:id": str(1000000 + index), "im:bundleId": f"com.sample.app{index}"}},
+        "im:artist": {"label": f"Sample Developer {index}",
+                      "attributes": {"href": f"https://apps.apple.com/us/developer/id{index}?uo=2"}},
+        "category": {"attributes": {"im:id": "6013", "term": "Health & Fitness",
+                                    "scheme": "https://apps.apple.com/us/genre/id6013", "label": "Health & Fitness"}},
+        "im:releaseDate": {"label": "2026-02-23T00:00:00-07:00", "attributes": {"label": "February 23, 2026"}}
+    }
+
+
+def bench_feed_memory(args):
+    """对比 RSS feed 整体解析（json.loads + 逐条复制）与流式解析的耗时和峰值内存"""
+    from scrapers.app_store_scraper import AppStoreScraper
+    from scrapers.feed_parser import iter_feed_entries, IJSON_AVAILABLE
+
+    if args.file:
+        feed_path = args.file
+    else:
+        feed = {"feed": {
+            "author": {"name": {"label": "iTunes Store"}, "uri": {"label": "http://www.apple.com/itunes/"}},
+            "entry": [_fake_feed_entry(i) for i in range(args.entries)],
+            "updated": {"label": "2026-02-23T00:00:00-07:00"},
+            "title": {"label": "iTunes Store: Top Free Applications"}
+        }}
+        handle, feed_path = tempfile.mkstemp(suffix=".json")
+        with os.fdopen(handle, 'w', encoding='utf-8') as f:
+            json.dump(feed, f)
+        del feed
+
+    scraper = AppStoreScraper()
+    timestamp = "2026-01-01 00:00:00"
+
+    def dom_path():
+        with open(feed_path, 'rb') as f:
+            data = json.loads(f.read())
+        entries = data.get("feed", {}).get("entry", [])
+        return [scraper._parse_app_entry(entry, rank, "benchmark", timestamp)
+                for rank, entry in enumerate(entries, start=1)]
+
+    def streaming_path():
+        with open(feed_path, 'rb') as f:
+            return [scraper._parse_app_entry(entry, rank, "benchmark", timestamp)
+                    for rank, entry in enumerate(iter_feed_entries(f), start=1)]
+
+    try:
+        size = os.path.getsize(feed_path)
+        print(f"feed 大小: {size / 1024:.1f} KB，解析器: {'ijson' if IJSON_AVAILABLE else '内置增量解析'}")
+        dom_apps, dom_time, dom_peak = _measure(dom_path)
+        stream_apps, stream_time, stream_peak = _measure(streaming_path)
+        assert dom_apps == stream_apps, "两种解析方式结果不一致"
+
+        _print_row("整体解析", dom_time, dom_peak, f"{len(dom_apps)} 个应用")
+        _print_row("流式解析", stream_time, stream_peak, f"{len(stream_apps)} 个应用")
+        if stream_peak:
+            print(f"  峰值内存降低: {dom_peak / stream_peak:.1f}x")
+    finally:
+        scraper.close()
+        if not args.file:
+            os.remove(feed_path)
+
+
+def bench_replay(args):
+    """
+    在本地替身服务器上回放录制的响应（python scraper.py --record 录制），
+    对比不同爬取方式的总耗时和吞吐量；延迟和错误注入由种子决定，结果可重复
+    """
+    from config_simple import SCRAPER_CONFIG
+    from scrapers.fixture_server import FixtureServer
+    from modules.scraper import RankingMonitorScraper
+
+    fixture_dir = args.dir or SCRAPER_CONFIG["fixtures"]["dir"]
+    if not os.path.exists(os.path.join(fixture_dir, "index.json")):
+        print(f"未找到录制数据: {fixture_dir}，请先运行 python modules/scraper.py --record")
+        return
+    SCRAPER_CONFIG["fixtures"]["dir"] = fixture_dir
+
+    if args.unthrottled:
+        # 去掉令牌桶限制，只测量并发调度本身
+        for options in SCRAPER_CONFIG["rate_limit"].values():
+            options.update(rate=1000.0, burst=100, max_rate=1000.0)
+
+    rows = []
+    for mode in args.modes:
+        with FixtureServer(
+            fixture_dir,
+            latency=args.latency,
+            jitter=args.jitter,
+            error_rate=args.error_rate,
+            error_status=args.error_status,
+            seed=args.seed
+        ) as server:
+            SCRAPER_CONFIG["fixtures"]["replay_url"] = server.base_url
+            start = time.perf_counter()
+            with RankingMonitorScraper(args.date, mode=mode, fixture_mode="replay") as scraper:
+                scraper.scrape_all(args.platform)
+                connections = scraper.http_client.connection_stats()["connections"]
+            elapsed = time.perf_counter() - start
+            rows.append((mode, elapsed, dict(server.stats), connections))
+
+    print(f"\n回放结果（延迟 {args.latency}s + 抖动 {args.jitter}s，错误率 {args.error_rate:.0%}，种子 {args.seed}）:")
+    for mode, elapsed, stats, connections in rows:
+        print(
+            f"  {mode:<12} 耗时 {elapsed:7.2f} s   请求 {stats['requests']:4d} 次   "
+            f"吞吐量 {stats['requests'] / elapsed:6.2f} 次/秒   注入错误 {stats['errors']:3d}   "
+            f"未录制 {stats['not_found']:3d}   新建连接 {connections}"
+        )
+    if len(rows) > 1 and rows[-1][1]:
+        print(f"  加速比（{rows[0][0]} / {rows[-1][0]}）: {rows[0][1] / rows[-1][1]:.2f}x")
+
+
+def bench_storage(args):
+    """
+    将 data/raw 下的全部分类文件分别按不压缩 / gzip / zstd 重新写入临时目录，
+    对比写入耗时、读取耗时（load_from_json）和占用空间，并校验读回的数据一致
+    """
+    from config_simple import DATA_DIR
+    from utils.data_storage import ZSTD_AVAILABLE, compressed_path, load_from_json, save_to_json
+
+    raw_dir = os.path.join(args.base_dir or DATA_DIR, "raw")
+    files = []
+    source_size = 0
+    for root, _, names in os.walk(raw_dir):
+        for name in sorted(names):
+            path = os.path.join(root, name)
+            if name.endswith(".json") and root != raw_dir:
+                files.append((os.path.relpath(path, raw_dir), load_from_json(path)))
+                source_size += os.path.getsize(path)
+    if not files:
+        print(f"未找到分类文件: {raw_dir}")
+        return
+    days = len({rel_path.split(os.sep)[0] for rel_path, _ in files})
+    print(f"数据: {days} 天，{len(files)} 个分类文件\n")
+
+    compressions = [None if name == "none" else name for name in args.compressions]
+    if "zstd" in compressions and not ZSTD_AVAILABLE:
+        print("zstandard 未安装，跳过 zstd（pip install zstandard）\n")
+        compressions.remove("zstd")
+
+    rows = []
+    for compression in compressions:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            paths = [compressed_path(os.path.join(tmp_dir, rel_path), compression) for rel_path, _ in files]
+
+            start = time.perf_counter()
+            for path, (_, data) in zip(paths, files):
+                save_to_json(data, path, compression, args.level)
+            write_time = time.perf_counter() - start
+            size = sum(os.path.getsize(path) for path in paths)
+
+            start = time.perf_counter()
+            loaded = [load_from_json(path) for path in paths]
+            read_time = time.perf_counter() - start
+            assert loaded == [data for _, data in files], f"{compression or 'none'} 读回的数据不一致"
+            rows.append((compression or "none", write_time, read_time, size))
+
+    for name, write_time, read_time, size in rows:
+        print(
+            f"  {name:<6} 写入 {write_time:6.2f} s   读取 {read_time:6.2f} s   "
+            f"大小 {size / 1024 / 1024:7.1f} MB   压缩比 {source_size / size:5.1f}x"
+        )
+
+
+def _best_of(func, repeat):
+    """重复运行取最短耗时（秒）"""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def bench_json_codec(args):
+    """
+    在 data/raw 和 data/new_apps 的真实文件上对比标准库 json 与 utils/json_codec 的
+    解析、序列化（缩进 / 紧凑）以及 load_from_json 整体耗时
+    """
+    from config_simple import DATA_DIR
+    from utils import json_codec
+    from utils.data_storage import load_from_json
+
+    base_dir = args.base_dir or DATA_DIR
+    paths = []
+    for sub_dir in ("raw", "new_apps"):
+        for root, _, names in os.walk(os.path.join(base_dir, sub_dir)):
+            paths.extend(os.path.join(root, name) for name in sorted(names) if name.endswith(".json"))
+    if not paths:
+        print(f"未找到 JSON 文件: {base_dir}")
+        return
+
+    bodies = []
+    for path in paths:
+        with open(path, 'rb') as f:
+            bodies.append(f.read())
+    documents = [json.loads(body) for body in bodies]
+    total_bytes = sum(len(body) for body in bodies)
+    backend = "orjson" if json_codec.ORJSON_AVAILABLE else "标准库 json（未安装 orjson）"
+    print(f"数据: {len(paths)} 个文件，{total_bytes / 1024 / 1024:.1f} MB；json_codec 后端: {backend}\n")
+
+    cases = [
+        ("解析 json.loads", lambda: [json.loads(body) for body in bodies]),
+        ("解析 json_codec", lambda: [json_codec.loads(body) for body in bodies]),
+        ("缩进 json.dumps", lambda: [json.dumps(d, ensure_ascii=False, indent=2).encode('utf-8') for d in documents]),
+        ("缩进 json_codec", lambda: [json_codec.dumps(d, pretty=True) for d in documents]),
+        ("紧凑 json.dumps", lambda: [json.dumps(d, ensure_ascii=False, separators=(",", ":")).encode('utf-8')
+                                   for d in documents]),
+        ("紧凑 json_codec", lambda: [json_codec.dumps(d) for d in documents]),
+        ("load_from_json", lambda: [load_from_json(path) for path in paths]),
+    ]
+    for name, func in cases:
+        elapsed = _best_of(func, args.repeat)
+        print(
+            f"  {name:<16} {elapsed * 1000:8.1f} ms   每个文件 {elapsed / len(paths) * 1e6:7.1f} µs   "
+            f"{total_bytes / elapsed / 1024 / 1024:7.1f} MB/s"
+        )
+
+
+def bench_rank_cube(args):
+    """
+    计算全部历史的各分类日均流失率：逐日解析榜单 JSON（原来的做法）对比在排名立方体上向量化计算，
+    并校验两者结果一致（立方体需先用 python scripts/rank_cube.py build 生成）
+    """
+    from config_simple import APP_STORE_CATEGORIES, GOOGLE_PLAY_CATEGORIES, DATA_DIR
+    from utils.data_storage import open_ranking_store
+    from utils.rank_cube import RankCube, churn_rate, slot_key
+
+    base_dir = args.base_dir or DATA_DIR
+    categories = {"app_store": APP_STORE_CATEGORIES, "google_play": GOOGLE_PLAY_CATEGORIES}
+
+    def json_churn():
+        store = open_ranking_store(base_dir, "json")
+        charts = {}
+        for date_str in sorted(store.list_dates()):
+            for platform, platform_categories in categories.items():
+                for category in platform_categories:
+                    apps = store.load_category(date_str, platform, category).get("apps", [])
+                    charts.setdefault(slot_key(platform, category), []).append({app["app_id"] for app in apps})
+        rates = {}
+        for key, days in charts.items():
+            pairs = [(before, after) for before, after in zip(days, days[1:]) if before and after]
+            if pairs:
+                rates[key] = sum(len(before - after) / len(before) for before, after in pairs) / len(pairs)
+        return rates
+
+    def cube_churn():
+        return churn_rate(RankCube(os.path.join(base_dir, "cube")))
+
+    cube = RankCube(os.path.join(base_dir, "cube"))
+    if not cube.days:
+        print("排名立方体为空，请先运行: python scripts/rank_cube.py build")
+        return
+    print(f"数据: {len(cube.days)} 天 × {len(cube.slots)} 个分类 × {len(cube.apps)} 个应用\n")
+
+    json_rates = json_churn()
+    cube_rates = cube_churn()
+    assert json_rates.keys() == cube_rates.keys() and all(
+        abs(json_rates[key] - cube_rates[key]) < 1e-9 for key in json_rates
+    ), "两种方式的流失率不一致"
+
+    json_time = _best_of(json_churn, args.repeat)
+    cube_time = _best_of(cube_churn, args.repeat)
+    print(f"  逐个解析 JSON   {json_time * 1000:8.1f} ms")
+    print(f"  排名立方体      {cube_time * 1000:8.1f} ms（含打开索引和内存映射）")
+    print(f"  加速比: {json_time / cube_time:.0f}x")
+
+
+def bench_detection(args):
+    """
+    在 data/raw 的全部历史上识别每天的新上榜产品（每天与前 N 个有数据的日期分别比较）：
+    原来的做法（每个分类重新读取两天的文件再做集合差）对比识别引擎（每天只加载一次、按 app_id 建索引），
+    并校验两者结果一致
+    """
+    from config_simple import APP_STORE_CATEGORIES, GOOGLE_PLAY_CATEGORIES, DATA_DIR
+    from utils.data_storage import open_ranking_store
+    from utils.detection_engine import DetectionEngine
+
+    base_dir = args.base_dir or DATA_DIR
+    categories = {"app_store": APP_STORE_CATEGORIES, "google_play": GOOGLE_PLAY_CATEGORIES}
+    store = open_ranking_store(base_dir, args.storage or "json")
+    dates = sorted(store.list_dates())
+    offsets = sorted(set(args.compare_days))
+    pairs = [
+        (date_str, [dates[position - offset] for offset in offsets if position >= offset])
+        for position, date_str in enumerate(dates)
+    ]
+    pairs = [(date_str, compare_dates) for date_str, compare_dates in pairs if compare_dates]
+    if not pairs:
+        print(f"历史数据不足: {base_dir}")
+        return
+    comparisons = sum(len(compare_dates) for _, compare_dates in pairs)
+    sections = [(platform, category) for platform in categories for category in categories[platform]]
+    print(
+        f"数据: {len(dates)} 天 × {len(sections)} 个分类，每天与前 {'/'.join(map(str, offsets))} 个日期比较，"
+        f"共 {comparisons} 次比较；CPU {os.cpu_count()} 核\n"
+    )
+
+    def legacy():
+        result = {}
+        for date_str, compare_dates in pairs:
+            for compare_date in compare_dates:
+                for platform, category in sections:
+                    today_apps = store.load_category(date_str, platform, category).get("apps", [])
+                    before_apps = store.load_category(compare_date, platform, category).get("apps", [])
+                    if not today_apps or not before_apps:
+                        result[(date_str, compare_date, platform, category)] = None
+                        continue
+                    new_ids = {app.get("app_id") for app in today_apps if app.get("app_id")} - \
+                        {app.get("app_id") for app in before_apps if app.get("app_id")}
+                    result[(date_str, compare_date, platform, category)] = [
+                        app for app in today_apps if app.get("app_id") in new_ids
+                    ]
+        return result
+
+    def engine_run(workers):
+        # 按日期顺序运行时，最近使用的日期跨度约为最大对比距离的两倍，缓存覆盖后每天只加载一次
+        result = {}
+        with DetectionEngine(store, categories, read_workers=workers, cache_days=max(offsets) * 2 + 2) as engine:
+            for date_str, compare_dates in pairs:
+                for compare_date, entries in engine.detect(date_str, compare_dates).items():
+                    for (platform, category), apps in entries.items():
+                        result[(date_str, compare_date, platform, category)] = apps
+        return result, engine.stats
+
+    expected = legacy()
+    for workers in args.workers:
+        actual, _ = engine_run(workers)
+        assert actual == expected, f"识别引擎（{workers} 个线程）与原来的结果不一致"
+    total = sum(len(apps) for apps in expected.values() if apps)
+    print(f"  两种方式结果一致：共 {total} 条新上榜记录\n")
+
+    legacy_time = _best_of(legacy, args.repeat)
+    print(f"  逐分类重复加载       {legacy_time * 1000:9.1f} ms   读取 {comparisons * len(sections) * 2} 个文件")
+    for workers in args.workers:
+        engine_time = _best_of(lambda: engine_run(workers), args.repeat)
+        _, stats = engine_run(workers)
+        print(
+            f"  识别引擎（{workers:>2} 个线程） {engine_time * 1000:9.1f} ms   读取 {stats['loads'] * len(sections)} 个文件   "
+            f"加速比 {legacy_time / engine_time:.1f}x"
+        )
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(
+        description="性能基准测试",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=__doc__
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    feed_parser = subparsers.add_parser("feed-memory", help="RSS 解析峰值内存对比")
+    feed_parser.add_argument("--entries", type=int, default=200, help="模拟 feed 的条目数（默认 200）")
+    feed_parser.add_argument("--file", type=str, help="使用已保存的 feed 文件")
+    feed_parser.set_defaults(func=bench_feed_memory)
+
+    replay_parser = subparsers.add_parser("replay", help="在替身服务器上回放录制的响应，测量爬取吞吐量")
+    replay_parser.add_argument("--dir", type=str, help="录制数据目录（默认读取配置）")
+    replay_parser.add_argument("--date", type=str, default="2000-01-01", help="回放输出使用的日期")
+    replay_parser.add_argument("--platform", choices=["app_store", "google_play"], help="只回放指定平台")
+    replay_parser.add_argument("--modes", nargs="+", default=["sequential", "thread"],
+                               choices=["sequential", "thread"], help="对比的爬取方式")
+    replay_parser.add_argument("--latency", type=float, default=0.1, help="每个请求的固定延迟（秒）")
+    replay_parser.add_argument("--jitter", type=float, default=0.0, help="额外随机延迟上限（秒）")
+    replay_parser.add_argument("--error-rate", type=float, default=0.0, help="注入错误的概率（0~1）")
+    replay_parser.add_argument("--error-status", type=int, default=503, help="注入错误的状态码")
+    replay_parser.add_argument("--seed", type=int, default=0, help="随机种子")
+    replay_parser.add_argument("--unthrottled", action="store_true", help="关闭令牌桶限流，只测量并发调度")
+    replay_parser.set_defaults(func=bench_replay)
+
+    storage_parser = subparsers.add_parser("storage", help="分类文件压缩格式的写入、读取耗时和占用空间")
+    storage_parser.add_argument("--base-dir", type=str, help="数据根目录（默认 data/）")
+    storage_parser.add_argument("--compressions", nargs="+", default=["none", "gzip", "zstd"],
+                                choices=["none", "gzip", "zstd"], help="对比的压缩格式")
+    storage_parser.add_argument("--level", type=int, help="压缩级别（默认 gzip 6 / zstd 3）")
+    storage_parser.set_defaults(func=bench_storage)
+
+    codec_parser = subparsers.add_parser("json-codec", help="标准库 json 与 json_codec 的编解码耗时")
+    codec_parser.add_argument("--base-dir", type=str, help="数据根目录（默认 data/）")
+    codec_parser.add_argument("--repeat", type=int, default=3, help="重复次数，取最短耗时（默认 3）")
+    codec_parser.set_defaults(func=bench_json_codec)
+
+    cube_parser = subparsers.add_parser("rank-cube", help="逐个解析 JSON 与排名立方体计算流失率的耗时")
+    cube_parser.add_argument("--base-dir", type=str, help="数据根目录（默认 data/）")
+    cube_parser.add_argument("--repeat", type=int, default=3, help="重复次数，取最短耗时（默认 3）")
+    cube_parser.set_defaults(func=bench_rank_cube)
+
+    detection_parser = subparsers.add_parser("detection", help="逐分类重复加载与识别引擎的新上榜识别耗时")
+    detection_parser.add_argument("--base-dir", type=str, help="数据根目录（默认 data/）")
+    detection_parser.add_argument("--storage", type=str, help="读取的存储格式（默认 json）")
+    detection_parser.add_argument("--compare-days", type=int, nargs="+", default=[1],
+                                  help="与前 N 个有数据的日期比较，可指定多个（默认 1）")
+    detection_parser.add_argument("--workers", type=int, nargs="+", default=[1, 8],
+                                  help="识别引擎的读取线程数，可指定多个（默认 1 8）")
+    detection_parser.add_argument("--repeat", type=int, default=3, help="重复次数，取最短耗时（默认 3）")
+    detection_parser.set_defaults(func=bench_detection)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,528 @@
+"""
+榜单数据格式迁移工具
+
+使用示例:
+  python scripts/migrate_data.py snapshot                      # 将 data/raw 下的分文件数据合并为每日快照
+  python scripts/migrate_data.py snapshot --remove             # 合并并校验后删除原日期目录
+  python scripts/migrate_data.py snapshot --from 2026-03-01    # 只迁移指定日期范围
+  python scripts/migrate_data.py json                          # 将每日快照展开为分文件（Web 页面静态读取）
+  python scripts/migrate_data.py catalog                       # 将分文件数据转换为应用目录 + 每日排名表
+  python scripts/migrate_data.py sqlite                        # 将分文件数据导入 SQLite 数据库
+  python scripts/migrate_data.py objects                       # 将分文件数据转换为内容寻址对象 + 每日引用
+  python scripts/migrate_data.py compress --compression gzip   # 将分类文件和新上榜结果压缩为 .json.gz
+  python scripts/migrate_data.py compress --compression none   # 解压回 .json
+  python scripts/migrate_data.py layout --layout canonical     # 改写为规范化布局（键排序、每个应用一行、去掉抓取时间）
+  python scripts/migrate_data.py layout --layout pretty        # 改写回 2 格缩进
+  python scripts/migrate_data.py archive                       # 将超过保留天数的日期合并为按月归档（raw/archive）
+  python scripts/migrate_data.py archive --keep-days 30        # 只保留最近 30 天的日期目录
+  python scripts/migrate_data.py unarchive --from 2026-03-01   # 将归档中的日期展开回日期目录
+"""
+
+import sys
+import os
+import shutil
+import argparse
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config_simple import DATA_DIR, STORAGE_CONFIG
+from utils import json_codec
+from utils.data_storage import (
+    JSON_FILE_SUFFIXES,
+    SnapshotReader,
+    SnapshotWriter,
+    SNAPSHOT_SUFFIX,
+    MonthlyArchive,
+    archive_key,
+    canonical_json,
+    compress_bytes,
+    compressed_path,
+    compression_from_path,
+    decode_json,
+    decompress_json,
+    encode_json,
+    get_archive_path,
+    get_snapshot_path,
+    load_from_json,
+    open_ranking_store,
+    resolve_compression,
+    save_to_json,
+    write_archive
+)
+from utils.date_utils import get_date_before, is_valid_date
+
+
+def _in_range(date_str, args) -> bool:
+    if args.date_from and date_str < args.date_from:
+        return False
+    if args.date_to and date_str > args.date_to:
+        return False
+    return True
+
+
+def _date_dirs(raw_dir, args):
+    """data/raw 下需要迁移的日期目录（按日期排序）"""
+    return [
+        name for name in sorted(os.listdir(raw_dir))
+        if os.path.isdir(os.path.join(raw_dir, name)) and is_valid_date(name) and _in_range(name, args)
+    ]
+
+
+def _json_files(directory):
+    """
+    目录下的全部 JSON 文件（含压缩文件）
+
+    Returns:
+        List[Tuple]: (对应的 .json 路径, 实际文件路径)
+    """
+    files = []
+    for root, _, names in os.walk(directory):
+        for name in names:
+            for suffix in JSON_FILE_SUFFIXES:
+                if name.endswith(suffix):
+                    path = os.path.join(root, name)
+                    files.append((path[:-len(suffix)] + ".json", path))
+                    break
+    return sorted(files)
+
+
+def _category_files(date_dir):
+    """
+    日期目录下的全部分类文件（含压缩文件）
+
+    Returns:
+        List[Tuple]: (快照分区名, 文件路径)，分区名即相对路径去掉 .json
+    """
+    return [
+        (os.path.relpath(json_path, date_dir)[:-len(".json")].replace(os.sep, "/"), path)
+        for json_path, path in _json_files(date_dir)
+    ]
+
+
+def _parse_key(key):
+    """
+    分区名 -> (平台, 分类, 国家, 榜单类型)
+
+    Returns:
+        Tuple: 主商店的国家和榜单类型为 None
+    """
+    parts = key.split("/")
+    if len(parts) == 4:
+        return parts[0], parts[3], parts[1], parts[2]
+    return parts[0], parts[-1], None, None
+
+
+def _path_size(path):
+    """文件大小，或目录下全部文件的总大小"""
+    if os.path.isfile(path):
+        return os.path.getsize(path)
+    return sum(
+        os.path.getsize(os.path.join(root, name))
+        for root, _, names in os.walk(path) for name in names
+    )
+
+
+def migrate_to_store(args):
+    """将分文件数据逐日写入目标存储格式，逐个分类读回校验"""
+    raw_dir = os.path.join(args.base_dir, "raw")
+    bytes_before = 0
+    migrated = 0
+
+    store = open_ranking_store(args.base_dir, args.command)
+    for date_str in _date_dirs(raw_dir, args):
+        date_dir = os.path.join(raw_dir, date_str)
+        sections = {}
+        for key, path in _category_files(date_dir):
+            data = load_from_json(path)
+            if data:
+                bytes_before += os.path.getsize(path)
+                sections[key] = data
+        if not sections:
+            continue
+        if args.dry_run:
+            print(f"  {date_str}: {len(sections)} 个分类（试运行，未写入）")
+            continue
+
+        for key, data in sections.items():
+            platform, category, country, collection = _parse_key(key)
+            store.save_category(date_str, platform, category, data, country, collection)
+        if not store.flush():
+            print(f"  ✗ {date_str}: 写入失败")
+            continue
+
+        verified = all(
+            store.load_category(date_str, *_parse_key(key)) == data
+            for key, data in sections.items()
+        )
+        if not verified:
+            print(f"  ✗ {date_str}: 校验失败，保留原目录")
+            continue
+
+        migrated += 1
+        if args.remove:
+            shutil.rmtree(date_dir)
+        print(f"  ✓ {date_str}: {len(sections)} 个分类")
+    store.close()
+
+    print(f"\n共迁移 {migrated} 天")
+    target_paths = [getattr(store, "db_path", None) or os.path.join(args.base_dir, args.command)]
+    if getattr(store, "refs_dir", None):
+        target_paths.append(store.refs_dir)
+    target_paths = [path for path in target_paths if os.path.exists(path)]
+    if migrated and target_paths:
+        bytes_after = sum(_path_size(path) for path in target_paths)
+        print(f"分文件 {bytes_before / 1024 / 1024:.1f} MB -> {args.command} {bytes_after / 1024 / 1024:.1f} MB")
+
+
+def _data_files(args):
+    """
+    日期范围内的分类文件和新上榜结果
+
+    Returns:
+        List[Tuple]: (对应的 .json 路径, 实际文件路径)
+    """
+    raw_dir = os.path.join(args.base_dir, "raw")
+    new_apps_dir = os.path.join(args.base_dir, "new_apps")
+
+    directories = [os.path.join(raw_dir, date_str) for date_str in _date_dirs(raw_dir, args)]
+    files = [file for directory in directories for file in _json_files(directory)]
+    if os.path.isdir(new_apps_dir):
+        for json_path, path in _json_files(new_apps_dir):
+            date_str = os.path.basename(json_path)[:-len(".json")]
+            if is_valid_date(date_str) and _in_range(date_str, args):
+                files.append((json_path, path))
+    return files
+
+
+def migrate_layout(args):
+    """将分类文件和新上榜结果改写为规范化布局或 2 格缩进布局，读回校验后替换原文件"""
+    canonical = args.layout == "canonical"
+    files = _data_files(args)
+
+    bytes_before = 0
+    bytes_after = 0
+    converted = 0
+    for _, path in files:
+        with open(path, 'rb') as f:
+            raw = f.read()
+        bytes_before += len(raw)
+        data = decode_json(raw)
+        content = encode_json(data, compression_from_path(path), canonical=canonical)
+        if content == raw:
+            bytes_after += len(raw)
+            continue
+        if args.dry_run:
+            print(f"  {os.path.relpath(path, args.base_dir)}（试运行，未写入）")
+            bytes_after += len(raw)
+            continue
+
+        # 规范化布局不含抓取时间，按去掉抓取时间后的内容校验
+        expected = json_codec.loads(canonical_json(data)) if canonical else data
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(content)
+        if load_from_json(tmp_path) != expected:
+            os.remove(tmp_path)
+            print(f"  ✗ {os.path.relpath(path, args.base_dir)}: 校验失败，保留原文件")
+            bytes_after += len(raw)
+            continue
+        os.replace(tmp_path, path)
+        bytes_after += len(content)
+        converted += 1
+
+    print(f"\n共改写 {converted} 个文件（{len(files)} 个中）")
+    if converted:
+        print(f"{bytes_before / 1024 / 1024:.1f} MB -> {bytes_after / 1024 / 1024:.1f} MB")
+
+
+def migrate_to_archive(args):
+    """将早于保留期限的日期目录按月合并为归档，读回校验后删除原目录"""
+    raw_dir = os.path.join(args.base_dir, "raw")
+    before = args.before or get_date_before(args.keep_days)
+    compression = resolve_compression(args.compression)
+    if not compression:
+        print("归档必须压缩：--compression gzip / zstd")
+        return
+
+    months = {}
+    for date_str in _date_dirs(raw_dir, args):
+        if date_str < before:
+            months.setdefault(date_str[:7], []).append(date_str)
+    if not months:
+        print(f"没有早于 {before} 的日期目录")
+        return
+    print(f"归档早于 {before} 的日期（{compression}）:")
+
+    bytes_before = 0
+    bytes_after = 0
+    archived = 0
+    for month, dates in sorted(months.items()):
+        archive_path = get_archive_path(month, args.base_dir)
+        entries = {}
+        if os.path.exists(archive_path):
+            # 同一月份之后到期的日期合并进已有归档
+            existing = MonthlyArchive(archive_path)
+            entries = {key: existing.read_raw(key) for key in existing.keys()}
+
+        payloads = {}
+        for date_str in dates:
+            for key, path in _category_files(os.path.join(raw_dir, date_str)):
+                with open(path, 'rb') as f:
+                    raw = f.read()
+                bytes_before += len(raw)
+                payloads[archive_key(date_str, key)] = decompress_json(raw)
+        if args.dry_run:
+            print(f"  {month}: {len(dates)} 天，{len(payloads)} 个分类（试运行，未写入）")
+            continue
+
+        entries.update({key: compress_bytes(payload, compression, args.level) for key, payload in payloads.items()})
+        if not write_archive(archive_path, month, entries):
+            continue
+
+        # 逐个条目读回校验，全部一致才删除原目录
+        archive = MonthlyArchive(archive_path)
+        if not all(decompress_json(archive.read_raw(key)) == payload for key, payload in payloads.items()):
+            print(f"  ✗ {month}: 校验失败，保留原目录")
+            continue
+        for date_str in dates:
+            shutil.rmtree(os.path.join(raw_dir, date_str))
+        bytes_after += sum(len(entries[key]) for key in payloads)
+        archived += len(dates)
+        print(f"  ✓ {month}: {len(dates)} 天 -> {os.path.relpath(archive_path, args.base_dir)}")
+
+    print(f"\n共归档 {archived} 天")
+    if archived:
+        print(f"分文件 {bytes_before / 1024 / 1024:.1f} MB -> 归档 {bytes_after / 1024 / 1024:.1f} MB")
+
+
+def migrate_from_archive(args):
+    """将归档中（指定日期范围内）的日期展开回日期目录，其余条目保留在归档中"""
+    archive_dir = os.path.join(args.base_dir, "raw", "archive")
+    if not os.path.isdir(archive_dir):
+        print("没有归档")
+        return
+
+    restored = 0
+    for name in sorted(os.listdir(archive_dir)):
+        if not name.endswith(".archive"):
+            continue
+        archive_path = os.path.join(archive_dir, name)
+        archive = MonthlyArchive(archive_path)
+        keys = [key for key in archive.keys() if _in_range(key.split("/", 1)[0], args)]
+        if not keys:
+            continue
+        dates = sorted({key.split("/", 1)[0] for key in keys})
+        if args.dry_run:
+            print(f"  {archive.month}: {len(dates)} 天（试运行，未写入）")
+            continue
+
+        # 还原为原来的 .json 文件内容（不压缩）
+        for key in keys:
+            file_path = os.path.join(args.base_dir, "raw", *key.split("/")) + ".json"
+            os.makedirs(os.path.dirname(file_path), exist_ok=True)
+            with open(file_path, 'wb') as f:
+                f.write(decompress_json(archive.read_raw(key)))
+
+        remaining = {key: archive.read_raw(key) for key in archive.keys() if key not in keys}
+        if remaining:
+            write_archive(archive_path, archive.month, remaining)
+        else:
+            os.remove(archive_path)
+        restored += len(dates)
+        print(f"  ✓ {archive.month}: 展开 {len(dates)} 天")
+
+    if not os.listdir(archive_dir):
+        os.rmdir(archive_dir)
+    print(f"\n共展开 {restored} 天")
+
+
+def migrate_compression(args):
+    """将分类文件和新上榜结果转换为指定的压缩格式，读回校验后删除原文件"""
+    compression = resolve_compression(args.compression)
+    files = _data_files(args)
+
+    bytes_before = 0
+    bytes_after = 0
+    converted = 0
+    for json_path, path in files:
+        target_path = compressed_path(json_path, compression)
+        size = os.path.getsize(path)
+        bytes_before += size
+        if path == target_path:
+            bytes_after += size
+            continue
+        if args.dry_run:
+            print(f"  {os.path.relpath(path, args.base_dir)} -> {os.path.basename(target_path)}（试运行，未写入）")
+            continue
+
+        data = load_from_json(path)
+        if not data or not save_to_json(data, target_path, compression) or load_from_json(target_path) != data:
+            print(f"  ✗ {os.path.relpath(path, args.base_dir)}: 转换失败，保留原文件")
+            bytes_after += size
+            continue
+        os.remove(path)
+        bytes_after += os.path.getsize(target_path)
+        converted += 1
+
+    print(f"\n共转换 {converted} 个文件（{len(files)} 个中）")
+    if converted:
+        print(f"{bytes_before / 1024 / 1024:.1f} MB -> {bytes_after / 1024 / 1024:.1f} MB")
+
+
+def migrate_to_snapshot(args):
+    """将每个日期目录合并为一个快照文件"""
+    raw_dir = os.path.join(args.base_dir, "raw")
+    bytes_before = 0
+    bytes_after = 0
+    migrated = 0
+
+    for date_str in _date_dirs(raw_dir, args):
+        date_dir = os.path.join(raw_dir, date_str)
+        files = _category_files(date_dir)
+        if not files:
+            continue
+
+        snapshot_path = get_snapshot_path(date_str, args.base_dir)
+        sections = {}
+        writer = SnapshotWriter(snapshot_path, date_str)
+        for key, path in files:
+            bytes_before += os.path.getsize(path)
+            data = load_from_json(path)
+            if not data:
+                print(f"  ✗ {date_str} {key}: 无法读取，跳过该日期")
+                break
+            sections[key] = data
+            writer.add(key, data)
+        else:
+            if args.dry_run:
+                print(f"  {date_str}: {len(sections)} 个分类（试运行，未写入）")
+                continue
+            if not writer.close():
+                continue
+
+            # 逐个分区读回校验，全部一致才删除原目录
+            with SnapshotReader(snapshot_path) as reader:
+                verified = all(reader.read(key) == data for key, data in sections.items())
+            if not verified:
+                print(f"  ✗ {date_str}: 校验失败，保留原目录")
+                continue
+
+            bytes_after += os.path.getsize(snapshot_path)
+            migrated += 1
+            if args.remove:
+                shutil.rmtree(date_dir)
+            print(f"  ✓ {date_str}: {len(sections)} 个分类")
+
+    print(f"\n共迁移 {migrated} 天")
+    if migrated:
+        print(f"分文件 {bytes_before / 1024 / 1024:.1f} MB -> 快照 {bytes_after / 1024 / 1024:.1f} MB")
+
+
+def migrate_to_json(args):
+    """将快照展开为 日期/平台/分类 分文件"""
+    raw_dir = os.path.join(args.base_dir, "raw")
+    migrated = 0
+
+    for name in sorted(os.listdir(raw_dir)):
+        if not name.endswith(SNAPSHOT_SUFFIX):
+            continue
+        date_str = name[:-len(SNAPSHOT_SUFFIX)]
+        if not _in_range(date_str, args):
+            continue
+
+        snapshot_path = os.path.join(raw_dir, name)
+        with SnapshotReader(snapshot_path) as reader:
+            keys = reader.keys()
+            if args.dry_run:
+                print(f"  {date_str}: {len(keys)} 个分类（试运行，未写入）")
+                continue
+            success = all(
+                save_to_json(reader.read(key), os.path.join(raw_dir, date_str, *key.split("/")) + ".json")
+                for key in keys
+            )
+
+        if not success:
+            print(f"  ✗ {date_str}: 写入失败，保留快照")
+            continue
+        migrated += 1
+        if args.remove:
+            os.remove(snapshot_path)
+        print(f"  ✓ {date_str}: {len(keys)} 个分类")
+
+    print(f"\n共展开 {migrated} 天")
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(
+        description="榜单数据格式迁移",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=__doc__
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    def add_common(subparser):
+        subparser.add_argument("--base-dir", default=DATA_DIR, help="数据根目录（默认 data/）")
+        subparser.add_argument("--from", dest="date_from", help="起始日期（YYYY-MM-DD，含）")
+        subparser.add_argument("--to", dest="date_to", help="结束日期（YYYY-MM-DD，含）")
+        subparser.add_argument("--dry-run", action="store_true", help="只列出要迁移的日期，不写入")
+
+    snapshot_parser = subparsers.add_parser("snapshot", help="分文件 -> 每日合并快照")
+    add_common(snapshot_parser)
+    snapshot_parser.add_argument("--remove", action="store_true", help="校验通过后删除原日期目录")
+    snapshot_parser.set_defaults(func=migrate_to_snapshot)
+
+    json_parser = subparsers.add_parser("json", help="每日合并快照 -> 分文件")
+    add_common(json_parser)
+    json_parser.add_argument("--remove", action="store_true", help="展开后删除快照文件")
+    json_parser.set_defaults(func=migrate_to_json)
+
+    catalog_parser = subparsers.add_parser("catalog", help="分文件 -> 应用目录 + 每日紧凑排名表")
+    add_common(catalog_parser)
+    catalog_parser.add_argument("--remove", action="store_true", help="校验通过后删除原日期目录")
+    catalog_parser.set_defaults(func=migrate_to_store)
+
+    sqlite_parser = subparsers.add_parser("sqlite", help="分文件 -> SQLite 数据库（data/rankings.db）")
+    add_common(sqlite_parser)
+    sqlite_parser.add_argument("--remove", action="store_true", help="校验通过后删除原日期目录")
+    sqlite_parser.set_defaults(func=migrate_to_store)
+
+    objects_parser = subparsers.add_parser("objects", help="分文件 -> 内容寻址对象（data/objects）+ 每日引用（data/refs）")
+    add_common(objects_parser)
+    objects_parser.add_argument("--remove", action="store_true", help="校验通过后删除原日期目录")
+    objects_parser.set_defaults(func=migrate_to_store)
+
+    compress_parser = subparsers.add_parser("compress", help="分类文件和新上榜结果 -> 指定的压缩格式")
+    add_common(compress_parser)
+    compress_parser.add_argument("--compression", choices=["none", "gzip", "zstd"], required=True,
+                                 help="目标压缩格式（none 为解压回 .json）")
+    compress_parser.set_defaults(func=migrate_compression)
+
+    layout_parser = subparsers.add_parser("layout", help="分类文件和新上榜结果 -> 规范化布局 / 2 格缩进")
+    add_common(layout_parser)
+    layout_parser.add_argument("--layout", choices=["canonical", "pretty"], required=True,
+                               help="canonical：键排序、每个应用一行、去掉抓取时间（与 STORAGE_CONFIG 一致）")
+    layout_parser.set_defaults(func=migrate_layout)
+
+    archive_config = STORAGE_CONFIG.get("archive", {})
+    archive_parser = subparsers.add_parser("archive", help="早于保留期限的日期目录 -> 按月归档")
+    add_common(archive_parser)
+    archive_parser.add_argument("--keep-days", type=int, default=archive_config.get("keep_days", 90),
+                                help="保留最近 N 天的日期目录（默认读取 STORAGE_CONFIG）")
+    archive_parser.add_argument("--before", help="归档早于该日期的目录（YYYY-MM-DD，指定时忽略 --keep-days）")
+    archive_parser.add_argument("--compression", choices=["gzip", "zstd"],
+                                default=archive_config.get("compression", "zstd"), help="归档的压缩格式")
+    archive_parser.add_argument("--level", type=int, help="压缩级别（默认 gzip 6 / zstd 3）")
+    archive_parser.set_defaults(func=migrate_to_archive)
+
+    unarchive_parser = subparsers.add_parser("unarchive", help="按月归档 -> 日期目录")
+    add_common(unarchive_parser)
+    unarchive_parser.set_defaults(func=migrate_from_archive)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+上榜位图索引工具：从已有榜单重建索引，查看单个应用在各分类的上榜日期
+
+使用示例:
+  python scripts/presence_index.py build                         # 从榜单存储重建 data/presence（按 STORAGE_CONFIG 的格式读取）
+  python scripts/presence_index.py show com.burbn.barcelona      # 应用在各分类的上榜天数和日期区间
+"""
+
+import sys
+import os
+import time
+import argparse
+from datetime import datetime, timedelta
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config_simple import APP_STORE_CATEGORIES, GOOGLE_PLAY_CATEGORIES, DATA_DIR, STORAGE_CONFIG
+from utils.data_storage import iter_store_days, open_ranking_store
+from utils.presence_index import PresenceIndex
+
+
+def build(args):
+    """按日期顺序读取全部主商店榜单，写入新的索引后替换原目录"""
+    presence_dir = os.path.join(args.base_dir, "presence")
+    start = time.perf_counter()
+    categories = {"app_store": APP_STORE_CATEGORIES, "google_play": GOOGLE_PLAY_CATEGORIES}
+    with open_ranking_store(args.base_dir, args.storage or STORAGE_CONFIG.get("format", "json")) as store:
+        index = PresenceIndex.rebuild(presence_dir, iter_store_days(store, categories))
+    elapsed = time.perf_counter() - start
+    size = os.path.getsize(os.path.join(presence_dir, "index.json"))
+    print(
+        f"已重建 {presence_dir}: {len(index)} 个应用，{len(index.slots)} 个分类，"
+        f"{size / 1024:.0f} KB，耗时 {elapsed:.1f} s"
+    )
+
+
+def _ranges(dates):
+    """连续日期合并为区间"""
+    ranges = []
+    for date_str in dates:
+        day = datetime.strptime(date_str, "%Y-%m-%d")
+        if ranges and day - ranges[-1][1] == timedelta(days=1):
+            ranges[-1][1] = day
+        else:
+            ranges.append([day, day])
+    return [
+        start.strftime("%Y-%m-%d") if start == end else f"{start:%Y-%m-%d} ~ {end:%Y-%m-%d}"
+        for start, end in ranges
+    ]
+
+
+def show(args):
+    """打印应用在各分类的上榜日期"""
+    index = PresenceIndex(os.path.join(args.base_dir, "presence"))
+    presence = index.presence(args.app_id)
+    if not presence:
+        print(f"没有 {args.app_id} 的上榜记录")
+        return
+    for key, dates in sorted(presence.items()):
+        print(f"{key}: {len(dates)} 天")
+        for date_range in _ranges(dates):
+            print(f"  {date_range}")
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(
+        description="上榜位图索引",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=__doc__
+    )
+    parser.add_argument("--base-dir", default=DATA_DIR, help="数据根目录（默认 data/）")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    build_parser = subparsers.add_parser("build", help="从榜单存储重建索引")
+    build_parser.add_argument("--storage", type=str, help="读取的存储格式（默认读取 STORAGE_CONFIG）")
+    build_parser.set_defaults(func=build)
+
+    show_parser = subparsers.add_parser("show", help="查看应用在各分类的上榜日期")
+    show_parser.add_argument("app_id", help="应用ID（App Store 为 Bundle ID，Google Play 为包名）")
+    show_parser.set_defaults(func=show)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
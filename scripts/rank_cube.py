@@ -0,0 +1,138 @@
+"""
+排名立方体工具：从已有榜单重建立方体，在立方体上计算跨日期统计
+
+使用示例:
+  python scripts/rank_cube.py build                     # 从榜单存储重建 data/cube（按 STORAGE_CONFIG 的格式读取）
+  python scripts/rank_cube.py churn                     # 各分类的日均流失率
+  python scripts/rank_cube.py churn --days 30           # 只统计最近 30 天
+  python scripts/rank_cube.py volatility --limit 5      # 各分类排名波动最大的 5 个应用
+  python scripts/rank_cube.py days-on-chart             # 各分类在榜天数最多的应用
+  python scripts/rank_cube.py climbers --days 7         # 各分类最近 7 天排名上升最多的应用
+"""
+
+import sys
+import os
+import time
+import argparse
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config_simple import APP_STORE_CATEGORIES, GOOGLE_PLAY_CATEGORIES, DATA_DIR, STORAGE_CONFIG
+from utils.data_storage import iter_store_days, open_ranking_store
+from utils.rank_cube import RankCube, churn_rate, days_on_chart, rank_volatility, top_climbers
+
+
+CATEGORIES = {"app_store": APP_STORE_CATEGORIES, "google_play": GOOGLE_PLAY_CATEGORIES}
+
+
+def build(args):
+    """按日期顺序读取全部主商店榜单，写入新的立方体后替换原目录"""
+    cube_dir = os.path.join(args.base_dir, "cube")
+    start = time.perf_counter()
+    with open_ranking_store(args.base_dir, args.storage or STORAGE_CONFIG.get("format", "json")) as store:
+        cube = RankCube.rebuild(cube_dir, iter_store_days(store, CATEGORIES))
+    if cube is None:
+        return None
+
+    elapsed = time.perf_counter() - start
+    size = sum(os.path.getsize(os.path.join(cube_dir, name)) for name in os.listdir(cube_dir)) if cube.days else 0
+    print(
+        f"已重建 {cube_dir}: {len(cube.days)} 天 × {len(cube.slots)} 个分类 × {len(cube.apps)} 个应用，"
+        f"{size / 1024 / 1024:.1f} MB，耗时 {elapsed:.1f} s"
+    )
+    return cube
+
+
+def _open_cube(args) -> RankCube:
+    """
+    打开立方体；data/cube 不提交到仓库，不存在或晚于榜单存储的最早日期开始时
+    （如新检出后只有爬虫追加的当天）先从榜单存储重建
+    """
+    cube = RankCube(os.path.join(args.base_dir, "cube"))
+    with open_ranking_store(args.base_dir, STORAGE_CONFIG.get("format", "json")) as store:
+        dates = store.list_dates()
+    if dates and not cube.covers(min(dates)):
+        print("排名立方体缺失或不完整，从榜单存储重建...")
+        args.storage = None
+        cube = build(args)
+    if cube is None or not cube.days:
+        print("排名立方体为空，请先运行: python scripts/rank_cube.py build")
+        sys.exit(1)
+    return cube
+
+
+def _timed(func, *func_args, **kwargs):
+    start = time.perf_counter()
+    result = func(*func_args, **kwargs)
+    return result, (time.perf_counter() - start) * 1000
+
+
+def report_churn(args):
+    cube = _open_cube(args)
+    rates, elapsed = _timed(churn_rate, cube, args.days)
+    print(f"日均流失率（{args.days or len(cube.days)} 天，{elapsed:.1f} ms）:")
+    for key, rate in sorted(rates.items(), key=lambda item: -item[1]):
+        print(f"  {key:<28} {rate:6.1%}")
+
+
+def _print_ranking(title, result, value_key, elapsed):
+    print(f"{title}（{elapsed:.1f} ms）:")
+    for key, rows in result.items():
+        print(f"  {key}")
+        for row in rows:
+            extra = ", ".join(f"{name} {value}" for name, value in row.items() if name not in ("app", value_key))
+            print(f"    {row['app']:<48} {row[value_key]:>8}  {extra}")
+
+
+def report_volatility(args):
+    cube = _open_cube(args)
+    result, elapsed = _timed(rank_volatility, cube, args.days, min_days=args.min_days, limit=args.limit)
+    _print_ranking("排名波动（在榜日排名的标准差）", result, "volatility", elapsed)
+
+
+def report_days_on_chart(args):
+    cube = _open_cube(args)
+    result, elapsed = _timed(days_on_chart, cube, args.days, limit=args.limit)
+    _print_ranking("在榜天数", result, "days", elapsed)
+
+
+def report_climbers(args):
+    cube = _open_cube(args)
+    result, elapsed = _timed(top_climbers, cube, args.days or 7, limit=args.limit)
+    _print_ranking(f"最近 {args.days or 7} 天排名上升", result, "climb", elapsed)
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(
+        description="排名立方体",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=__doc__
+    )
+    parser.add_argument("--base-dir", default=DATA_DIR, help="数据根目录（默认 data/）")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    build_parser = subparsers.add_parser("build", help="从榜单存储重建立方体")
+    build_parser.add_argument("--storage", type=str, help="读取的存储格式（默认读取 STORAGE_CONFIG）")
+    build_parser.set_defaults(func=build)
+
+    reports = [
+        ("churn", "各分类的日均流失率", report_churn),
+        ("volatility", "各分类排名波动最大的应用", report_volatility),
+        ("days-on-chart", "各分类在榜天数最多的应用", report_days_on_chart),
+        ("climbers", "各分类最近 N 天排名上升最多的应用", report_climbers),
+    ]
+    for name, help_text, func in reports:
+        report_parser = subparsers.add_parser(name, help=help_text)
+        report_parser.add_argument("--days", type=int, help="只统计最近 N 天（climbers 默认 7）")
+        report_parser.add_argument("--limit", type=int, default=10, help="每个分类列出的应用数（默认 10）")
+        report_parser.add_argument("--min-days", type=int, default=5, help="volatility：至少在榜的天数")
+        report_parser.set_defaults(func=func)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,218 @@
+"""
+仓库大小工具：统计 Git 仓库的打包大小和完整克隆耗时，对比数据文件改用规范化布局前后的效果
+
+使用示例:
+  python scripts/repo_size.py current                  # 当前仓库：打包大小、完整克隆耗时
+  python scripts/repo_size.py compare                  # 用 data/ 下的数据按天提交，对比 2 格缩进和规范化布局
+  python scripts/repo_size.py compare --days 60        # 只用最近 60 天
+"""
+
+import sys
+import os
+import time
+import shutil
+import difflib
+import argparse
+import tempfile
+import subprocess
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config_simple import DATA_DIR
+from utils.data_storage import JSON_FILE_SUFFIXES, compression_from_path, decode_json, encode_json
+from utils.date_utils import is_valid_date
+
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _git(repo, *args) -> str:
+    result = subprocess.run(
+        ["git", "-C", repo, "-c", "user.name=repo-size", "-c", "user.email=repo-size@localhost", *args],
+        check=True, capture_output=True, text=True
+    )
+    return result.stdout
+
+
+def pack_size(repo: str) -> int:
+    """
+    仓库对象占用的字节数（打包文件 + 松散对象）
+
+    Args:
+        repo: 仓库目录
+
+    Returns:
+        int: 字节数
+    """
+    stats = dict(
+        line.split(": ", 1) for line in _git(repo, "count-objects", "-v").splitlines() if ": " in line
+    )
+    return (int(stats.get("size-pack", 0)) + int(stats.get("size", 0))) * 1024
+
+
+def clone_time(repo: str, repeat: int = 3) -> float:
+    """
+    完整克隆（--no-local：与远程克隆一样传输打包文件并检出）的最短耗时
+
+    Args:
+        repo: 仓库目录
+        repeat: 重复次数
+
+    Returns:
+        float: 秒
+    """
+    best = None
+    for _ in range(repeat):
+        target = tempfile.mkdtemp(prefix="repo-size-clone-")
+        try:
+            start = time.perf_counter()
+            subprocess.run(["git", "clone", "--quiet", "--no-local", repo, target], check=True, capture_output=True)
+            elapsed = time.perf_counter() - start
+        finally:
+            shutil.rmtree(target, ignore_errors=True)
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def report_current(args):
+    """统计当前仓库"""
+    repo = os.path.abspath(args.repo)
+    print(f"仓库: {repo}")
+    print(f"  提交数: {_git(repo, 'rev-list', '--count', 'HEAD').strip()}")
+    print(f"  打包大小: {pack_size(repo) / 1024 / 1024:.1f} MB")
+    print(f"  完整克隆: {clone_time(repo, args.repeat):.2f} s")
+
+
+def _day_files(base_dir: str, days: int):
+    """
+    按日期列出要提交的数据文件
+
+    Returns:
+        List[Tuple]: (日期, [(仓库内相对路径, 文件路径)])
+    """
+    raw_dir = os.path.join(base_dir, "raw")
+    dates = sorted(name for name in os.listdir(raw_dir) if is_valid_date(name))
+    if days:
+        dates = dates[-days:]
+    result = []
+    for date_str in dates:
+        files = []
+        for root, _, names in os.walk(os.path.join(raw_dir, date_str)):
+            for name in names:
+                if name.endswith(JSON_FILE_SUFFIXES):
+                    path = os.path.join(root, name)
+                    files.append((os.path.relpath(path, base_dir), path))
+        new_apps = os.path.join(base_dir, "new_apps")
+        for suffix in JSON_FILE_SUFFIXES:
+            path = os.path.join(new_apps, f"{date_str}{suffix}")
+            if os.path.exists(path):
+                files.append((os.path.relpath(path, base_dir), path))
+        result.append((date_str, sorted(files)))
+    return result
+
+
+def _changed_lines(before: bytes, after: bytes) -> int:
+    """两个版本之间增加和删除的行数（与 git diff --numstat 的合计相当）"""
+    matcher = difflib.SequenceMatcher(None, before.splitlines(), after.splitlines(), autojunk=False)
+    return sum(
+        max(i2 - i1, 0) + max(j2 - j1, 0)
+        for tag, i1, i2, j1, j2 in matcher.get_opcodes() if tag != "equal"
+    )
+
+
+def _simulate(day_files, canonical: bool, repeat: int) -> dict:
+    """按天把数据提交到临时仓库，统计大小、克隆耗时和相邻日期同一文件的差异行数"""
+    repo = tempfile.mkdtemp(prefix="repo-size-")
+    try:
+        _git(repo, "init", "--quiet")
+        working_bytes = 0
+        changed_lines = 0
+        compared = 0
+        previous = {}
+        for date_str, files in day_files:
+            current = {}
+            for relative_path, path in files:
+                with open(path, 'rb') as f:
+                    raw = f.read()
+                content = encode_json(decode_json(raw), compression_from_path(path), canonical=canonical)
+                target = os.path.join(repo, relative_path)
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                with open(target, 'wb') as f:
+                    f.write(content)
+                working_bytes += len(content)
+
+                # 同一分类（去掉日期的路径）与前一天比较
+                key = os.path.relpath(relative_path, os.path.join("raw", date_str)) \
+                    if relative_path.startswith("raw") else "new_apps"
+                if key in previous and not compression_from_path(path):
+                    changed_lines += _changed_lines(previous[key], content)
+                    compared += 1
+                current[key] = content
+            previous = current
+            _git(repo, "add", "-A")
+            _git(repo, "commit", "--quiet", "-m", date_str)
+
+        _git(repo, "gc", "--quiet")
+        return {
+            "working_bytes": working_bytes,
+            "pack_bytes": pack_size(repo),
+            "clone_seconds": clone_time(repo, repeat),
+            "changed_lines": changed_lines / compared if compared else None
+        }
+    finally:
+        shutil.rmtree(repo, ignore_errors=True)
+
+
+def report_compare(args):
+    """用已有数据模拟按天提交，对比两种布局"""
+    day_files = _day_files(args.base_dir, args.days)
+    if not day_files:
+        print("没有可用的数据")
+        return
+    print(f"按天提交 {len(day_files)} 天（{day_files[0][0]} ~ {day_files[-1][0]}）的数据到临时仓库...\n")
+
+    results = []
+    for label, canonical in (("2 格缩进（当前）", False), ("规范化布局", True)):
+        start = time.perf_counter()
+        results.append((label, _simulate(day_files, canonical, args.repeat)))
+        print(f"  {label}: 完成（{time.perf_counter() - start:.1f} s）")
+
+    print(f"\n{'布局':<14} {'数据文件':>10} {'打包大小':>10} {'完整克隆':>10} {'每个文件每天变化行数':>20}")
+    for label, result in results:
+        changed = f"{result['changed_lines']:.0f}" if result["changed_lines"] is not None else "-"
+        print(
+            f"{label:<14} {result['working_bytes'] / 1024 / 1024:>8.1f} MB {result['pack_bytes'] / 1024 / 1024:>8.1f} MB "
+            f"{result['clone_seconds']:>8.2f} s {changed:>20}"
+        )
+    before, after = results[0][1], results[1][1]
+    if after["pack_bytes"]:
+        print(f"\n打包大小 {before['pack_bytes'] / after['pack_bytes']:.1f}x，"
+              f"克隆耗时 {before['clone_seconds'] / after['clone_seconds']:.1f}x")
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(
+        description="仓库打包大小和克隆耗时",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=__doc__
+    )
+    parser.add_argument("--repeat", type=int, default=3, help="克隆重复次数，取最短耗时（默认 3）")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    current_parser = subparsers.add_parser("current", help="统计当前仓库")
+    current_parser.add_argument("--repo", default=PROJECT_ROOT, help="仓库目录（默认项目根目录）")
+    current_parser.set_defaults(func=report_current)
+
+    compare_parser = subparsers.add_parser("compare", help="对比 2 格缩进和规范化布局按天提交的效果")
+    compare_parser.add_argument("--base-dir", default=DATA_DIR, help="数据根目录（默认 data/）")
+    compare_parser.add_argument("--days", type=int, help="只用最近 N 天")
+    compare_parser.set_defaults(func=report_compare)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -6,11 +6,74 @@
 """
 
 import os
-import json
+import re
 import subprocess
 import threading
 from http.server import HTTPServer, SimpleHTTPRequestHandler
-from urllib.parse import urlparse, parse_qs
+from urllib.parse import urlparse, parse_qs, unquote
+
+from config_simple import APP_STORE_CATEGORIES, GOOGLE_PLAY_CATEGORIES, DATA_DIR, STORAGE_CONFIG
+from utils import json_codec
+from utils.data_storage import (
+    JSON_FILE_SUFFIXES,
+    decompress_json,
+    find_json_file,
+    iter_store_days,
+    open_ranking_store
+)
+from utils.app_history import AppHistoryIndex
+from utils.presence_index import PRESENCE_MODES
+
+# Web 页面请求的分类文件路径：/data/raw/{日期}/{平台}/[{国家}/{榜单类型}/]{分类}.json
+RANKING_FILE_PATTERN = re.compile(
+    r"^/data/raw/(\d{4}-\d{2}-\d{2})/(\w+)/(?:(\w+)/(\w+)/)?(\w+)\.json$"
+)
+
+# 应用历史接口：/api/apps/{app_id}/history
+APP_HISTORY_PATTERN = re.compile(r"^/api/apps/([^/]+)/history$")
+
+# 应用历史索引包含的主商店分类
+HISTORY_CATEGORIES = {"app_store": APP_STORE_CATEGORIES, "google_play": GOOGLE_PLAY_CATEGORIES}
+
+# 榜单存储每个进程只打开一次（SQLite 连接、目录格式的应用目录常驻内存）
+_ranking_store = {"store": None}
+_ranking_store_lock = threading.Lock()
+
+
+def get_ranking_store():
+    """当前进程共用的榜单存储（按 STORAGE_CONFIG 的格式打开）"""
+    with _ranking_store_lock:
+        if _ranking_store["store"] is None:
+            _ranking_store["store"] = open_ranking_store(DATA_DIR, STORAGE_CONFIG.get('format', 'json'))
+        return _ranking_store["store"]
+
+
+# 应用历史索引常驻内存，爬虫写回索引后（index.json 修改时间变化）重新加载
+_app_history = {"index": None, "mtime": None}
+_app_history_lock = threading.Lock()
+
+
+def get_app_history_index() -> AppHistoryIndex:
+    """
+    当前的应用历史索引
+
+    data/history 不提交到仓库，索引不存在或晚于榜单存储的最早日期开始时
+    （如新检出后只有爬虫追加的当天）先从榜单存储重建
+    """
+    history_dir = os.path.join(DATA_DIR, "history")
+    index_path = os.path.join(history_dir, "index.json")
+    mtime = os.path.getmtime(index_path) if os.path.exists(index_path) else None
+    with _app_history_lock:
+        if _app_history["index"] is None or _app_history["mtime"] != mtime:
+            index = AppHistoryIndex(history_dir)
+            store = get_ranking_store()
+            dates = store.list_dates()
+            if dates and not index.covers(min(dates)):
+                print(f"应用历史索引缺失或不完整，从榜单存储重建（{len(dates)} 天）...")
+                index = AppHistoryIndex.rebuild(history_dir, iter_store_days(store, HISTORY_CATEGORIES))
+            _app_history["index"] = index
+            _app_history["mtime"] = os.path.getmtime(index_path) if os.path.exists(index_path) else None
+        return _app_history["index"]
 
 
 class MyHandler(SimpleHTTPRequestHandler):
@@ -78,6 +141,20 @@ class MyHandler(SimpleHTTPRequestHandler):
             self.handle_get_analysis(parsed_path)
             return
 
+        # API: 获取应用的历史排名
+        match = APP_HISTORY_PATTERN.match(parsed_path.path)
+        if match:
+            self.handle_get_app_history(unquote(match.group(1)), parsed_path)
+            return
+
+        # 压缩保存的数据文件（.json.gz / .json.zst），按原 .json 路径解压返回
+        if self.handle_compressed_file(parsed_path):
+            return
+
+        # 非分文件存储格式下，按原路径从榜单存储读取分类数据
+        if self.handle_ranking_file(parsed_path):
+            return
+
         # 默认使用父类处理（静态文件）
         return super().do_GET()
 
@@ -87,7 +164,7 @@ class MyHandler(SimpleHTTPRequestHandler):
             # 读取请求数据
             content_length = int(self.headers['Content-Length'])
             post_data = self.rfile.read(content_length)
-            data = json.loads(post_data.decode('utf-8'))
+            data = json_codec.loads(post_data)
 
             app_id = data.get('app_id')
             platform = data.get('platform')
@@ -196,7 +273,7 @@ class MyHandler(SimpleHTTPRequestHandler):
         try:
             content_length = int(self.headers['Content-Length'])
             post_data = self.rfile.read(content_length)
-            data = json.loads(post_data.decode('utf-8'))
+            data = json_codec.loads(post_data)
 
             date = data.get('date')
             platform = data.get('platform')
@@ -274,15 +351,30 @@ class MyHandler(SimpleHTTPRequestHandler):
         try:
             content_length = int(self.headers['Content-Length'])
             post_data = self.rfile.read(content_length)
-            data = json.loads(post_data.decode('utf-8'))
+            data = json_codec.loads(post_data)
 
             date = data.get('date')
             force = data.get('force', False)
+            # 识别模式：new（默认）或基于上榜位图索引的 first-seen / reentry / streak
+            mode = data.get('mode') or 'new'
+            if mode not in ('new',) + PRESENCE_MODES:
+                self.send_json_response({'error': f'未知的识别模式: {mode}'}, 400)
+                return
+            options = []
+            for name in ('min_absent_days', 'streak_days'):
+                value = data.get(name)
+                if value is None:
+                    continue
+                if not isinstance(value, int) or isinstance(value, bool) or value < 1:
+                    self.send_json_response({'error': f'{name} 必须是正整数'}, 400)
+                    return
+                options.extend([f"--{name.replace('_', '-')}", str(value)])
 
             print(f"\n{'='*60}")
             print(f"📥 收到检测请求:")
             print(f"   Date: {date or '今天'}")
             print(f"   Force: {force}")
+            print(f"   Mode: {mode}")
             print(f"{'='*60}\n")
 
             def run_detect():
@@ -295,6 +387,8 @@ class MyHandler(SimpleHTTPRequestHandler):
                     cmd.extend(['--date', date])
                 if force:
                     cmd.append('--force')
+                if mode != 'new':
+                    cmd.extend(['--mode', mode, *options])
 
                 print(f"🚀 启动检测进程...")
                 print(f"   执行命令: {' '.join(cmd)}")
@@ -341,29 +435,51 @@ class MyHandler(SimpleHTTPRequestHandler):
             print(f"✗ 处理检测请求失败: {e}")
             self.send_json_response({'error': str(e)}, 500)
 
+    def handle_compressed_file(self, parsed_path) -> bool:
+        """
+        /data/ 下的 .json 文件不存在但有压缩后的同名文件时，解压并按原格式返回
+
+        Returns:
+            bool: 是否已处理该请求
+        """
+        if not (parsed_path.path.startswith('/data/') and parsed_path.path.endswith('.json')):
+            return False
+        file_path = self.translate_path(parsed_path.path)
+        if os.path.exists(file_path):
+            return False
+        found_path = find_json_file(file_path)
+        if found_path is None:
+            return False
+        # 只解压不解析，原样返回文件中的 JSON
+        with open(found_path, 'rb') as f:
+            self.send_json_bytes(decompress_json(f.read()))
+        return True
+
+    def handle_ranking_file(self, parsed_path) -> bool:
+        """
+        分类文件不存在时（如快照格式），从榜单存储读取并按原格式返回
+
+        Returns:
+            bool: 是否已处理该请求
+        """
+        match = RANKING_FILE_PATTERN.match(parsed_path.path)
+        if not match:
+            return False
+        if os.path.exists(self.translate_path(parsed_path.path)):
+            return False
+
+        date, platform, country, collection, category = match.groups()
+        data = get_ranking_store().load_category(date, platform, category, country, collection)
+        if not data:
+            return False
+        self.send_json_response(data)
+        return True
+
     def handle_get_dates(self):
         """获取实际存在的日期列表"""
         try:
-            import os
-            from datetime import datetime, timedelta
-            
-            data_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'raw')
-            dates = []
-            
-            if os.path.exists(data_dir):
-                # 遍历 data/raw 目录下的所有日期文件夹
-                for item in os.listdir(data_dir):
-                    item_path = os.path.join(data_dir, item)
-                    if os.path.isdir(item_path):
-                        # 验证是有效的日期格式
-                        try:
-                            datetime.strptime(item, '%Y-%m-%d')
-                            dates.append(item)
-                        except ValueError:
-                            pass
-            
-            # 按日期排序（最新的在前）
-            dates.sort(reverse=True)
+            # 列出榜单存储中有数据的日期（最新的在前）
+            dates = get_ranking_store().list_dates()
             
             self.send_json_response({
                 'dates': dates
@@ -373,6 +489,32 @@ class MyHandler(SimpleHTTPRequestHandler):
             print(f"✗ 获取日期列表失败: {e}")
             self.send_json_response({'error': str(e)}, 500)
 
+    def handle_get_app_history(self, app_id, parsed_path):
+        """获取应用的历史排名（?days=N 只返回最近 N 天，?platform= 只返回指定平台）"""
+        try:
+            query = parse_qs(parsed_path.query)
+            days = query.get('days', [None])[0]
+            platform = query.get('platform', [None])[0]
+            try:
+                days = int(days) if days else None
+            except ValueError:
+                self.send_json_response({'error': 'days 必须是整数'}, 400)
+                return
+
+            history = get_app_history_index().history(app_id, days, platform)
+            if not history:
+                self.send_json_response({'error': f'没有 {app_id} 的上榜记录'}, 404)
+                return
+
+            self.send_json_response({
+                'app_id': app_id,
+                'history': history
+            })
+
+        except Exception as e:
+            print(f"✗ 获取应用历史失败: {e}")
+            self.send_json_response({'error': str(e)}, 500)
+
     def handle_get_new_apps_dates(self):
         """获取实际存在的新上榜产品日期列表"""
         try:
@@ -385,8 +527,8 @@ class MyHandler(SimpleHTTPRequestHandler):
             if os.path.exists(data_dir):
                 for item in os.listdir(data_dir):
                     item_path = os.path.join(data_dir, item)
-                    if os.path.isfile(item_path) and item.endswith('.json'):
-                        date_str = item.replace('.json', '')
+                    if os.path.isfile(item_path) and item.endswith(JSON_FILE_SUFFIXES):
+                        date_str = item.split('.json')[0]
                         try:
                             datetime.strptime(date_str, '%Y-%m-%d')
                             dates.append(date_str)
@@ -436,22 +578,25 @@ class MyHandler(SimpleHTTPRequestHandler):
                 self.send_json_response({'error': '分析结果不存在'}, 404)
                 return
 
-            # 读取并返回分析结果
-            with open(analysis_file, 'r', encoding='utf-8') as f:
-                result = json.load(f)
-
-            self.send_json_response(result)
+            # 原样返回分析结果文件（不解析再序列化）
+            with open(analysis_file, 'rb') as f:
+                self.send_json_bytes(f.read())
 
         except Exception as e:
             self.send_json_response({'error': str(e)}, 500)
 
     def send_json_response(self, data, status=200):
         """发送JSON响应"""
+        self.send_json_bytes(json_codec.dumps(data), status)
+
+    def send_json_bytes(self, body: bytes, status=200):
+        """发送已编码的JSON响应"""
         self.send_response(status)
-        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
         self.send_header('Access-Control-Allow-Origin', '*')
         self.end_headers()
-        self.wfile.write(json.dumps(data, ensure_ascii=False).encode('utf-8'))
+        self.wfile.write(body)
 
     def end_headers(self):
         """添加CORS头"""
@@ -477,7 +622,7 @@ def run_server(port=8000):
     print("  - API接口：")
     print("    POST /api/analyze - 触发AI分析")
     print("    POST /api/scrape - 触发榜单爬取")
-    print("    POST /api/detect - 触发新上榜检测")
+    print("    POST /api/detect - 触发新上榜检测（mode: new / first-seen / reentry / streak）")
     print("    GET  /api/analysis/<app_id> - 获取分析结果")
     print("    GET  /health - 健康检查")
     print("=" * 60)
@@ -499,6 +644,9 @@ def run_server(port=8000):
         httpd.serve_forever()
     except KeyboardInterrupt:
         print("\n服务器已停止")
+    finally:
+        if _ranking_store["store"] is not None:
+            _ranking_store["store"].close()
 
 
 if __name__ == '__main__':
@@ -0,0 +1,8 @@
+"""
+pytest 配置：把项目根目录加入路径（与 scripts/ 下的脚本相同）
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,150 @@
+"""
+已分析产品登记的测试：跨进程追加、墓碑和压缩、压缩后其他实例的增量读取、从 analyzed_apps.json 导入
+"""
+
+import json
+import multiprocessing
+import os
+
+import pytest
+
+from utils import analyzed_registry
+from utils.analyzed_registry import AnalyzedRegistry, open_analyzed_registry
+
+
+def _log_lines(registry):
+    with open(registry.log_path, encoding='utf-8') as f:
+        return f.read().splitlines()
+
+
+def _add_in_process(log_path, app_ids, barrier):
+    """子进程：等待另一个进程就绪后逐个追加（尽量交错写入）"""
+    registry = AnalyzedRegistry(log_path)
+    barrier.wait()
+    for app_id in app_ids:
+        registry.add([app_id], source="worker")
+
+
+@pytest.mark.skipif(not analyzed_registry.FCNTL_AVAILABLE, reason="需要 fcntl 文件锁")
+def test_concurrent_add_from_two_processes(tmp_path):
+    """两个进程同时追加（部分重叠）：不丢失、不重复"""
+    log_path = str(tmp_path / "analyzed_apps.log")
+    first = [f"app.{i}" for i in range(0, 150)]
+    second = [f"app.{i}" for i in range(100, 250)]
+
+    context = multiprocessing.get_context("fork")
+    barrier = context.Barrier(2)
+    workers = [
+        context.Process(target=_add_in_process, args=(log_path, app_ids, barrier))
+        for app_ids in (first, second)
+    ]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join(timeout=60)
+        assert worker.exitcode == 0
+
+    registry = AnalyzedRegistry(log_path)
+    lines = _log_lines(registry)
+    assert registry.app_ids() == set(first) | set(second)
+    assert len(lines) == 250
+    assert len({line.split("\t", 1)[0] for line in lines}) == 250
+
+
+def test_remove_then_compact(tmp_path):
+    """删除写入墓碑；压缩后只剩有效记录，导出的 JSON 与登记一致"""
+    registry = open_analyzed_registry(str(tmp_path))
+    assert registry.add(["a", "b", "c"], source="test") == 3
+    assert registry.add(["b"], source="test") == 0
+    assert registry.remove(["b", "missing"], source="test") == 1
+
+    assert "b" not in registry
+    assert [line.split("\t", 1)[0] for line in _log_lines(registry)] == ["a", "b", "c", "-b"]
+
+    assert registry.compact() == 2
+    lines = _log_lines(registry)
+    assert lines[0].startswith("#compact\t")
+    assert [line.split("\t", 1)[0] for line in lines[1:]] == ["a", "c"]
+    assert registry.app_ids() == {"a", "c"}
+
+    # 删除后可以再次记录
+    assert registry.add(["b"], source="test") == 1
+    with open(registry.export_path, encoding='utf-8') as f:
+        exported = json.load(f)
+    assert exported["analyzed_apps"] == ["a", "c", "b"]
+    assert exported["total_count"] == 3
+
+
+def test_refresh_after_another_instance_compacts(tmp_path):
+    """另一个实例（进程）压缩并替换日志后，已读过旧日志的实例从头重新读取"""
+    log_path = str(tmp_path / "analyzed_apps.log")
+    reader = AnalyzedRegistry(log_path)
+    writer = AnalyzedRegistry(log_path)
+
+    writer.add([f"old.{i}" for i in range(5)], source="test")
+    assert len(reader) == 5
+
+    # 压缩后的日志比 reader 已读的偏移更长：不能只靠文件变短发现替换
+    writer.remove(["old.0", "old.1"], source="test")
+    writer.add([f"new.{i}" for i in range(50)], source="test")
+    writer.compact()
+    assert os.path.getsize(log_path) > reader._offset
+
+    expected = {f"old.{i}" for i in range(2, 5)} | {f"new.{i}" for i in range(50)}
+    assert reader.app_ids() == expected
+
+    # 压缩后继续追加，reader 增量读取
+    writer.add(["after"], source="test")
+    assert "after" in reader
+    assert len(reader) == len(expected) + 1
+
+
+def test_refresh_detects_replacement_with_reused_inode(tmp_path, monkeypatch):
+    """inode 被复用时依靠压缩标记行发现日志已被替换"""
+    log_path = str(tmp_path / "analyzed_apps.log")
+    reader = AnalyzedRegistry(log_path)
+    writer = AnalyzedRegistry(log_path)
+    writer.add(["a", "b"], source="test")
+    writer.compact()
+    assert reader.app_ids() == {"a", "b"}
+
+    writer.remove(["a"], source="test")
+    writer.add([f"x.{i}" for i in range(20)], source="test")
+    writer.compact()
+    # 模拟新文件复用了旧 inode
+    monkeypatch.setattr(reader, "_inode", os.stat(log_path).st_ino)
+    assert reader.app_ids() == {"b"} | {f"x.{i}" for i in range(20)}
+
+
+def test_auto_compact(tmp_path, monkeypatch):
+    """墓碑累积超过阈值时追加后自动压缩"""
+    monkeypatch.setattr(analyzed_registry, "AUTO_COMPACT_SLACK", 10)
+    registry = AnalyzedRegistry(str(tmp_path / "analyzed_apps.log"))
+    for i in range(10):
+        registry.add([f"app.{i}"], source="test")
+        registry.remove([f"app.{i}"], source="test")
+    registry.add(["kept"], source="test")
+
+    lines = _log_lines(registry)
+    assert lines[0].startswith("#compact\t")
+    # 20 条记录和墓碑 + 1 条记录，压缩后不超过 2 × 有效记录数 + 阈值
+    assert len(lines) - 1 <= 2 * 1 + 10
+    assert registry.app_ids() == {"kept"}
+    assert AnalyzedRegistry(registry.log_path).app_ids() == {"kept"}
+
+
+def test_import_from_export_file(tmp_path):
+    """日志不存在时导入原有的 analyzed_apps.json（去重，保持顺序）"""
+    with open(tmp_path / "analyzed_apps.json", 'w', encoding='utf-8') as f:
+        json.dump({"analyzed_apps": ["a", "b", "a", "c"], "last_updated": "2026-01-01 00:00:00"}, f)
+
+    registry = open_analyzed_registry(str(tmp_path))
+    assert registry.app_ids() == {"a", "b", "c"}
+    lines = _log_lines(registry)
+    assert [line.split("\t") for line in lines] == [
+        [app_id, "import", "2026-01-01 00:00:00"] for app_id in ("a", "b", "c")
+    ]
+
+    # 只导入一次
+    registry.add(["d"], source="test")
+    assert len(_log_lines(open_analyzed_registry(str(tmp_path)))) == 4
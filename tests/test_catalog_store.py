@@ -0,0 +1,44 @@
+"""
+目录格式的测试：写入后读回的数据与原数据相同（包括值为 None 的字段和各应用字段不同的情况）
+"""
+
+from utils.catalog_store import CatalogRankingStore
+
+
+def _round_trip(tmp_path, days):
+    store = CatalogRankingStore(str(tmp_path))
+    for date_str, data in days.items():
+        store.save_category(date_str, "google_play", "SOCIAL", data)
+    assert store.flush()
+    reopened = CatalogRankingStore(str(tmp_path))
+    return {date_str: reopened.load_category(date_str, "google_play", "SOCIAL") for date_str in days}
+
+
+def test_none_row_fields_round_trip(tmp_path):
+    """详情查询失败的应用（rating / rating_count 为 None）读回后字段仍在"""
+    data = {
+        "category": "社交",
+        "apps": [
+            {"app_id": "a", "rank": 1, "name": "A", "rating": None, "rating_count": None, "timestamp": "t"},
+            {"app_id": "b", "rank": 2, "name": "B", "rating": 4.5, "rating_count": 10, "installs": 1000,
+             "timestamp": "t"},
+            {"app_id": "c", "rank": 3, "name": "C", "timestamp": "t"},
+        ]
+    }
+    assert _round_trip(tmp_path, {"2026-01-01": data}) == {"2026-01-01": data}
+
+
+def test_metadata_none_and_removed_fields_round_trip(tmp_path):
+    """元数据字段变为 None 与字段被删除读回后可以区分"""
+    def day(**extra):
+        app = {"app_id": "a", "rank": 1, "name": "A", "rating": 4.0, "rating_count": 1, "timestamp": "t"}
+        app.update(extra)
+        return {"apps": [{key: value for key, value in app.items() if value != "<removed>"}]}
+
+    days = {
+        "2026-01-01": day(release_date="2026/01/01", developer="D"),
+        "2026-01-02": day(release_date=None, developer="D"),
+        "2026-01-03": day(release_date="<removed>", developer="D"),
+        "2026-01-04": day(release_date="2026/01/04", developer="<removed>"),
+    }
+    assert _round_trip(tmp_path, days) == days
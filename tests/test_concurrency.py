@@ -0,0 +1,118 @@
+"""
+工作队列调度器的测试：每主机并发上限、优先级顺序、满载主机不阻塞其他主机，以及单个分类失败时其他分类照常保存
+"""
+
+import threading
+import time
+
+import pytest
+
+from config_simple import APP_STORE_CATEGORIES, SCRAPER_CONFIG
+from utils.concurrency import CategoryTask, WorkScheduler
+from utils.data_storage import open_ranking_store
+
+
+def test_per_host_limits():
+    """同一主机同时执行的任务数不超过其并发上限"""
+    lock = threading.Lock()
+    active = {}
+    peak = {}
+
+    def work(host):
+        with lock:
+            active[host] = active.get(host, 0) + 1
+            peak[host] = max(peak.get(host, 0), active[host])
+        time.sleep(0.02)
+        with lock:
+            active[host] -= 1
+        return 1
+
+    tasks = [
+        CategoryTask(f"{host}-{index}", host, lambda host=host: work(host))
+        for index in range(6) for host in ("a.example", "b.example")
+    ]
+    WorkScheduler(max_workers=4, host_limits={"a.example": 1, "b.example": 2}).run(tasks)
+
+    assert peak["a.example"] == 1
+    assert peak["b.example"] <= 2
+    assert all(task.app_count == 1 for task in tasks)
+
+
+def test_priority_order_is_stable():
+    """单线程时按优先级从小到大执行，同优先级保持原有顺序"""
+    order = []
+    priorities = [("c", 2), ("a1", 0), ("b", 1), ("a2", 0), ("d", 3)]
+    tasks = [
+        CategoryTask(label, "host", lambda label=label: order.append(label), priority=priority)
+        for label, priority in priorities
+    ]
+    WorkScheduler(max_workers=1).run(tasks)
+
+    assert order == ["a1", "a2", "b", "c", "d"]
+
+
+def test_busy_host_does_not_block_other_hosts():
+    """高优先级主机满载时，低优先级的其他主机任务照常执行"""
+    other_started = threading.Event()
+
+    def slow():
+        # 等待另一个主机的任务开始；若调度器被满载主机阻塞，这里会超时
+        assert other_started.wait(timeout=5)
+        return 1
+
+    def other():
+        other_started.set()
+        return 1
+
+    tasks = [
+        CategoryTask("slow-1", "busy", slow, priority=0),
+        CategoryTask("slow-2", "busy", lambda: 1, priority=0),
+        CategoryTask("other", "idle", other, priority=5),
+    ]
+    WorkScheduler(max_workers=2, host_limits={"busy": 1}).run(tasks)
+
+    assert [task.error for task in tasks] == [None, None, None]
+    assert [task.app_count for task in tasks] == [1, 1, 1]
+
+
+def test_task_exception_is_recorded():
+    """任务抛出异常时记录在 task.error，其余任务照常执行"""
+    def fail():
+        raise RuntimeError("boom")
+
+    tasks = [CategoryTask("fail", "host", fail), CategoryTask("ok", "host", lambda: 3)]
+    WorkScheduler(max_workers=2, default_host_limit=2).run(tasks)
+
+    assert isinstance(tasks[0].error, RuntimeError)
+    assert tasks[0].app_count == 0
+    assert tasks[1].error is None and tasks[1].app_count == 3
+
+
+@pytest.mark.parametrize("mode", ["thread", "sequential"])
+def test_failed_category_does_not_block_saving_others(tmp_path, monkeypatch, mode):
+    """一个分类爬取失败时，其他分类照常按分类保存"""
+    from modules.scraper import RankingMonitorScraper
+
+    monkeypatch.setitem(SCRAPER_CONFIG, "matrix", {})
+    monkeypatch.setitem(SCRAPER_CONFIG["app_store"], "streaming", False)
+
+    scraper = RankingMonitorScraper(date_str="2026-01-05", mode=mode, storage_format="json")
+    scraper.store = open_ranking_store(str(tmp_path), "json")
+    scraper.rank_cube = scraper.app_history = scraper.presence_index = None
+
+    def scrape_category(genre_id, category_name, enrich=True, country=None, collection=None):
+        if category_name == APP_STORE_CATEGORIES["social"]["name_cn"]:
+            raise RuntimeError("HTTP 503")
+        return [{"app_id": f"{genre_id}-{rank}", "rank": rank, "platform": "App Store"} for rank in (1, 2)]
+
+    monkeypatch.setattr(scraper.app_store_scraper, "scrape_category", scrape_category)
+    monkeypatch.setattr(scraper.app_store_scraper, "enrich_app_details", lambda apps, country=None: 0)
+    try:
+        scraper.scrape_app_store(["health_fitness", "social", "lifestyle"])
+    finally:
+        scraper.close()
+
+    store = open_ranking_store(str(tmp_path), "json")
+    assert len(store.load_category("2026-01-05", "app_store", "health_fitness")["apps"]) == 2
+    assert len(store.load_category("2026-01-05", "app_store", "lifestyle")["apps"]) == 2
+    assert not store.exists("2026-01-05", "app_store", "social")
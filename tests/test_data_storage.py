@@ -0,0 +1,202 @@
+"""
+榜单存储的往返测试：各存储格式、合并快照、压缩、内容未变化时跳过写入、规范化布局和按月归档
+"""
+
+import os
+
+import pytest
+
+from utils.data_storage import (
+    RANKING_STORES, ZSTD_AVAILABLE, SnapshotReader, SnapshotWriter, archive_key, canonical_json,
+    compress_bytes, decode_json, encode_json, get_archive_path, get_data_file_path, load_from_json,
+    load_snapshot, open_ranking_store, save_json_if_changed, save_snapshot, snapshot_key, write_archive
+)
+
+
+COMPRESSIONS = [None, "gzip"] + (["zstd"] if ZSTD_AVAILABLE else [])
+
+
+def _category(date_str, platform, category, *app_ids, timestamp="2026-01-05T08:00:00"):
+    apps = [
+        {"app_id": app_id, "name": f"App {app_id}", "rank": rank, "rating": 4.5 if rank % 2 else None,
+         "rating_count": rank * 100, "platform": platform, "category": category, "timestamp": timestamp}
+        for rank, app_id in enumerate(app_ids, 1)
+    ]
+    return {"date": date_str, "platform": platform, "category": category, "total_apps": len(apps), "apps": apps}
+
+
+@pytest.mark.parametrize("storage_format", list(RANKING_STORES))
+def test_ranking_store_round_trip(tmp_path, storage_format):
+    """保存、落盘、重新打开后读取到与保存时相同的数据"""
+    saved = {
+        ("2026-01-05", "app_store", "games", None, None): _category("2026-01-05", "app_store", "games", "a", "b"),
+        ("2026-01-05", "google_play", "social", None, None): _category("2026-01-05", "google_play", "social", "x"),
+        ("2026-01-05", "app_store", "games", "jp", "TOP_PAID"): _category("2026-01-05", "app_store", "games", "j"),
+        ("2026-01-06", "app_store", "games", None, None): _category("2026-01-06", "app_store", "games", "b", "c"),
+    }
+    with open_ranking_store(str(tmp_path), storage_format) as store:
+        for (date_str, platform, category, country, collection), data in saved.items():
+            assert store.save_category(date_str, platform, category, data, country, collection)
+        # 落盘前也能读到缓冲中的数据
+        assert store.load_category("2026-01-06", "app_store", "games") == saved[
+            ("2026-01-06", "app_store", "games", None, None)]
+
+    store = open_ranking_store(str(tmp_path), storage_format)
+    try:
+        for (date_str, platform, category, country, collection), data in saved.items():
+            assert store.load_category(date_str, platform, category, country, collection) == data
+        assert store.list_dates() == ["2026-01-06", "2026-01-05"]
+        assert store.exists("2026-01-05", "google_play", "social")
+        assert not store.exists("2026-01-06", "google_play", "social")
+        assert store.load_category("2026-01-07", "app_store", "games") == {}
+    finally:
+        store.close()
+
+
+@pytest.mark.parametrize("storage_format", list(RANKING_STORES))
+def test_ranking_store_overwrite_same_day(tmp_path, storage_format):
+    """同一天同一分类重复保存时以最后一次为准，其他分类不受影响"""
+    with open_ranking_store(str(tmp_path), storage_format) as store:
+        store.save_category("2026-01-05", "app_store", "games", _category("2026-01-05", "app_store", "games", "a"))
+        store.save_category("2026-01-05", "app_store", "social", _category("2026-01-05", "app_store", "social", "s"))
+    updated = _category("2026-01-05", "app_store", "games", "b", "a")
+    with open_ranking_store(str(tmp_path), storage_format) as store:
+        store.save_category("2026-01-05", "app_store", "games", updated)
+
+    store = open_ranking_store(str(tmp_path), storage_format)
+    try:
+        assert store.load_category("2026-01-05", "app_store", "games") == updated
+        assert store.load_category("2026-01-05", "app_store", "social")["apps"][0]["app_id"] == "s"
+    finally:
+        store.close()
+
+
+def test_snapshot_writer_reader_round_trip(tmp_path):
+    """快照按分区写入，读取时只按偏移读出单个分区，合并保存时保留未覆盖的分区"""
+    path = str(tmp_path / "raw" / "2026-01-05.snapshot.jsonl")
+    games = _category("2026-01-05", "app_store", "games", "a", "b")
+    social = _category("2026-01-05", "app_store", "social", "s")
+    with SnapshotWriter(path, "2026-01-05") as writer:
+        writer.add(snapshot_key("app_store", "games"), games)
+        writer.add(snapshot_key("app_store", "social"), social)
+
+    with SnapshotReader(path) as reader:
+        assert reader.date == "2026-01-05"
+        assert sorted(reader.keys()) == ["app_store/games", "app_store/social"]
+        assert reader.read("app_store/social") == social
+        assert reader.read("app_store/games") == games
+        assert reader.read("app_store/missing") == {}
+
+    updated = _category("2026-01-05", "app_store", "games", "c")
+    assert save_snapshot({"app_store/games": updated}, path)
+    assert load_snapshot(path) == {"app_store/games": updated, "app_store/social": social}
+    assert load_snapshot(path, "app_store/social") == social
+
+
+def test_snapshot_reader_rejects_other_files(tmp_path):
+    """不是快照的文件无法打开"""
+    path = tmp_path / "other.jsonl"
+    path.write_bytes(b'{"format": "other"}\n')
+    with pytest.raises(ValueError):
+        SnapshotReader(str(path))
+
+
+@pytest.mark.parametrize("compression", COMPRESSIONS)
+@pytest.mark.parametrize("canonical", [False, True])
+def test_encode_decode_round_trip(compression, canonical):
+    """各压缩格式和规范化布局编码后按文件头解码回相同的数据（规范化布局去掉抓取时间）"""
+    data = _category("2026-01-05", "app_store", "games", "a", "b")
+    decoded = decode_json(encode_json(data, compression, canonical=canonical))
+    if canonical:
+        data = {**data, "apps": [{k: v for k, v in app.items() if k != "timestamp"} for app in data["apps"]]}
+    assert decoded == data
+
+
+@pytest.mark.parametrize("compression", [c for c in COMPRESSIONS if c])
+def test_compression_is_deterministic(compression):
+    """相同内容压缩结果相同（重写不产生 Git 差异）"""
+    payload = canonical_json(_category("2026-01-05", "app_store", "games", "a", "b"))
+    assert compress_bytes(payload, compression) == compress_bytes(payload, compression)
+
+
+def test_canonical_json_layout():
+    """规范化布局：键排序、每个应用一行、与原始键顺序无关"""
+    data = _category("2026-01-05", "app_store", "games", "a", "b")
+    raw = canonical_json(data)
+    lines = raw.decode().splitlines()
+    assert lines[0] == "{" and lines[-1] == "}"
+    assert sum(1 for line in lines if line.startswith('{"app_id"')) == 2
+    assert b"timestamp" not in raw
+    assert canonical_json(dict(reversed(list(data.items())))) == raw
+
+
+@pytest.mark.parametrize("compression", COMPRESSIONS)
+def test_save_json_if_changed(tmp_path, compression):
+    """只有抓取时间不同时跳过写入，内容变化时重写，切换压缩格式时删除旧文件"""
+    path = get_data_file_path("2026-01-05", "app_store", "games", str(tmp_path))
+    data = _category("2026-01-05", "app_store", "games", "a", "b")
+
+    assert save_json_if_changed(data, path, compression, canonical=True) > 0
+    same = _category("2026-01-05", "app_store", "games", "a", "b", timestamp="2026-01-05T09:00:00")
+    assert save_json_if_changed(same, path, compression, canonical=True) == 0
+    changed = _category("2026-01-05", "app_store", "games", "b", "a")
+    assert save_json_if_changed(changed, path, compression, canonical=True) > 0
+    assert load_from_json(path)["apps"][0]["app_id"] == "b"
+
+    other = None if compression else "gzip"
+    assert save_json_if_changed(changed, path, other) > 0
+    assert sorted(os.listdir(os.path.dirname(path))) == [os.path.basename(path) + (".gz" if other else "")]
+    assert load_from_json(path)["apps"][0]["app_id"] == "b"
+
+
+@pytest.mark.parametrize("compression", [c for c in COMPRESSIONS if c])
+def test_monthly_archive_round_trip(tmp_path, compression):
+    """归档中的分类按条目单独解压读取，分文件存储在没有分文件时回退读取归档"""
+    days = {
+        "2026-01-05": _category("2026-01-05", "app_store", "games", "a"),
+        "2026-01-06": _category("2026-01-06", "app_store", "games", "b"),
+    }
+    entries = {
+        archive_key(date_str, snapshot_key("app_store", "games")): compress_bytes(encode_json(data), compression)
+        for date_str, data in days.items()
+    }
+    assert write_archive(get_archive_path("2026-01", str(tmp_path)), "2026-01", entries)
+
+    store = open_ranking_store(str(tmp_path), "json")
+    assert store.list_dates() == ["2026-01-06", "2026-01-05"]
+    for date_str, data in days.items():
+        assert store.exists(date_str, "app_store", "games")
+        assert store.load_category(date_str, "app_store", "games") == data
+    assert not store.exists("2026-01-05", "app_store", "social")
+
+    # 分文件优先于归档
+    newer = _category("2026-01-05", "app_store", "games", "c")
+    assert store.save_category("2026-01-05", "app_store", "games", newer)
+    assert store.load_category("2026-01-05", "app_store", "games") == newer
+
+
+def test_object_store_flush_keeps_failed_sections(tmp_path, monkeypatch):
+    """部分对象写入失败时其他分类照常保存，失败的分类留在缓冲区，下次 flush 重试"""
+    from utils.object_store import ObjectRankingStore
+
+    store = open_ranking_store(str(tmp_path), "objects")
+    games = _category("2026-01-05", "app_store", "games", "a")
+    social = _category("2026-01-05", "app_store", "social", "s")
+    store.save_category("2026-01-05", "app_store", "games", games)
+    store.save_category("2026-01-05", "app_store", "social", social)
+
+    save_object = ObjectRankingStore._save_object
+
+    def failing_save_object(self, content):
+        return None if content["category"] == "games" else save_object(self, content)
+
+    monkeypatch.setattr(ObjectRankingStore, "_save_object", failing_save_object)
+    assert not store.flush()
+    assert open_ranking_store(str(tmp_path), "objects").load_category("2026-01-05", "app_store", "social") == social
+    assert store.load_category("2026-01-05", "app_store", "games") == games
+
+    monkeypatch.setattr(ObjectRankingStore, "_save_object", save_object)
+    assert store.flush()
+    reopened = open_ranking_store(str(tmp_path), "objects")
+    assert reopened.load_category("2026-01-05", "app_store", "games") == games
+    assert reopened.load_category("2026-01-05", "app_store", "social") == social
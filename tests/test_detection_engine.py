@@ -0,0 +1,71 @@
+"""
+新上榜识别引擎的测试：差集按当天排名顺序、没有数据的分区、每个日期只加载一次
+"""
+
+from utils.detection_engine import DetectionEngine
+
+
+class FakeStore:
+    """按 (日期, 平台, 分类) 返回固定榜单，并记录读取次数"""
+
+    def __init__(self, days):
+        self.days = days
+        self.reads = 0
+
+    def load_category(self, date_str, platform, category):
+        self.reads += 1
+        apps = self.days.get(date_str, {}).get((platform, category))
+        return {"apps": apps} if apps else {}
+
+
+def _apps(*app_ids):
+    return [{"app_id": app_id, "rank": rank} for rank, app_id in enumerate(app_ids, start=1)]
+
+
+CATEGORIES = {"app_store": ["games", "social"], "google_play": ["SOCIAL"]}
+
+DAYS = {
+    "2026-01-01": {
+        ("app_store", "games"): _apps("a", "b"),
+        ("app_store", "social"): _apps("x"),
+    },
+    "2026-01-02": {
+        ("app_store", "games"): _apps("c", "a", "d"),
+        ("app_store", "social"): _apps("x"),
+        ("google_play", "SOCIAL"): _apps("g"),
+    },
+}
+
+
+def test_new_entries():
+    """当天在榜、对比日期不在同一分区的应用，按当天排名顺序；任一天没有数据的分区为 None"""
+    with DetectionEngine(FakeStore(DAYS), CATEGORIES, read_workers=1) as engine:
+        result = engine.new_entries("2026-01-02", "2026-01-01")
+    assert [app["app_id"] for app in result[("app_store", "games")]] == ["c", "d"]
+    assert result[("app_store", "social")] == []
+    assert result[("google_play", "SOCIAL")] is None
+
+
+def test_each_day_loaded_once():
+    """多个对比日期、多次识别共用缓存，每个日期只读取一次"""
+    store = FakeStore(DAYS)
+    with DetectionEngine(store, CATEGORIES, read_workers=4) as engine:
+        parallel = engine.detect("2026-01-02", ["2026-01-01", "2026-01-01"])
+        engine.new_entries("2026-01-01", "2026-01-02")
+        assert engine.stats == {"loads": 2, "hits": 4}
+    assert store.reads == 2 * sum(len(categories) for categories in CATEGORIES.values())
+
+    with DetectionEngine(FakeStore(DAYS), CATEGORIES, read_workers=1) as engine:
+        assert engine.detect("2026-01-02", ["2026-01-01"])["2026-01-01"] == parallel["2026-01-01"]
+
+
+def test_cache_eviction():
+    """超出缓存天数后淘汰最久未使用的日期"""
+    days = {f"2026-01-0{day}": {("app_store", "games"): _apps(str(day))} for day in range(1, 5)}
+    store = FakeStore(days)
+    with DetectionEngine(store, {"app_store": ["games"]}, read_workers=1, cache_days=2) as engine:
+        for date_str in ("2026-01-01", "2026-01-02", "2026-01-03", "2026-01-01"):
+            engine.load(date_str)
+        assert engine.stats == {"loads": 4, "hits": 0}
+        engine.load("2026-01-01")
+        assert engine.stats["hits"] == 1
@@ -0,0 +1,147 @@
+"""
+新上榜识别主程序的测试：排名变化（排名阈值、评价数增长率的 z 分数）、多进程回填与顺序回填结果一致
+"""
+
+import os
+
+import pytest
+
+from utils.rank_cube import NUMPY_AVAILABLE
+
+
+numpy_required = pytest.mark.skipif(not NUMPY_AVAILABLE, reason="numpy 未安装")
+
+
+def _ranked(*entries):
+    """(app_id, rating_count) -> 按顺序排名的应用列表"""
+    return [
+        {"app_id": app_id, "rank": rank, "rating_count": rating_count}
+        for rank, (app_id, rating_count) in enumerate(entries, 1)
+    ]
+
+
+@numpy_required
+def test_rank_movers_threshold():
+    """排名变化至少为榜单长度的 min_rank_jump_ratio（恰好等于阈值时计入），对比日期不在榜的应用不参与"""
+    from modules.detector import find_rank_movers
+
+    today = [{"app_id": f"app{rank}", "rank": rank} for rank in range(1, 11)]
+    before_ranks = {"app1": 4, "app2": 3, "app3": 1, "app4": 9, "app5": 5, "app6": 8, "app9": 2}
+    before = [{"app_id": app_id, "rank": rank} for app_id, rank in before_ranks.items()]
+
+    # 10 个应用 × 0.2 = 至少变化 2 名
+    result = find_rank_movers(today, before, days=1, min_rank_jump_ratio=0.2, z_threshold=3.0, min_rating_count=20)
+    assert [(app["app_id"], app["rank_change"]) for app in result["climbers"]] == [
+        ("app4", 5), ("app1", 3), ("app6", 2)
+    ]
+    assert [(app["app_id"], app["previous_rank"], app["rank_change"]) for app in result["fallers"]] == [
+        ("app9", 2, -7), ("app3", 1, -2)
+    ]
+    assert result["breakouts"] == []
+
+    # 阈值至少为 1 名：只上升 1 名的 app2 也计入，排名不变的 app5 不计入
+    result = find_rank_movers(today, before, days=1, min_rank_jump_ratio=0.01, z_threshold=3.0, min_rating_count=20)
+    assert {app["app_id"] for app in result["climbers"]} == {"app1", "app2", "app4", "app6"}
+    assert {app["app_id"] for app in result["fallers"]} == {"app3", "app9"}
+
+
+@numpy_required
+def test_rank_movers_breakouts():
+    """评价数日增长率的 z 分数不低于阈值的应用为 breakouts；评价数过少的应用不参与计算"""
+    from modules.detector import find_rank_movers
+
+    before = _ranked(("a", 100), ("b", 100), ("c", 100), ("d", 100), ("e", 100), ("tiny", 5))
+    # a~d 两天增加 2（增长率 0.01/天），e 两天增加 202（1.01/天）；tiny 增长更快但评价数少于 20
+    today = _ranked(("a", 102), ("b", 102), ("c", 102), ("d", 102), ("e", 302), ("tiny", 500))
+
+    # 有效增长率 [0.01] * 4 + [1.01]：均值 0.21，标准差 0.4，e 的 z 分数为 2.0
+    result = find_rank_movers(today, before, days=2, min_rank_jump_ratio=0.2, z_threshold=1.5, min_rating_count=20)
+    assert [app["app_id"] for app in result["breakouts"]] == ["e"]
+    breakout = result["breakouts"][0]
+    assert breakout["previous_rating_count"] == 100
+    assert breakout["rating_velocity"] == 101.0
+    assert breakout["rating_growth"] == pytest.approx(1.01)
+    assert breakout["z_score"] == pytest.approx(2.0)
+
+    result = find_rank_movers(today, before, days=2, min_rank_jump_ratio=0.2, z_threshold=2.5, min_rating_count=20)
+    assert result["breakouts"] == []
+
+
+@numpy_required
+def test_rank_movers_needs_three_samples():
+    """有效样本少于 3 个或增长率都相同时不计算 z 分数"""
+    from modules.detector import find_rank_movers
+
+    before = _ranked(("a", 100), ("b", 100), ("c", 5))
+    today = _ranked(("a", 101), ("b", 500), ("c", 50))
+    result = find_rank_movers(today, before, days=1, min_rank_jump_ratio=0.2, z_threshold=0.1, min_rating_count=20)
+    assert result["breakouts"] == []
+
+    before = _ranked(("a", 100), ("b", 100), ("c", 100))
+    today = _ranked(("a", 110), ("b", 110), ("c", 110))
+    result = find_rank_movers(today, before, days=1, min_rank_jump_ratio=0.2, z_threshold=0.1, min_rating_count=20)
+    assert result["breakouts"] == []
+
+    assert find_rank_movers([], before, 1, 0.2, 3.0, 20) == {"climbers": [], "fallers": [], "breakouts": []}
+
+
+def _write_days(data_dir, days):
+    """days: 日期 -> {(平台, 分类): [app_id, ...]}，写入分文件存储"""
+    from utils.data_storage import open_ranking_store
+
+    with open_ranking_store(str(data_dir), "json") as store:
+        for date_str, sections in days.items():
+            for (platform, category), app_ids in sections.items():
+                apps = [
+                    {"app_id": app_id, "name": f"App {app_id}", "rank": rank, "rating_count": 100 * rank}
+                    for rank, app_id in enumerate(app_ids, 1)
+                ]
+                store.save_category(date_str, platform, category,
+                                    {"date": date_str, "platform": platform, "category": category, "apps": apps})
+
+
+def _backfill_outputs(data_dir, monkeypatch, workers):
+    """在 data_dir 上回填 2026-01-02 ~ 2026-01-03，返回识别结果（去掉生成时间）和排名变化文件"""
+    from modules import detector
+
+    monkeypatch.setattr(detector, "DATA_DIR", str(data_dir))
+    results = detector.NewAppDetector(storage_format="json").backfill("2026-01-02", "2026-01-03", workers=workers)
+    new_apps = {
+        date_str: {key: value for key, value in detector.load_from_json(
+            os.path.join(str(data_dir), "new_apps", f"{date_str}.json")).items() if key != "generated_at"}
+        for date_str in detector.NewAppDetector.result_dates()
+    }
+    movers_dir = os.path.join(str(data_dir), "movers")
+    movers = {
+        name: detector.load_from_json(os.path.join(movers_dir, name))
+        for name in sorted(os.listdir(movers_dir))
+    } if os.path.isdir(movers_dir) else {}
+    return [result["date"] for result in results], new_apps, movers
+
+
+def test_parallel_backfill_matches_sequential(tmp_path, monkeypatch):
+    """两天的回填用 2 个进程（每个进程一天）与顺序执行的结果文件相同，跨天去重在主进程中按日期顺序进行"""
+    days = {
+        "2026-01-01": {("app_store", "health_fitness"): ["a", "b"], ("app_store", "social"): ["s1"],
+                       ("google_play", "social"): ["g1"]},
+        # c 在健康健身首次上榜；g2 在 Google Play 上榜
+        "2026-01-02": {("app_store", "health_fitness"): ["a", "c"], ("app_store", "social"): ["s1"],
+                       ("google_play", "social"): ["g1", "g2"]},
+        # c 又出现在社交分类（前一天已报告，不再报告）；d 首次上榜；a 掉出后 b 回到榜单
+        "2026-01-03": {("app_store", "health_fitness"): ["d", "c", "b"], ("app_store", "social"): ["c", "s1"],
+                       ("google_play", "social"): ["g2", "g1", "g3"]},
+    }
+    outputs = []
+    for workers in (1, 2):
+        data_dir = tmp_path / f"workers-{workers}"
+        _write_days(data_dir, days)
+        outputs.append(_backfill_outputs(data_dir, monkeypatch, workers))
+
+    sequential, parallel = outputs
+    assert sequential[0] == ["2026-01-02", "2026-01-03"]
+    assert parallel == sequential
+    reported = {
+        date_str: [app["app_id"] for app in result["new_apps"]] for date_str, result in sequential[1].items()
+    }
+    assert "c" in reported["2026-01-02"] and "c" not in reported["2026-01-03"]
+    assert "d" in reported["2026-01-03"]
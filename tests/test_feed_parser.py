@@ -0,0 +1,54 @@
+"""
+RSS feed 流式解析的测试：ijson 和内置增量解析两种实现，entry 缺失、为空、单个对象和数组时结果与整体解析一致
+"""
+
+import io
+import json
+
+import pytest
+
+from scrapers import feed_parser
+from scrapers.feed_parser import IJSON_AVAILABLE, iter_feed_entries
+
+
+def _entry(index):
+    return {
+        "im:name": {"label": f"App {index} — 游戏"},
+        "id": {"label": f"https://apps.apple.com/app/id{index}", "attributes": {"im:id": str(index)}},
+        "category": {"attributes": {"label": "Games"}},
+    }
+
+
+def _feed(entry):
+    feed = {"author": {"name": {"label": "iTunes Store"}}, "title": {"label": "Top Free"}}
+    if entry is not None:
+        feed["entry"] = entry
+    feed["updated"] = {"label": "2026-01-05T00:00:00-07:00"}
+    return json.dumps({"feed": feed}, ensure_ascii=False).encode("utf-8")
+
+
+FEEDS = {
+    "missing": (_feed(None), []),
+    "empty": (_feed([]), []),
+    "single": (_feed(_entry(1)), [_entry(1)]),
+    "one-item": (_feed([_entry(1)]), [_entry(1)]),
+    "many": (_feed([_entry(index) for index in range(5)]), [_entry(index) for index in range(5)]),
+}
+
+
+@pytest.fixture(params=["ijson", "stdlib"])
+def backend(request, monkeypatch):
+    if request.param == "ijson":
+        if not IJSON_AVAILABLE:
+            pytest.skip("ijson 未安装")
+    else:
+        monkeypatch.setattr(feed_parser, "IJSON_AVAILABLE", False)
+    return request.param
+
+
+@pytest.mark.parametrize("name", list(FEEDS))
+@pytest.mark.parametrize("chunk_size", [7, feed_parser.CHUNK_SIZE])
+def test_iter_feed_entries(backend, name, chunk_size):
+    """逐条解析的结果与整体解析相同（小分块时键名和多字节字符跨分块）"""
+    raw, expected = FEEDS[name]
+    assert list(iter_feed_entries(io.BytesIO(raw), chunk_size=chunk_size)) == expected
@@ -0,0 +1,38 @@
+"""
+Google Play 详情查询的测试：详情使用单独的限流和熔断键，被限流或熔断时不影响分类爬取
+"""
+
+import pytest
+
+from config_simple import SCRAPER_CONFIG
+from scrapers import google_play_scraper
+from scrapers.google_play_scraper import GOOGLE_PLAY_AVAILABLE, GooglePlayScraper
+from utils.rate_limiter import HostRateLimiter
+from utils.retry import CircuitBreaker, RetryPolicy
+
+pytestmark = pytest.mark.skipif(not GOOGLE_PLAY_AVAILABLE, reason="google-play-scraper 未安装")
+
+
+def test_details_use_their_own_limiter_and_breaker(monkeypatch):
+    """详情查询被限流时只降低详情令牌桶的速率、只熔断详情键"""
+    limiter = HostRateLimiter(SCRAPER_CONFIG["rate_limit"])
+    breaker = CircuitBreaker(failure_threshold=2)
+    scraper = GooglePlayScraper(rate_limiter=limiter, retry_policy=RetryPolicy(retry_times=1, base_delay=0),
+                                circuit_breaker=breaker)
+
+    calls = []
+
+    def throttled_app(app_id, lang=None, country=None):
+        calls.append(app_id)
+        raise Exception("App not found. Status code 429 returned.")
+
+    monkeypatch.setattr(google_play_scraper, "app", throttled_app)
+    stats = scraper.enrich_app_details([{"app_id": "com.example.a"}], "us")
+
+    assert stats["failed"] == 1 and calls == ["com.example.a", "com.example.a"]
+    host_config = SCRAPER_CONFIG["rate_limit"]["play.google.com"]
+    details_config = SCRAPER_CONFIG["rate_limit"][scraper.details_key]
+    assert limiter.bucket("play.google.com").rate == host_config["rate"]
+    assert limiter.bucket(scraper.details_key).rate < details_config["rate"]
+    assert breaker.is_open(scraper.details_key)
+    assert not breaker.is_open("play.google.com")
@@ -0,0 +1,93 @@
+"""
+上榜位图索引的测试：插入更早日期时的位移、重复写入、三种识别模式和历史数据检查
+"""
+
+from utils.presence_index import PresenceIndex
+
+
+def _apps(*app_ids):
+    return [{"app_id": app_id} for app_id in app_ids]
+
+
+def test_add_category_before_start_shifts_bitmaps(tmp_path):
+    """写入早于起始日期的数据时，已有位图整体左移，原有日期的查询结果不变"""
+    index = PresenceIndex(str(tmp_path / "presence"))
+    index.add_category("2026-01-05", "app_store", "games", _apps("a", "b"))
+    index.add_category("2026-01-06", "app_store", "games", _apps("a"))
+    index.add_category("2026-01-02", "app_store", "games", _apps("b", "c"))
+
+    assert index.presence("a") == {"app_store/games": ["2026-01-05", "2026-01-06"]}
+    assert index.presence("b") == {"app_store/games": ["2026-01-02", "2026-01-05"]}
+    assert index.presence("c") == {"app_store/games": ["2026-01-02"]}
+    assert index.observed_on("2026-01-02", "app_store", "games")
+    assert not index.observed_on("2026-01-03", "app_store", "games")
+
+    # 保存后重新加载结果相同，且与按日期顺序重建的索引一致
+    assert index.save()
+    reloaded = PresenceIndex(str(tmp_path / "presence"))
+    rebuilt = PresenceIndex.build(str(tmp_path / "rebuilt"), [
+        ("2026-01-02", {("app_store", "games"): _apps("b", "c")}),
+        ("2026-01-05", {("app_store", "games"): _apps("a", "b")}),
+        ("2026-01-06", {("app_store", "games"): _apps("a")}),
+    ])
+    for app_id in ("a", "b", "c"):
+        assert reloaded.presence(app_id) == rebuilt.presence(app_id) == index.presence(app_id)
+    assert reloaded.observed == rebuilt.observed
+
+
+def test_add_category_overwrites_same_day(tmp_path):
+    """同一天同一分类重复写入时以最后一次为准"""
+    index = PresenceIndex(str(tmp_path / "presence"))
+    index.add_category("2026-01-01", "google_play", "SOCIAL", _apps("a", "b"))
+    index.add_category("2026-01-01", "google_play", "SOCIAL", _apps("b"))
+    assert index.presence("a") == {}
+    assert index.presence("b") == {"google_play/SOCIAL": ["2026-01-01"]}
+
+
+def test_first_seen_requires_history(tmp_path):
+    """首次上榜看全部分类；当天之前没有数据的分类无法判断"""
+    index = PresenceIndex(str(tmp_path / "presence"))
+    index.add_category("2026-01-01", "app_store", "games", _apps("a"))
+    index.add_category("2026-01-01", "app_store", "social", _apps("b"))
+    index.add_category("2026-01-02", "app_store", "games", _apps("a", "b", "c"))
+
+    assert not index.has_history("2026-01-01", "app_store", "games")
+    assert index.has_history("2026-01-02", "app_store", "games")
+    assert index.first_seen("2026-01-02", "app_store", "games", ["a", "b", "c"]) == ["c"]
+
+
+def test_reentry_and_streak(tmp_path):
+    """重新上榜：离榜至少 N 天；连续在榜：恰好 K 天，没有数据的日期不打断"""
+    index = PresenceIndex(str(tmp_path / "presence"))
+    days = {
+        "2026-01-01": _apps("a", "b"),
+        "2026-01-02": _apps("b"),
+        "2026-01-03": _apps("b"),
+        # 2026-01-04 没有数据
+        "2026-01-05": _apps("a", "b"),
+    }
+    for date_str, apps in days.items():
+        index.add_category(date_str, "app_store", "games", apps)
+
+    assert index.reentered("2026-01-05", "app_store", "games", ["a", "b"], min_absent_days=3) == ["a"]
+    assert index.reentered("2026-01-05", "app_store", "games", ["a", "b"], min_absent_days=4) == []
+    assert index.streak("2026-01-05", "app_store", "games", ["a", "b"], days=5) == ["b"]
+    assert index.streak("2026-01-05", "app_store", "games", ["a", "b"], days=4) == []
+
+
+def test_streak_counts_from_actual_run_start(tmp_path):
+    """连续区间跨过多个没有数据的日期时按实际起点计算天数，区间开头没有数据的日期不计入"""
+    index = PresenceIndex(str(tmp_path / "presence"))
+    days = {
+        "2026-01-01": _apps("a", "c"),
+        # 2026-01-02、01-03 没有数据
+        "2026-01-04": _apps("a", "b", "c"),
+        "2026-01-05": _apps("a", "b"),
+        "2026-01-06": _apps("a", "b", "c"),
+    }
+    for date_str, apps in days.items():
+        index.add_category(date_str, "app_store", "games", apps)
+
+    # a 从 01-01 起连续 6 天；b 从 01-04 起连续 3 天（之前两天没有数据不计入）；c 01-05 离榜，只连续 1 天
+    for length, expected in [(1, ["c"]), (2, []), (3, ["b"]), (4, []), (6, ["a"])]:
+        assert index.streak("2026-01-06", "app_store", "games", ["a", "b", "c"], days=length) == expected
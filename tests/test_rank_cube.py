@@ -0,0 +1,55 @@
+"""
+排名立方体的测试：流失率只比较相邻两天、缺少 app_id 的应用不登记
+"""
+
+import pytest
+
+from utils.rank_cube import NUMPY_AVAILABLE
+
+pytestmark = pytest.mark.skipif(not NUMPY_AVAILABLE, reason="numpy 未安装")
+
+
+def _apps(*app_ids):
+    return [{"app_id": app_id, "rank": rank} for rank, app_id in enumerate(app_ids, 1)]
+
+
+def test_churn_rate_skips_missing_days(tmp_path):
+    """缺失日期前后的两天不算作相邻两天，补录的较早日期按日期顺序比较"""
+    from utils.rank_cube import RankCube, churn_rate
+
+    cube = RankCube(str(tmp_path / "cube"))
+    cube.add_day("2026-01-01", {"app_store/games": _apps("a", "b", "c", "d")})
+    cube.add_day("2026-01-02", {"app_store/games": _apps("a", "b", "c", "e")})
+    # 01-03 ~ 01-04 没有数据，01-05 与 01-02 的差异不计入
+    cube.add_day("2026-01-05", {"app_store/games": _apps("x", "y", "z", "w")})
+    # 补录的 01-06 追加在 01-07 之后
+    cube.add_day("2026-01-07", {"app_store/games": _apps("x", "y", "z", "w")})
+    cube.add_day("2026-01-06", {"app_store/games": _apps("x", "y", "v", "u")})
+
+    # 01-01 -> 01-02 流失 1/4，01-05 -> 01-06 流失 2/4，01-06 -> 01-07 流失 2/4
+    assert churn_rate(cube) == {"app_store/games": pytest.approx((0.25 + 0.5 + 0.5) / 3)}
+    assert churn_rate(cube, last_days=2) == {"app_store/games": pytest.approx(0.5)}
+
+
+def test_churn_rate_without_adjacent_days(tmp_path):
+    """没有相邻两天数据的分区不返回"""
+    from utils.rank_cube import RankCube, churn_rate
+
+    cube = RankCube(str(tmp_path / "cube"))
+    cube.add_day("2026-01-01", {"app_store/games": _apps("a")})
+    cube.add_day("2026-01-03", {"app_store/games": _apps("b")})
+    assert churn_rate(cube) == {}
+
+
+def test_apps_without_app_id_are_not_registered(tmp_path):
+    """缺少 app_id 的应用不登记为 平台:None，其他应用照常写入"""
+    from utils.rank_cube import RankCube
+
+    cube = RankCube(str(tmp_path / "cube"))
+    apps = [{"app_id": "a", "rank": 1}, {"rank": 2}, {"app_id": None, "rank": 3}]
+    cube.add_day("2026-01-01", {"app_store/games": apps})
+
+    reloaded = RankCube(str(tmp_path / "cube"))
+    assert reloaded.apps == ["app_store:a"]
+    assert reloaded.slots == ["app_store/games"]
+    assert reloaded.ranks[0, 0].tolist() == [1]
@@ -0,0 +1,213 @@
+"""
+重试与限流的测试：全抖动退避、熔断器、截止时间、自适应令牌桶（降速、Retry-After、恢复）
+时钟替换为可手动推进的假时钟，不真正等待
+"""
+
+import random
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+
+import pytest
+
+from utils import rate_limiter, retry
+from utils.rate_limiter import HostRateLimiter, TokenBucket, parse_retry_after
+from utils.retry import (
+    CircuitBreaker, CircuitOpenError, Deadline, DeadlineExceeded, RetryPolicy, call_with_retry
+)
+
+
+class FakeClock:
+    """替换模块中的 time：monotonic 返回手动推进的时间，sleep 只推进时间并记录"""
+
+    def __init__(self):
+        self.now = 1000.0
+        self.sleeps = []
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(retry, "time", fake)
+    monkeypatch.setattr(rate_limiter, "time", fake)
+    return fake
+
+
+def test_backoff_is_full_jitter_and_capped():
+    """退避时间在 [0, min(max_delay, base_delay * 2^attempt)] 内均匀分布"""
+    policy = RetryPolicy(retry_times=3, base_delay=1.0, max_delay=5.0)
+    random.seed(0)
+    for attempt, cap in [(0, 1.0), (1, 2.0), (2, 4.0), (3, 5.0), (10, 5.0)]:
+        delays = [policy.backoff(attempt) for _ in range(200)]
+        assert all(0 <= delay <= cap for delay in delays)
+        assert max(delays) > cap * 0.8
+
+
+def test_call_with_retry_retries_then_succeeds(clock):
+    """失败后按退避等待重试，成功后返回结果并关闭熔断计数"""
+    breaker = CircuitBreaker(failure_threshold=3)
+    calls = []
+
+    def func(timeout):
+        calls.append(timeout)
+        if len(calls) < 3:
+            raise ConnectionError("reset")
+        return "ok"
+
+    assert call_with_retry(func, "h", RetryPolicy(retry_times=3), breaker=breaker, timeout=10) == "ok"
+    assert calls == [10, 10, 10]
+    assert len(clock.sleeps) == 2
+    assert not breaker.is_open("h")
+
+
+def test_call_with_retry_returns_last_result_when_should_retry(clock):
+    """返回值一直需要重试时，最后一次的返回值原样返回"""
+    results = iter([503, 502, 500])
+    result = call_with_retry(lambda timeout: next(results), "h", RetryPolicy(retry_times=2),
+                             should_retry=lambda status: status >= 500)
+    assert result == 500
+    assert len(clock.sleeps) == 2
+
+
+def test_call_with_retry_does_not_retry_other_exceptions(clock):
+    """不在 retry_on 中的异常直接抛出，不重试"""
+    calls = []
+
+    def func(timeout):
+        calls.append(timeout)
+        raise ValueError("bad payload")
+
+    with pytest.raises(ValueError):
+        call_with_retry(func, "h", RetryPolicy(retry_times=3), retry_on=(ConnectionError,))
+    assert len(calls) == 1 and clock.sleeps == []
+
+
+def test_circuit_breaker_opens_and_half_opens(clock):
+    """连续失败达到阈值后熔断，冷却后放行一次试探，试探成功后解除"""
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60)
+    breaker.record_failure("h")
+    assert breaker.allow("h")
+    breaker.record_failure("h")
+    assert breaker.is_open("h")
+    assert not breaker.allow("h")
+    assert breaker.allow("other")
+
+    clock.now += 60
+    assert breaker.allow("h")
+    # 试探期间不再放行其他请求
+    assert not breaker.allow("h")
+    breaker.record_success("h")
+    assert not breaker.is_open("h") and breaker.allow("h")
+
+
+def test_call_with_retry_raises_when_circuit_open(clock):
+    """熔断后请求不再发出"""
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60)
+    calls = []
+
+    def func(timeout):
+        calls.append(timeout)
+        raise ConnectionError("reset")
+
+    with pytest.raises(CircuitOpenError):
+        call_with_retry(func, "h", RetryPolicy(retry_times=5), breaker=breaker)
+    assert len(calls) == 2
+
+
+def test_deadline_clamps_and_expires(clock):
+    """截止时间限制单次超时，超时后 clamp 抛出 DeadlineExceeded"""
+    assert Deadline(None).clamp(30) == 30 and not Deadline(None).expired()
+
+    deadline = Deadline(10)
+    assert deadline.clamp(30) == 10
+    assert deadline.clamp(None) == 10
+    clock.now += 7
+    assert deadline.clamp(2) == 2
+    assert deadline.clamp(5) == pytest.approx(3)
+    assert deadline.remaining() == pytest.approx(3)
+    clock.now += 3
+    assert deadline.expired()
+    with pytest.raises(DeadlineExceeded):
+        deadline.clamp(5)
+
+    deadline.restart()
+    assert deadline.remaining() == pytest.approx(10)
+
+
+def test_call_with_retry_stops_when_backoff_exceeds_deadline(clock, monkeypatch):
+    """退避等待超出剩余时间时不再重试"""
+    monkeypatch.setattr(RetryPolicy, "backoff", lambda self, attempt: 5.0)
+    deadline = Deadline(3)
+
+    def func(timeout):
+        raise ConnectionError("reset")
+
+    with pytest.raises(DeadlineExceeded):
+        call_with_retry(func, "h", RetryPolicy(retry_times=3), deadline=deadline, timeout=10)
+    assert clock.sleeps == []
+
+
+def test_token_bucket_burst_then_rate(clock):
+    """桶满时可突发 burst 次，之后按速率等待"""
+    bucket = TokenBucket(rate=2.0, burst=2)
+    assert bucket.acquire() == 0
+    assert bucket.acquire() == 0
+    assert bucket.acquire() == pytest.approx(0.5)
+    assert bucket.acquire() == pytest.approx(0.5)
+    clock.now += 10
+    # 空闲时令牌不会超过桶容量
+    assert bucket.reserve() == 0 and bucket.reserve() == 0
+    assert bucket.reserve() == pytest.approx(0.5)
+
+
+def test_throttle_decreases_rate_and_recovers(clock):
+    """429/503 时按比例降速（不低于下限），成功响应逐步恢复到上限"""
+    limiter = HostRateLimiter({"h": {"rate": 4.0, "burst": 1}})
+    bucket = limiter.bucket("h")
+
+    limiter.on_response("h", 429)
+    assert bucket.rate == pytest.approx(2.0)
+    limiter.on_response("h", 503)
+    assert bucket.rate == pytest.approx(1.0)
+    for _ in range(10):
+        limiter.on_response("h", 503)
+    assert bucket.rate == pytest.approx(0.4)
+    assert limiter.stats()["h"]["throttled"] == 12
+
+    # 其他 4xx 不影响速率
+    limiter.on_response("h", 404)
+    assert bucket.rate == pytest.approx(0.4)
+    for _ in range(5):
+        limiter.on_response("h", 200)
+    assert bucket.rate == pytest.approx(2.4)
+    for _ in range(100):
+        limiter.on_response("h", 200)
+    assert bucket.rate == pytest.approx(4.0)
+
+
+def test_retry_after_pauses_bucket(clock):
+    """Retry-After 期间不发放令牌，之后按降低后的速率继续"""
+    limiter = HostRateLimiter({"h": {"rate": 10.0, "burst": 5}})
+    limiter.on_response("h", 429, retry_after="30")
+
+    assert limiter.acquire("h") == pytest.approx(30)
+    assert clock.now == pytest.approx(1030)
+    # 降速后（5 次/秒）令牌已在暂停期间补满
+    assert limiter.acquire("h") == 0
+
+
+def test_parse_retry_after():
+    """Retry-After 支持秒数和 HTTP 日期，无法解析时返回 None"""
+    assert parse_retry_after("120") == 120
+    assert parse_retry_after("-5") == 0
+    assert parse_retry_after(None) is None
+    assert parse_retry_after("") is None
+    assert parse_retry_after("soon") is None
+    retry_at = datetime.now(timezone.utc) + timedelta(seconds=90)
+    assert 80 < parse_retry_after(format_datetime(retry_at, usegmt=True)) <= 90
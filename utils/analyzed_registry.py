@@ -0,0 +1,273 @@
+"""
+已分析产品登记模块
+只追加的日志文件记录已分析（已报告）的 app_id，每次记录只追加新增的行，不再整体重写 analyzed_apps.json；
+内存中的集合按文件偏移增量读取其他进程追加的记录，成员判断 O(1)
+
+日志格式（每行一条，制表符分隔）：
+    #compact\t{编号}\t{时间}     压缩后的日志的第一行（每次压缩的编号不同）
+    {app_id}\t{来源}\t{时间}      记录
+    -{app_id}\t{来源}\t{时间}     删除（墓碑），compact 时清除
+
+识别器、分析器、Web 触发的任务可能同时写入：追加、压缩和导出都在 {日志}.lock 的排他文件锁内完成。
+Web 页面读取的 analyzed_apps.json 由 export_json 导出（格式与原文件相同）。
+"""
+
+import os
+import threading
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Set
+
+try:
+    import fcntl
+    FCNTL_AVAILABLE = True
+except ImportError:
+    # Windows 没有 fcntl，只在进程内加锁
+    FCNTL_AVAILABLE = False
+
+from utils.data_storage import encode_json, load_from_json
+
+
+# data 目录下的日志文件和兼容导出的 JSON 文件
+REGISTRY_LOG = "analyzed_apps.log"
+EXPORT_FILE = "analyzed_apps.json"
+
+# 墓碑行前缀
+TOMBSTONE = "-"
+
+# 压缩后日志第一行的前缀：其他进程据此发现日志已被替换（inode 可能被复用，不能只比较 inode）
+HEADER = "#"
+
+# 日志行数超过有效记录数的 2 倍且多出这么多行时，追加后自动压缩
+AUTO_COMPACT_SLACK = 1000
+
+
+class AnalyzedRegistry:
+    """
+    已分析产品登记（多进程安全）
+    """
+
+    def __init__(self, log_path: str, export_path: Optional[str] = None):
+        """
+        Args:
+            log_path: 日志文件路径（不存在时从 export_path 导入已有记录）
+            export_path: 兼容导出的 JSON 文件路径（analyzed_apps.json），可选
+        """
+        self.log_path = log_path
+        self.lock_path = f"{log_path}.lock"
+        self.export_path = export_path
+        self._thread_lock = threading.Lock()
+        self._apps: Dict[str, None] = {}
+        self._lines = 0
+        self._offset = 0
+        self._inode = None
+        self._header = None
+
+    @contextmanager
+    def _locked(self, exclusive: bool):
+        """进程内互斥 + 跨进程文件锁（读为共享锁，写为排他锁）"""
+        with self._thread_lock:
+            if not FCNTL_AVAILABLE:
+                yield
+                return
+            os.makedirs(os.path.dirname(self.lock_path) or ".", exist_ok=True)
+            with open(self.lock_path, 'a') as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _refresh(self):
+        """读取上次之后追加的记录（日志被压缩替换后从头读取），调用方需持有锁"""
+        try:
+            f = open(self.log_path, 'rb')
+        except FileNotFoundError:
+            self._apps, self._lines, self._offset, self._inode, self._header = {}, 0, 0, None, None
+            return
+        with f:
+            stat = os.fstat(f.fileno())
+            first_line = f.readline()
+            header = first_line if first_line.startswith(HEADER.encode()) else None
+            if stat.st_ino != self._inode or stat.st_size < self._offset or header != self._header:
+                self._apps, self._lines, self._offset = {}, 0, 0
+                self._inode, self._header = stat.st_ino, header
+            if stat.st_size == self._offset:
+                return
+            f.seek(self._offset)
+            chunk = f.read(stat.st_size - self._offset)
+        # 只处理完整的行（另一个进程可能正在追加）
+        end = chunk.rfind(b"\n") + 1
+        for line in chunk[:end].decode('utf-8').splitlines():
+            app_id = line.split("\t", 1)[0]
+            if not app_id or app_id.startswith(HEADER):
+                continue
+            self._lines += 1
+            if app_id.startswith(TOMBSTONE):
+                self._apps.pop(app_id[len(TOMBSTONE):], None)
+            else:
+                self._apps.setdefault(app_id, None)
+        self._offset += end
+
+    def _append(self, lines: List[str]):
+        """追加若干行（一次写入），调用方需持有排他锁"""
+        os.makedirs(os.path.dirname(self.log_path) or ".", exist_ok=True)
+        with open(self.log_path, 'ab') as f:
+            f.write("".join(lines).encode('utf-8'))
+            f.flush()
+            os.fsync(f.fileno())
+
+    def _import_export_file(self):
+        """日志不存在时导入 analyzed_apps.json 中的已有记录，调用方需持有排他锁"""
+        if os.path.exists(self.log_path) or not self.export_path:
+            return
+        data = load_from_json(self.export_path)
+        app_ids = data.get("analyzed_apps", [])
+        timestamp = data.get("last_updated") or datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        self._append([f"{app_id}\timport\t{timestamp}\n" for app_id in dict.fromkeys(app_ids)])
+
+    @contextmanager
+    def _reading(self):
+        """读取最新记录（首次使用时先导入 analyzed_apps.json）"""
+        if self.export_path and not os.path.exists(self.log_path):
+            with self._locked(exclusive=True):
+                self._import_export_file()
+        with self._locked(exclusive=False):
+            self._refresh()
+            yield
+
+    def app_ids(self) -> Set[str]:
+        """全部已分析的 app_id"""
+        with self._reading():
+            return set(self._apps)
+
+    def __contains__(self, app_id: str) -> bool:
+        with self._reading():
+            return app_id in self._apps
+
+    def __len__(self):
+        with self._reading():
+            return len(self._apps)
+
+    def add(self, app_ids: Iterable[str], source: str) -> int:
+        """
+        记录已分析的产品（已记录的跳过），并更新兼容导出的 JSON
+
+        Args:
+            app_ids: app_id 列表
+            source: 来源（detector / analyzer / web 等）
+
+        Returns:
+            int: 新增的记录数
+        """
+        return self._write(app_ids, source, remove=False)
+
+    def remove(self, app_ids: Iterable[str], source: str) -> int:
+        """
+        删除记录（追加墓碑行），并更新兼容导出的 JSON
+
+        Args:
+            app_ids: app_id 列表
+            source: 来源
+
+        Returns:
+            int: 删除的记录数
+        """
+        return self._write(app_ids, source, remove=True)
+
+    def _write(self, app_ids: Iterable[str], source: str, remove: bool) -> int:
+        with self._locked(exclusive=True):
+            self._import_export_file()
+            self._refresh()
+            targets = [
+                app_id for app_id in dict.fromkeys(app_ids)
+                if app_id and (app_id in self._apps) == remove
+            ]
+            if targets:
+                timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+                prefix = TOMBSTONE if remove else ""
+                self._append([f"{prefix}{app_id}\t{source}\t{timestamp}\n" for app_id in targets])
+                self._refresh()
+                if self._lines > 2 * len(self._apps) + AUTO_COMPACT_SLACK:
+                    self._compact()
+                self._export()
+            return len(targets)
+
+    def _compact(self):
+        """只保留有效记录（每个 app_id 的第一条记录行），替换日志文件，调用方需持有排他锁"""
+        records = {}
+        if os.path.exists(self.log_path):
+            with open(self.log_path, 'rb') as f:
+                for line in f.read().decode('utf-8').splitlines(keepends=True):
+                    if not line.endswith("\n"):
+                        continue
+                    app_id = line.split("\t", 1)[0]
+                    if app_id.startswith(TOMBSTONE):
+                        records.pop(app_id[len(TOMBSTONE):], None)
+                    elif app_id and not app_id.startswith(HEADER):
+                        records.setdefault(app_id, line)
+        header = f"{HEADER}compact\t{uuid.uuid4().hex}\t{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n"
+        tmp_path = f"{self.log_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write((header + "".join(records.values())).encode('utf-8'))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.log_path)
+        self._refresh()
+
+    def compact(self) -> int:
+        """
+        压缩日志：去掉墓碑和被删除的记录
+
+        Returns:
+            int: 压缩后的行数
+        """
+        with self._locked(exclusive=True):
+            self._import_export_file()
+            self._compact()
+            return self._lines
+
+    def _export(self):
+        """导出 analyzed_apps.json（原格式，按记录顺序），先写临时文件再替换，调用方需持有排他锁"""
+        if not self.export_path:
+            return
+        data = {
+            "analyzed_apps": list(self._apps),
+            "last_updated": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "total_count": len(self._apps)
+        }
+        tmp_path = f"{self.export_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(encode_json(data, None))
+        os.replace(tmp_path, self.export_path)
+
+    def export_json(self) -> bool:
+        """
+        导出 analyzed_apps.json
+
+        Returns:
+            bool: 是否成功
+        """
+        try:
+            with self._locked(exclusive=True):
+                self._import_export_file()
+                self._refresh()
+                self._export()
+            return True
+        except OSError as e:
+            print(f"导出已分析产品记录失败: {e}")
+            return False
+
+
+def open_analyzed_registry(data_dir: str) -> AnalyzedRegistry:
+    """
+    打开 data 目录下的已分析产品登记（analyzed_apps.log，导出到 analyzed_apps.json）
+
+    Args:
+        data_dir: 数据根目录
+
+    Returns:
+        AnalyzedRegistry: 登记实例
+    """
+    return AnalyzedRegistry(os.path.join(data_dir, REGISTRY_LOG), os.path.join(data_dir, EXPORT_FILE))
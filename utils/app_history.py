@@ -0,0 +1,277 @@
+"""
+应用历史索引模块
+按 app_id 保存应用每天的上榜记录 (日期, 平台, 分类, 排名, 评价数)，查询一个应用的排名轨迹
+只需要一次定位读取，不再逐个打开 日期 × 分类 个榜单文件
+
+目录结构：
+    history/records.bin   定长二进制记录，每个应用占一段连续的块（块内按写入顺序，查询时排序）
+    history/index.json    最早日期、分区（平台/分类）列表和 app_id -> [块偏移, 记录数, 块容量]
+
+块写满后在文件末尾分配两倍容量的新块并搬迁，旧块成为空洞（重建时回收）。
+同一天同一分区重复保存时覆盖原记录；重新爬取后掉出榜单的应用的旧记录不会删除，需要重建。
+"""
+
+import os
+import shutil
+import struct
+import threading
+from datetime import date, datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from utils import json_codec
+from utils.data_storage import write_json_atomic
+
+
+HISTORY_VERSION = 1
+RECORDS_FILE = "records.bin"
+INDEX_FILE = "index.json"
+
+# 日期序数 uint32、分区序号 uint16、排名 int16、评价数 uint32
+RECORD = struct.Struct("<IHhI")
+
+# 新应用的初始块容量（记录数），写满后翻倍
+INITIAL_BLOCK_CAPACITY = 8
+
+# 评价数缺失（Google Play 没有评价数）
+NO_RATING_COUNT = 0xFFFFFFFF
+
+
+def _day(date_str: str) -> int:
+    return datetime.strptime(date_str, "%Y-%m-%d").toordinal()
+
+
+def _rating_count(app: Dict) -> int:
+    value = app.get("rating_count")
+    if value is None:
+        return NO_RATING_COUNT
+    return min(max(int(value), 0), NO_RATING_COUNT - 1)
+
+
+class AppHistoryIndex:
+    """
+    应用历史索引（单写多读：爬虫写入，Web 服务器只读）
+    """
+
+    def __init__(self, history_dir: str):
+        """
+        Args:
+            history_dir: 索引目录（不存在时为空索引）
+        """
+        self.history_dir = history_dir
+        self.records_path = os.path.join(history_dir, RECORDS_FILE)
+        self.index_path = os.path.join(history_dir, INDEX_FILE)
+        self._lock = threading.Lock()
+        self._dirty = False
+
+        try:
+            with open(self.index_path, 'rb') as f:
+                index = json_codec.loads(f.read())
+        except (OSError, ValueError):
+            index = {}
+        self.start: Optional[str] = index.get("start")
+        self.slots = index.get("slots", [])
+        self.apps = index.get("apps", {})
+        self.size = index.get("size", 0)
+        self._slot_index = {key: position for position, key in enumerate(self.slots)}
+
+    def __len__(self):
+        return len(self.apps)
+
+    def covers(self, date_str: str) -> bool:
+        """索引是否从该日期（或更早）开始"""
+        return self.start is not None and self.start <= date_str
+
+    def history(self, app_id: str, days: Optional[int] = None, platform: Optional[str] = None) -> List[Dict]:
+        """
+        查询应用的上榜记录（一次定位读取）
+
+        Args:
+            app_id: 应用ID
+            days: 只返回最近一条记录之前 N 天内的记录（可选）
+            platform: 只返回指定平台（可选）
+
+        Returns:
+            List[Dict]: [{date, platform, category, rank, rating_count}]，按日期、分区升序
+        """
+        entry = self.apps.get(app_id)
+        if entry is None:
+            return []
+        offset, count, _ = entry
+        try:
+            with open(self.records_path, 'rb') as f:
+                f.seek(offset)
+                raw = f.read(count * RECORD.size)
+        except OSError:
+            return []
+
+        records = sorted(RECORD.iter_unpack(raw[:len(raw) - len(raw) % RECORD.size]))
+        if days and records:
+            records = [record for record in records if record[0] > records[-1][0] - days]
+
+        result = []
+        for day, slot, rank, rating_count in records:
+            slot_platform, category = self.slots[slot].split('/', 1)
+            if platform and slot_platform != platform:
+                continue
+            result.append({
+                "date": date.fromordinal(day).isoformat(),
+                "platform": slot_platform,
+                "category": category,
+                "rank": rank,
+                "rating_count": None if rating_count == NO_RATING_COUNT else rating_count
+            })
+        return result
+
+    def _slot(self, key: str) -> int:
+        position = self._slot_index.get(key)
+        if position is None:
+            position = len(self.slots)
+            self.slots.append(key)
+            self._slot_index[key] = position
+        return position
+
+    def _allocate(self, f, records: List[bytes], capacity: int) -> List[int]:
+        """在文件末尾分配新块并写入记录"""
+        offset = self.size
+        f.seek(offset)
+        f.write(b"".join(records) + bytes((capacity - len(records)) * RECORD.size))
+        self.size = offset + capacity * RECORD.size
+        return [offset, len(records), capacity]
+
+    def add_category(self, date_str: str, platform: str, category: str, apps: List[Dict]) -> bool:
+        """
+        写入一个分类一天的上榜记录（索引在 save 时写回）
+
+        Args:
+            date_str: 日期
+            platform: 平台
+            category: 分类
+            apps: 应用列表（需含 app_id 和 rank）
+
+        Returns:
+            bool: 是否成功
+        """
+        with self._lock:
+            try:
+                self._add_category(date_str, f"{platform}/{category}", apps)
+                return True
+            except OSError as e:
+                print(f"更新应用历史索引失败: {e}")
+                return False
+
+    def _add_category(self, date_str: str, key: str, apps: List[Dict]):
+        if self.start is None or date_str < self.start:
+            self.start = date_str
+        day = _day(date_str)
+        slot = self._slot(key)
+        os.makedirs(self.history_dir, exist_ok=True)
+        mode = 'r+b' if os.path.exists(self.records_path) else 'w+b'
+        with open(self.records_path, mode) as f:
+            for app in apps:
+                app_id = app.get("app_id")
+                if not app_id:
+                    continue
+                record = RECORD.pack(day, slot, app.get("rank") or 0, _rating_count(app))
+                entry = self.apps.get(app_id)
+                if entry is None:
+                    self.apps[app_id] = self._allocate(f, [record], INITIAL_BLOCK_CAPACITY)
+                    continue
+
+                offset, count, capacity = entry
+                f.seek(offset)
+                existing = f.read(count * RECORD.size)
+                position = next(
+                    (position for position, (record_day, record_slot, _, _) in enumerate(RECORD.iter_unpack(existing))
+                     if record_day == day and record_slot == slot),
+                    None
+                )
+                if position is not None:
+                    f.seek(offset + position * RECORD.size)
+                    f.write(record)
+                elif count < capacity:
+                    f.seek(offset + count * RECORD.size)
+                    f.write(record)
+                    entry[1] = count + 1
+                else:
+                    # 块已满：搬迁到两倍容量的新块
+                    old = [existing[i:i + RECORD.size] for i in range(0, len(existing), RECORD.size)]
+                    self.apps[app_id] = self._allocate(f, old + [record], capacity * 2)
+        self._dirty = True
+
+    def save(self) -> bool:
+        """写回索引（先写记录再写索引：索引引用的记录一定已经写入）"""
+        with self._lock:
+            if not self._dirty:
+                return True
+            try:
+                write_json_atomic({
+                    "version": HISTORY_VERSION,
+                    "start": self.start,
+                    "slots": self.slots,
+                    "size": self.size,
+                    "apps": self.apps
+                }, self.index_path)
+                self._dirty = False
+                return True
+            except OSError as e:
+                print(f"保存应用历史索引失败: {e}")
+                return False
+
+    @classmethod
+    def build(cls, history_dir: str, days: Iterable[Tuple[str, Dict]]) -> "AppHistoryIndex":
+        """
+        从全部榜单重建索引（每个应用的记录连续存放，没有空洞）
+
+        Args:
+            history_dir: 索引目录（已有内容会被覆盖）
+            days: (日期, {(平台, 分类): 应用列表}) 序列，见 iter_store_days
+
+        Returns:
+            AppHistoryIndex: 新索引
+        """
+        index = cls(history_dir)
+        index.start, index.slots, index.apps, index.size = None, [], {}, 0
+        index._slot_index = {}
+        records = {}
+        for date_str, sections in days:
+            if index.start is None or date_str < index.start:
+                index.start = date_str
+            day = _day(date_str)
+            for (platform, category), apps in sections.items():
+                slot = index._slot(f"{platform}/{category}")
+                for app in apps:
+                    if app.get("app_id"):
+                        records.setdefault(app["app_id"], {})[(day, slot)] = RECORD.pack(
+                            day, slot, app.get("rank") or 0, _rating_count(app)
+                        )
+
+        os.makedirs(history_dir, exist_ok=True)
+        with open(index.records_path, 'wb') as f:
+            for app_id, app_records in records.items():
+                # 按 2 的幂留出余量，之后每天追加时不必立即搬迁
+                capacity = INITIAL_BLOCK_CAPACITY
+                while capacity <= len(app_records):
+                    capacity *= 2
+                index.apps[app_id] = index._allocate(f, [app_records[key] for key in sorted(app_records)], capacity)
+        index._dirty = True
+        index.save()
+        return index
+
+    @classmethod
+    def rebuild(cls, history_dir: str, days: Iterable[Tuple[str, Dict]]) -> "AppHistoryIndex":
+        """
+        重建索引：先写入临时目录，完成后替换原目录
+
+        Args:
+            history_dir: 索引目录
+            days: (日期, {(平台, 分类): 应用列表}) 序列，见 iter_store_days
+
+        Returns:
+            AppHistoryIndex: 新索引
+        """
+        tmp_dir = f"{history_dir}.tmp"
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        cls.build(tmp_dir, days)
+        shutil.rmtree(history_dir, ignore_errors=True)
+        os.replace(tmp_dir, history_dir)
+        return cls(history_dir)
@@ -0,0 +1,340 @@
+"""
+应用目录存储模块
+应用元数据（名称、开发者、链接、图标等）在目录中只保存一份，变化时才追加新版本；
+每天只保存紧凑的 (应用序号, 排名, 评分, 评价数, 安装量) 行
+
+目录结构：
+    catalog/apps.json          应用目录 {"version", "apps": [{"key", "last", "versions": [[起始日期, 变化的字段(, 删除的字段)], ...]}]}
+                               （第一个版本是完整元数据，之后的版本只保存与上一版本不同的字段和删除的字段列表）
+    catalog/days/{日期}.json   每日榜单 {"date", "sections": {分区名: {分类信息, "common", "fields", "rows"}}}
+"""
+
+import os
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from utils import json_codec
+from utils.data_storage import JsonRankingStore, snapshot_key, write_json_atomic
+from utils.date_utils import is_valid_date
+
+
+# 目录文件格式版本（版本 1 用 null 表示删除的字段，无法保存值为 None 的字段）
+CATALOG_VERSION = 2
+
+# 每天变化、保存在紧凑行中的字段（按行内顺序；installs 为 Google Play 的精确安装量，App Store 为空。
+# 新增字段只能追加在末尾，旧文件中较短的行按位置读取）。
+# 行内值为 null 表示字段值为 None；应用缺少的字段与分区第一个应用不同时，行末追加缺少字段的位掩码
+ROW_FIELDS = ("rank", "rating", "rating_count", "installs")
+
+# 同一分类的应用通常相同、保存在分区 common 中的字段
+SECTION_FIELDS = ("platform", "category", "timestamp")
+
+
+# 区分“字段不存在”和“字段值为 None”
+_MISSING = object()
+
+
+def _missing_mask(app: Dict) -> int:
+    """应用缺少的 ROW_FIELDS 字段（第 i 位对应 ROW_FIELDS[i]）"""
+    return sum(1 << position for position, field in enumerate(ROW_FIELDS) if field not in app)
+
+
+def _next_day(date_str: str) -> str:
+    return (datetime.strptime(date_str, "%Y-%m-%d") + timedelta(days=1)).strftime("%Y-%m-%d")
+
+
+class AppCatalog:
+    """
+    应用目录（按 平台:app_id 去重，元数据按起始日期分版本）
+    """
+
+    def __init__(self, file_path: str):
+        """
+        Args:
+            file_path: 目录文件路径（不存在时为空目录）
+        """
+        self.file_path = file_path
+        try:
+            with open(file_path, 'rb') as f:
+                catalog = json_codec.loads(f.read())
+        except (OSError, ValueError):
+            catalog = {}
+        self.apps = catalog.get("apps", [])
+        legacy = catalog.get("version", 1) < CATALOG_VERSION
+        # 内存中每个版本都展开为完整元数据
+        for app in self.apps:
+            metadata = {}
+            for position, version in enumerate(app["versions"]):
+                delta = version[1]
+                metadata = {**metadata, **delta}
+                if len(version) > 2:
+                    removed = version[2]
+                elif position and legacy:
+                    # 版本 1：之后版本中的 null 表示字段被删除
+                    removed = [key for key, value in delta.items() if value is None]
+                else:
+                    removed = []
+                for key in removed:
+                    metadata.pop(key, None)
+                version[1] = metadata
+                del version[2:]
+        self._index = {app["key"]: index for index, app in enumerate(self.apps)}
+        self._dirty = False
+
+    def __len__(self):
+        return len(self.apps)
+
+    @staticmethod
+    def _effective(versions: List, date_str: str) -> Optional[int]:
+        """date_str 当天生效的版本位置（版本按起始日期升序）"""
+        position = None
+        for index, (since, _) in enumerate(versions):
+            if since > date_str:
+                break
+            position = index
+        return position
+
+    def metadata(self, app_index: int, date_str: str) -> Dict:
+        """
+        获取应用在指定日期的元数据
+
+        Args:
+            app_index: 应用序号
+            date_str: 日期
+
+        Returns:
+            Dict: 元数据（早于第一个版本时返回第一个版本）
+        """
+        versions = self.apps[app_index]["versions"]
+        position = self._effective(versions, date_str)
+        return versions[position if position is not None else 0][1]
+
+    def upsert(self, key: str, metadata: Dict, date_str: str) -> int:
+        """
+        登记应用在指定日期的元数据，与当天生效的版本不同时新增版本
+
+        补录较早的日期时，新版本只覆盖这一天：第二天起恢复原来生效的版本。
+
+        Args:
+            key: 平台:app_id
+            metadata: 元数据
+            date_str: 日期
+
+        Returns:
+            int: 应用序号
+        """
+        index = self._index.get(key)
+        if index is None:
+            index = len(self.apps)
+            self.apps.append({"key": key, "last": date_str, "versions": [[date_str, metadata]]})
+            self._index[key] = index
+            self._dirty = True
+            return index
+
+        entry = self.apps[index]
+        last_seen = entry.get("last", date_str)
+        if date_str > last_seen:
+            entry["last"] = date_str
+            self._dirty = True
+
+        versions = entry["versions"]
+        position = self._effective(versions, date_str)
+        current = versions[position][1] if position is not None else None
+        if current == metadata:
+            return index
+
+        if position is not None and versions[position][0] == date_str:
+            versions[position][1] = metadata
+            insert_at = position
+        else:
+            insert_at = 0 if position is None else position + 1
+            versions.insert(insert_at, [date_str, metadata])
+
+        # 补录或重写较早的日期：之后已保存的日期仍使用原来的版本，从第二天起恢复
+        if current is not None:
+            next_day = _next_day(date_str)
+            following = versions[insert_at + 1][0] if insert_at + 1 < len(versions) else None
+            has_later_days = following > next_day if following else last_seen > date_str
+            if has_later_days:
+                versions.insert(insert_at + 1, [next_day, current])
+        self._dirty = True
+        return index
+
+    def save(self) -> bool:
+        """写回目录文件（未修改时跳过）"""
+        if not self._dirty:
+            return True
+        apps = []
+        for app in self.apps:
+            versions = []
+            previous = {}
+            for since, metadata in app["versions"]:
+                delta = {key: value for key, value in metadata.items() if previous.get(key, _MISSING) != value}
+                # 上一版本有、这一版本没有的字段单独列出（与值为 null 的字段区分）
+                removed = [key for key in previous if key not in metadata]
+                versions.append([since, delta, removed] if removed else [since, delta])
+                previous = metadata
+            apps.append({**app, "versions": versions})
+        try:
+            write_json_atomic({"version": CATALOG_VERSION, "apps": apps}, self.file_path)
+            self._dirty = False
+            return True
+        except OSError as e:
+            print(f"保存应用目录失败: {e}")
+            return False
+
+
+class CatalogRankingStore(JsonRankingStore):
+    """
+    应用目录 + 每日紧凑排名表
+
+    save_category 只缓存在内存中，flush 时更新目录并每个日期写一次排名表；
+    load_category 从目录和排名表还原出与分文件格式相同的数据。
+    读取时没有排名表的日期回退到分文件格式，便于逐步迁移。
+    """
+
+    storage_format = "catalog"
+
+    def __init__(self, base_dir: str, compression: Optional[str] = None, canonical: bool = False):
+        super().__init__(base_dir, compression, canonical)
+        self.catalog_dir = os.path.join(base_dir, "catalog")
+        self._catalog = None
+        self._catalog_mtime = None
+        self._pending = {}
+        self._lock = threading.Lock()
+
+    def _catalog_file_mtime(self) -> Optional[float]:
+        try:
+            return os.path.getmtime(os.path.join(self.catalog_dir, "apps.json"))
+        except OSError:
+            return None
+
+    @property
+    def catalog(self) -> AppCatalog:
+        """应用目录（常驻内存；长期打开的只读实例在其他进程写回目录后重新加载）"""
+        mtime = self._catalog_file_mtime()
+        if self._catalog is None or (not self._catalog._dirty and mtime != self._catalog_mtime):
+            self._catalog = AppCatalog(os.path.join(self.catalog_dir, "apps.json"))
+            self._catalog_mtime = mtime
+        return self._catalog
+
+    def day_path(self, date_str: str) -> str:
+        return os.path.join(self.catalog_dir, "days", f"{date_str}.json")
+
+    def save_category(self, date_str: str, platform: str, category: str, data: Dict,
+                      country: str = None, collection: str = None) -> bool:
+        with self._lock:
+            key = snapshot_key(platform, category, country, collection)
+            self._pending.setdefault(date_str, {})[(platform, key)] = data
+        return True
+
+    def _encode_section(self, date_str: str, platform: str, data: Dict) -> Dict:
+        """将一个分类的数据拆分为 目录元数据 + 紧凑行"""
+        apps = data.get("apps", [])
+        first = apps[0] if apps else {}
+        section = {key: value for key, value in data.items() if key != "apps"}
+        section["common"] = {field: first[field] for field in SECTION_FIELDS if field in first}
+        section["fields"] = list(first.keys())
+        default_missing = _missing_mask(first)
+
+        rows = []
+        for app in apps:
+            # 与同分类其他应用不同的分区字段保留在元数据中
+            metadata = {
+                key: value for key, value in app.items()
+                if key not in ROW_FIELDS and not (key in SECTION_FIELDS and value == section["common"].get(key))
+            }
+            index = self.catalog.upsert(f"{platform}:{app.get('app_id')}", metadata, date_str)
+            row = [index] + [app.get(field) for field in ROW_FIELDS]
+            missing = _missing_mask(app)
+            if missing != default_missing:
+                row.append(missing)
+            rows.append(row)
+        section["rows"] = rows
+        return section
+
+    def _decode_section(self, date_str: str, section: Dict) -> Dict:
+        """从目录和紧凑行还原分类数据"""
+        fields = section.get("fields", [])
+        data = {key: value for key, value in section.items() if key not in ("common", "fields", "rows")}
+
+        default_missing = _missing_mask({field: None for field in fields})
+
+        apps = []
+        for row in section.get("rows", []):
+            values = dict(section.get("common", {}))
+            values.update(self.catalog.metadata(row[0], date_str))
+            missing = row[len(ROW_FIELDS) + 1] if len(row) > len(ROW_FIELDS) + 1 else default_missing
+            for position, (field, value) in enumerate(zip(ROW_FIELDS, row[1:])):
+                if not missing >> position & 1:
+                    values[field] = value
+            app = {field: values.pop(field) for field in fields if field in values}
+            app.update(values)
+            apps.append(app)
+        data["apps"] = apps
+        return data
+
+    def _load_day(self, date_str: str) -> Optional[Dict]:
+        try:
+            with open(self.day_path(date_str), 'rb') as f:
+                return json_codec.loads(f.read())
+        except (OSError, ValueError):
+            return None
+
+    def load_category(self, date_str: str, platform: str, category: str,
+                      country: str = None, collection: str = None) -> Dict:
+        key = snapshot_key(platform, category, country, collection)
+        with self._lock:
+            pending = self._pending.get(date_str, {})
+            if (platform, key) in pending:
+                return pending[(platform, key)]
+
+        day = self._load_day(date_str)
+        if day is None:
+            return super().load_category(date_str, platform, category, country, collection)
+        section = day.get("sections", {}).get(key)
+        return self._decode_section(date_str, section) if section else {}
+
+    def exists(self, date_str: str, platform: str, category: str) -> bool:
+        day = self._load_day(date_str)
+        if day is None:
+            return super().exists(date_str, platform, category)
+        return snapshot_key(platform, category) in day.get("sections", {})
+
+    def list_dates(self) -> List[str]:
+        dates = set(super().list_dates())
+        days_dir = os.path.join(self.catalog_dir, "days")
+        if os.path.isdir(days_dir):
+            dates.update(
+                name[:-len(".json")] for name in os.listdir(days_dir)
+                if name.endswith(".json") and is_valid_date(name[:-len(".json")])
+            )
+        return sorted(dates, reverse=True)
+
+    def flush(self) -> bool:
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            if not pending:
+                return True
+            try:
+                days = {}
+                for date_str in sorted(pending):
+                    day = self._load_day(date_str) or {"date": date_str, "sections": {}}
+                    for (platform, key), data in pending[date_str].items():
+                        day["sections"][key] = self._encode_section(date_str, platform, data)
+                    days[date_str] = day
+
+                # 先写目录再写排名表，排名表引用的序号一定存在
+                catalog_changed = self.catalog._dirty
+                if not self.catalog.save():
+                    return False
+                self._catalog_mtime = self._catalog_file_mtime()
+                if catalog_changed:
+                    self._count_write(os.path.getsize(self.catalog.file_path))
+                for date_str, day in days.items():
+                    self._count_write(write_json_atomic(day, self.day_path(date_str)))
+                return True
+            except OSError as e:
+                print(f"保存排名表失败: {e}")
+                return False
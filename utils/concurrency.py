@@ -0,0 +1,128 @@
+"""
+并发工具模块
+"""
+
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+
+class CategoryTask:
+    """单个分类的爬取任务"""
+
+    def __init__(self, label: str, host: str, func: Callable[[], int], key=None, priority: int = 0):
+        """
+        Args:
+            label: 任务名称（用于日志）
+            host: 目标主机
+            func: 执行函数，返回获取到的应用数量（失败返回0）
+            key: 任务标识（可选）
+            priority: 优先级，数值越小越先执行
+        """
+        self.label = label
+        self.key = key
+        self.host = host
+        self.func = func
+        self.priority = priority
+        self.app_count = 0
+        self.elapsed = 0.0
+        self.error = None
+
+
+class WorkScheduler:
+    """
+    工作队列调度器
+
+    多个工作线程从队列中取任务执行：总是取优先级最高、且所属主机仍有空闲并发名额的任务，
+    因此某个主机满载时，其他主机的任务不会被它阻塞。
+    """
+
+    def __init__(self, max_workers: int = 4, host_limits: Optional[Dict[str, int]] = None,
+                 default_host_limit: int = 1):
+        """
+        Args:
+            max_workers: 工作线程数
+            host_limits: 主机到最大并发数的映射
+            default_host_limit: 未配置主机的默认并发数
+        """
+        self.max_workers = max(1, int(max_workers))
+        self.host_limits = dict(host_limits or {})
+        self.default_host_limit = default_host_limit
+        self._pending = []
+        self._active = {}
+        self._condition = threading.Condition()
+
+    def _host_limit(self, host: str) -> int:
+        return max(1, int(self.host_limits.get(host, self.default_host_limit)))
+
+    def _next_task(self) -> Optional[CategoryTask]:
+        """取下一个可执行的任务（调用方持有锁）；队列为空返回 None"""
+        while self._pending:
+            for index, task in enumerate(self._pending):
+                if self._active.get(task.host, 0) < self._host_limit(task.host):
+                    self._active[task.host] = self._active.get(task.host, 0) + 1
+                    return self._pending.pop(index)
+            self._condition.wait()
+        return None
+
+    def _worker(self):
+        while True:
+            with self._condition:
+                task = self._next_task()
+            if task is None:
+                return
+
+            start = time.perf_counter()
+            try:
+                task.app_count = task.func() or 0
+            except Exception as e:
+                task.error = e
+            task.elapsed = time.perf_counter() - start
+
+            with self._condition:
+                self._active[task.host] -= 1
+                self._condition.notify_all()
+
+    def run(self, tasks: List[CategoryTask]) -> float:
+        """
+        执行全部任务，阻塞直到完成
+
+        Args:
+            tasks: 任务列表
+
+        Returns:
+            float: 总耗时（秒）
+        """
+        # 稳定排序：同优先级保持原有顺序
+        self._pending = sorted(tasks, key=lambda task: task.priority)
+        self._active = {}
+
+        start_time = time.perf_counter()
+        workers = [
+            threading.Thread(target=self._worker, daemon=True)
+            for _ in range(min(self.max_workers, len(tasks)))
+        ]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        return time.perf_counter() - start_time
+
+
+def run_category_tasks(tasks: List[CategoryTask], mode: str = "thread", max_workers: int = 4,
+                       host_limits: Optional[Dict[str, int]] = None) -> float:
+    """
+    执行分类爬取任务（顺序或按工作队列并发）
+
+    Args:
+        tasks: 任务列表
+        mode: thread / sequential
+        max_workers: 线程数
+        host_limits: 每主机并发上限
+
+    Returns:
+        float: 总耗时（秒）
+    """
+    if mode != "thread":
+        max_workers = 1
+    return WorkScheduler(max_workers, host_limits).run(tasks)
@@ -1,38 +1,336 @@
 """
 数据存储工具模块
+
+榜单数据支持以下保存格式（通过 open_ranking_store 选择）：
+- json：每个 日期/平台/分类 一个文件（默认，Web 页面直接读取）
+- snapshot：每天一个合并快照文件，头部记录各分区的字节偏移，可以只读取单个分类
+- catalog：应用目录 + 每日紧凑排名表（utils/catalog_store.py）
+- sqlite：全部日期保存在一个 SQLite 数据库中，按日期/分类和 app_id 建索引（utils/sqlite_store.py）
+- objects：内容相同的分类榜单只保存一份内容寻址对象，每天只保存引用（utils/object_store.py）
+
+较早日期的分文件可以合并为按月归档 raw/archive/{年-月}.archive（头部索引 + 逐个压缩的分类），
+读取分文件时找不到的日期自动从归档读取，所有存储格式和 Web 接口都能看到归档中的日期。
+
+JSON 文件可选 gzip / zstd 压缩（扩展名 .json.gz / .json.zst），load_from_json 按文件头自动识别。
+分文件格式下分类内容（去掉抓取时间等易变字段）与已保存的文件相同时不重写；各存储的 stats 记录写入的文件数和字节数。
+canonical 模式下 JSON 文件使用规范化布局（见 canonical_json），提交到 Git 时相邻日期的文件只有少量行不同。
 """
 
-import json
+import gzip
+import hashlib
+import importlib
 import os
-from datetime import datetime
-from typing import List, Dict
+import threading
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from utils import json_codec
+from utils.date_utils import is_valid_date
+
+try:
+    import zstandard
+    ZSTD_AVAILABLE = True
+except ImportError:
+    ZSTD_AVAILABLE = False
+
+
+# 合并快照文件的格式标识和版本
+SNAPSHOT_FORMAT = "appmonitor-snapshot"
+SNAPSHOT_VERSION = 1
+SNAPSHOT_SUFFIX = ".snapshot.jsonl"
+
+# 按月归档文件的格式标识和版本
+ARCHIVE_FORMAT = "appmonitor-archive"
+ARCHIVE_VERSION = 1
+ARCHIVE_SUFFIX = ".archive"
+
+# 压缩格式 -> 文件扩展名（追加在 .json 之后）
+COMPRESSION_SUFFIXES = {"gzip": ".gz", "zstd": ".zst"}
+
+# JSON 文件可能的扩展名（不压缩和各压缩格式）
+JSON_FILE_SUFFIXES = (".json",) + tuple(f".json{suffix}" for suffix in COMPRESSION_SUFFIXES.values())
+
+# 压缩格式的文件头魔数，读取时据此识别格式，与扩展名无关
+GZIP_MAGIC = b"\x1f\x8b"
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+
+# 默认压缩级别（gzip 1~9，zstd 1~22）
+DEFAULT_COMPRESSION_LEVELS = {"gzip": 6, "zstd": 3}
+
+# 应用数据中每次抓取都会变化、不属于榜单内容的字段（比较内容是否变化时忽略）
+VOLATILE_APP_FIELDS = ("timestamp",)
+
+
+def resolve_compression(compression: Optional[str]) -> Optional[str]:
+    """
+    检查配置的压缩格式
+
+    Args:
+        compression: None / "none" / "gzip" / "zstd"
+
+    Returns:
+        Optional[str]: 实际使用的压缩格式（不压缩为 None；zstandard 未安装时 zstd 退回 gzip）
+
+    Raises:
+        ValueError: 未知的压缩格式
+    """
+    if not compression or compression == "none":
+        return None
+    if compression not in COMPRESSION_SUFFIXES:
+        raise ValueError(f"未知的压缩格式: {compression}（可选: none, {', '.join(COMPRESSION_SUFFIXES)}）")
+    if compression == "zstd" and not ZSTD_AVAILABLE:
+        print("警告: zstandard 未安装，改用 gzip 压缩（pip install zstandard）")
+        return "gzip"
+    return compression
+
+
+def compression_from_path(file_path: str) -> Optional[str]:
+    """根据扩展名判断压缩格式（.json.gz -> gzip，.json.zst -> zstd，其他为 None）"""
+    for compression, suffix in COMPRESSION_SUFFIXES.items():
+        if file_path.endswith(suffix):
+            return compression
+    return None
+
+
+def compressed_path(file_path: str, compression: Optional[str]) -> str:
+    """在 .json 路径后追加压缩格式的扩展名（不压缩时原样返回）"""
+    return file_path + COMPRESSION_SUFFIXES[compression] if compression else file_path
+
+
+def find_json_file(file_path: str) -> Optional[str]:
+    """
+    查找 JSON 文件：原路径不存在时依次查找压缩后的同名文件
+
+    Args:
+        file_path: .json 文件路径
+
+    Returns:
+        Optional[str]: 存在的文件路径，都不存在返回 None
+    """
+    if os.path.exists(file_path):
+        return file_path
+    for suffix in COMPRESSION_SUFFIXES.values():
+        if os.path.exists(file_path + suffix):
+            return file_path + suffix
+    return None
+
+
+def canonical_json(data: Dict) -> bytes:
+    """
+    规范化 JSON 布局（提交到 Git 的数据使用）
+
+    键按字母排序；顶层每个键一行，应用列表（元素为对象的列表）中每个应用一行，
+    并去掉每个应用的抓取时间。相邻日期的同一分类只有排名或评分变化的应用所在行不同，
+    Git 打包时增量压缩效果好，diff 也只包含真正变化的行。结果仍是合法的 JSON。
+
+    Args:
+        data: 要保存的数据
+
+    Returns:
+        bytes: 文件内容（以换行结尾）
+    """
+    if not isinstance(data, dict):
+        return json_codec.dumps(data, sort_keys=True) + b"\n"
+    lines = []
+    for key in sorted(data):
+        value = data[key]
+        name = json_codec.dumps(key)
+        if isinstance(value, list) and value and all(isinstance(item, dict) for item in value):
+            records = [
+                json_codec.dumps(
+                    {field: item[field] for field in item if field not in VOLATILE_APP_FIELDS}, sort_keys=True
+                )
+                for item in value
+            ]
+            lines.append(name + b": [\n" + b",\n".join(records) + b"\n]")
+        else:
+            lines.append(name + b": " + json_codec.dumps(value, sort_keys=True))
+    return b"{\n" + b",\n".join(lines) + b"\n}\n"
+
+
+def encode_json(data: Dict, compression: Optional[str] = None, level: Optional[int] = None,
+                canonical: bool = False) -> bytes:
+    """
+    序列化为 JSON 字节（不压缩时保持 indent=2 便于查看，压缩时使用紧凑格式）
+
+    Args:
+        data: 要保存的数据
+        compression: 压缩格式（None / gzip / zstd）
+        level: 压缩级别（默认见 DEFAULT_COMPRESSION_LEVELS）
+        canonical: 使用规范化布局（见 canonical_json，压缩时压缩规范化后的内容）
+
+    Returns:
+        bytes: 文件内容
+
+    Raises:
+        ImportError: 使用 zstd 但 zstandard 未安装
+    """
+    if canonical:
+        payload = canonical_json(data)
+    elif not compression:
+        return json_codec.dumps(data, pretty=True)
+    else:
+        payload = json_codec.dumps(data)
+    return compress_bytes(payload, compression, level)
+
+
+def compress_bytes(payload: bytes, compression: Optional[str] = None, level: Optional[int] = None) -> bytes:
+    """
+    压缩字节（compression 为 None 时原样返回）
+
+    Raises:
+        ImportError: 使用 zstd 但 zstandard 未安装
+    """
+    if not compression:
+        return payload
+    level = level or DEFAULT_COMPRESSION_LEVELS[compression]
+    if compression == "gzip":
+        # mtime=0：相同内容得到相同的文件，不会因为重写产生 git 差异
+        return gzip.compress(payload, compresslevel=level, mtime=0)
+    if compression == "zstd":
+        if not ZSTD_AVAILABLE:
+            raise ImportError("zstandard 未安装，请运行: pip install zstandard")
+        return zstandard.ZstdCompressor(level=level).compress(payload)
+    raise ValueError(f"未知的压缩格式: {compression}")
+
+
+def decompress_json(raw: bytes) -> bytes:
+    """
+    按文件头魔数解压 gzip / zstd，未压缩的数据原样返回（不解析 JSON）
+
+    Raises:
+        ImportError: 数据为 zstd 压缩但 zstandard 未安装
+    """
+    if raw.startswith(GZIP_MAGIC):
+        return gzip.decompress(raw)
+    if raw.startswith(ZSTD_MAGIC):
+        if not ZSTD_AVAILABLE:
+            raise ImportError("zstandard 未安装，无法读取 zstd 压缩文件")
+        # 流式解压：不依赖帧头中记录的原始大小
+        return zstandard.ZstdDecompressor().decompressobj().decompress(raw)
+    return raw
+
+
+def decode_json(raw: bytes):
+    """
+    解析 JSON 字节，按文件头魔数自动解压 gzip / zstd
+
+    Raises:
+        ImportError: 数据为 zstd 压缩但 zstandard 未安装
+        ValueError: 不是合法的 JSON
+    """
+    return json_codec.loads(decompress_json(raw))
 
 
-def save_to_json(data: Dict, file_path: str) -> bool:
+def save_to_json(data: Dict, file_path: str, compression: Optional[str] = None,
+                 level: Optional[int] = None, canonical: bool = False) -> bool:
     """
     保存数据到JSON文件
 
     Args:
         data: 要保存的数据
         file_path: 文件路径
+        compression: 压缩格式（None / gzip / zstd，默认按扩展名 .gz / .zst 判断）
+        level: 压缩级别（可选）
+        canonical: 使用规范化布局（见 canonical_json）
 
     Returns:
         bool: 是否成功
     """
     try:
+        content = encode_json(data, compression or compression_from_path(file_path), level, canonical)
         os.makedirs(os.path.dirname(file_path), exist_ok=True)
-        with open(file_path, 'w', encoding='utf-8') as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
+        with open(file_path, 'wb') as f:
+            f.write(content)
         return True
     except Exception as e:
         print(f"保存JSON文件失败: {e}")
         return False
 
 
+def save_compressed_json(data: Dict, file_path: str, compression: Optional[str] = None,
+                         canonical: bool = False) -> bool:
+    """
+    按压缩格式保存 .json 路径对应的文件，并删除其他格式的同名旧文件（避免切换压缩格式后读到旧数据）
+
+    Args:
+        data: 要保存的数据
+        file_path: .json 文件路径（压缩时实际保存为 .json.gz / .json.zst）
+        compression: 压缩格式（None / gzip / zstd）
+        canonical: 使用规范化布局（见 canonical_json）
+
+    Returns:
+        bool: 是否成功
+    """
+    target_path = compressed_path(file_path, compression)
+    if not save_to_json(data, target_path, compression, canonical=canonical):
+        return False
+    for suffix in ("",) + tuple(COMPRESSION_SUFFIXES.values()):
+        if file_path + suffix != target_path and os.path.exists(file_path + suffix):
+            os.remove(file_path + suffix)
+    return True
+
+
+def normalized_content(data: Dict, drop_date: bool = False) -> Dict:
+    """
+    去掉易变字段后的分类内容（每个应用的抓取时间）
+
+    Args:
+        data: 分类数据
+        drop_date: 是否同时去掉日期（跨日期比较内容时使用）
+
+    Returns:
+        Dict: 新字典，不修改原数据
+    """
+    content = {key: value for key, value in data.items() if not (drop_date and key == "date")}
+    if isinstance(content.get("apps"), list):
+        content["apps"] = [
+            {key: value for key, value in app.items() if key not in VOLATILE_APP_FIELDS}
+            if isinstance(app, dict) else app
+            for app in content["apps"]
+        ]
+    return content
+
+
+def content_digest(data: Dict) -> str:
+    """
+    内容摘要（SHA-256，与键顺序无关；比较分类内容前先用 normalized_content 去掉易变字段）
+
+    Returns:
+        str: 十六进制摘要
+    """
+    return hashlib.sha256(json_codec.dumps(data, sort_keys=True)).hexdigest()
+
+
+def save_json_if_changed(data: Dict, file_path: str, compression: Optional[str] = None,
+                         canonical: bool = False) -> Optional[int]:
+    """
+    内容有变化时才保存 .json 路径对应的文件（见 save_compressed_json），只有易变字段不同时保留原文件
+
+    Args:
+        data: 要保存的数据
+        file_path: .json 文件路径
+        compression: 压缩格式（None / gzip / zstd）
+        canonical: 使用规范化布局（见 canonical_json）
+
+    Returns:
+        Optional[int]: 写入的字节数（内容未变化为 0），失败返回 None
+    """
+    target_path = compressed_path(file_path, compression)
+    if os.path.exists(target_path):
+        existing = load_from_json(target_path)
+        if existing and content_digest(normalized_content(existing)) == content_digest(normalized_content(data)):
+            return 0
+    if not save_compressed_json(data, file_path, compression, canonical):
+        return None
+    return os.path.getsize(target_path)
+
+
 def load_from_json(file_path: str) -> Dict:
     """
     从JSON文件加载数据
 
+    按文件头识别 gzip / zstd 压缩；.json 文件不存在时读取压缩后的同名文件（.json.gz / .json.zst）
+
     Args:
         file_path: 文件路径
 
@@ -40,26 +338,631 @@ def load_from_json(file_path: str) -> Dict:
         Dict: 加载的数据，失败返回空字典
     """
     try:
-        if not os.path.exists(file_path):
+        file_path = find_json_file(file_path)
+        if file_path is None:
             return {}
-        with open(file_path, 'r', encoding='utf-8') as f:
-            return json.load(f)
+        with open(file_path, 'rb') as f:
+            return decode_json(f.read())
     except Exception as e:
         print(f"加载JSON文件失败: {e}")
         return {}
 
 
-def get_data_file_path(date_str: str, platform: str, category: str, base_dir: str) -> str:
+def write_json_atomic(data: Dict, file_path: str) -> int:
+    """
+    保存紧凑 JSON（先写临时文件再替换，并发读取时不会读到半个文件）
+
+    Args:
+        data: 要保存的数据
+        file_path: 文件路径
+
+    Returns:
+        int: 写入的字节数
+
+    Raises:
+        OSError: 写入失败
+    """
+    os.makedirs(os.path.dirname(file_path), exist_ok=True)
+    tmp_path = f"{file_path}.{threading.get_ident()}.tmp"
+    raw = json_codec.dumps(data)
+    with open(tmp_path, 'wb') as f:
+        f.write(raw)
+    os.replace(tmp_path, file_path)
+    return len(raw)
+
+
+def get_data_file_path(date_str: str, platform: str, category: str, base_dir: str,
+                       country: str = None, collection: str = None) -> str:
     """
     获取数据文件路径
 
+    主商店（默认国家和榜单）的数据保存在 raw/{日期}/{平台}/{分类}.json；
+    其他国家/榜单类型增加两级目录：raw/{日期}/{平台}/{国家}/{榜单类型}/{分类}.json
+
     Args:
         date_str: 日期字符串（YYYY-MM-DD）
         platform: 平台（app_store / google_play）
         category: 分类
         base_dir: 基础目录
+        country: 国家代码（可选，主商店不传）
+        collection: 榜单类型（可选，主商店不传）
 
     Returns:
         str: 文件路径
     """
+    if country and collection:
+        return os.path.join(
+            base_dir, "raw", date_str, platform, country.lower(), collection.lower(), f"{category}.json"
+        )
     return os.path.join(base_dir, "raw", date_str, platform, f"{category}.json")
+
+
+def get_snapshot_path(date_str: str, base_dir: str) -> str:
+    """
+    获取合并快照文件路径：raw/{日期}.snapshot.jsonl
+
+    Args:
+        date_str: 日期字符串（YYYY-MM-DD）
+        base_dir: 基础目录
+
+    Returns:
+        str: 文件路径
+    """
+    return os.path.join(base_dir, "raw", f"{date_str}{SNAPSHOT_SUFFIX}")
+
+
+def snapshot_key(platform: str, category: str, country: str = None, collection: str = None) -> str:
+    """
+    获取分类在合并快照中的分区名，与 get_data_file_path 的目录层级一致
+
+    Returns:
+        str: 如 app_store/games、app_store/jp/top_paid/games
+    """
+    if country and collection:
+        return f"{platform}/{country.lower()}/{collection.lower()}/{category}"
+    return f"{platform}/{category}"
+
+
+class SnapshotWriter:
+    """
+    合并快照写入器（支持 with 语句，正常退出时写入文件）
+
+    文件格式（JSON Lines）：
+        第1行  头部 {"format", "version", "date", "sections": {分区名: [偏移, 长度]}}
+        之后   每个分区一行紧凑 JSON，偏移从头部之后开始计算
+    """
+
+    def __init__(self, file_path: str, date_str: Optional[str] = None):
+        """
+        Args:
+            file_path: 快照文件路径
+            date_str: 快照日期（写入头部）
+        """
+        self.file_path = file_path
+        self.date = date_str
+        self._sections = {}
+
+    def add(self, key: str, data: Dict):
+        """添加（或覆盖）一个分区"""
+        self.add_raw(key, json_codec.dumps(data))
+
+    def add_raw(self, key: str, raw: bytes):
+        """添加已序列化的分区（迁移或合并时直接复制，不重新解析）"""
+        self._sections[key] = raw
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._sections
+
+    def close(self) -> bool:
+        """
+        写入文件（先写临时文件再替换）
+
+        Returns:
+            bool: 是否成功
+        """
+        index = {}
+        offset = 0
+        for key in sorted(self._sections):
+            length = len(self._sections[key])
+            index[key] = [offset, length]
+            offset += length + 1
+
+        header = {
+            "format": SNAPSHOT_FORMAT,
+            "version": SNAPSHOT_VERSION,
+            "date": self.date,
+            "sections": index
+        }
+        try:
+            os.makedirs(os.path.dirname(self.file_path), exist_ok=True)
+            tmp_path = f"{self.file_path}.{threading.get_ident()}.tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(json_codec.dumps(header))
+                f.write(b"\n")
+                for key in sorted(self._sections):
+                    f.write(self._sections[key])
+                    f.write(b"\n")
+            os.replace(tmp_path, self.file_path)
+            return True
+        except Exception as e:
+            print(f"保存快照文件失败: {e}")
+            return False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+
+
+class SnapshotReader:
+    """
+    合并快照读取器（支持 with 语句）
+
+    打开时只解析头部，读取分区时按偏移 seek，不解析其他分区。
+    """
+
+    def __init__(self, file_path: str):
+        """
+        Args:
+            file_path: 快照文件路径
+
+        Raises:
+            OSError: 文件无法打开
+            ValueError: 不是合并快照文件
+        """
+        self.file_path = file_path
+        self._file = open(file_path, 'rb')
+        try:
+            header = json_codec.loads(self._file.readline())
+            if header.get("format") != SNAPSHOT_FORMAT:
+                raise ValueError(f"不是快照文件: {file_path}")
+        except Exception:
+            self._file.close()
+            raise
+        self._body_start = self._file.tell()
+        self.date = header.get("date")
+        self.sections = header.get("sections", {})
+
+    def keys(self) -> List[str]:
+        """全部分区名"""
+        return list(self.sections)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.sections
+
+    def read_raw(self, key: str) -> Optional[bytes]:
+        """读取分区的原始字节，不存在返回 None"""
+        if key not in self.sections:
+            return None
+        offset, length = self.sections[key]
+        self._file.seek(self._body_start + offset)
+        return self._file.read(length)
+
+    def read(self, key: str) -> Dict:
+        """读取并解析分区，不存在返回空字典"""
+        raw = self.read_raw(key)
+        return json_codec.loads(raw) if raw is not None else {}
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def save_snapshot(sections: Dict[str, Dict], file_path: str, date_str: Optional[str] = None,
+                  merge: bool = True) -> bool:
+    """
+    保存合并快照
+
+    Args:
+        sections: 分区名 -> 数据
+        file_path: 快照文件路径
+        date_str: 快照日期
+        merge: 是否保留已有文件中未被覆盖的分区（按原始字节复制）
+
+    Returns:
+        bool: 是否成功
+    """
+    writer = SnapshotWriter(file_path, date_str)
+    if merge and os.path.exists(file_path):
+        try:
+            with SnapshotReader(file_path) as reader:
+                writer.date = writer.date or reader.date
+                for key in reader.keys():
+                    if key not in sections:
+                        writer.add_raw(key, reader.read_raw(key))
+        except Exception as e:
+            print(f"读取已有快照失败，将覆盖: {e}")
+    for key, data in sections.items():
+        writer.add(key, data)
+    return writer.close()
+
+
+def load_snapshot(file_path: str, key: Optional[str] = None) -> Dict:
+    """
+    从合并快照加载数据
+
+    Args:
+        file_path: 快照文件路径
+        key: 分区名（可选，不传返回全部分区）
+
+    Returns:
+        Dict: 指定分区的数据，或 分区名 -> 数据；失败返回空字典
+    """
+    try:
+        if not os.path.exists(file_path):
+            return {}
+        with SnapshotReader(file_path) as reader:
+            if key is not None:
+                return reader.read(key)
+            return {name: reader.read(name) for name in reader.keys()}
+    except Exception as e:
+        print(f"加载快照文件失败: {e}")
+        return {}
+
+
+def get_archive_path(month: str, base_dir: str) -> str:
+    """
+    获取按月归档文件路径：raw/archive/{年-月}.archive
+
+    Args:
+        month: 月份（YYYY-MM）
+        base_dir: 基础目录
+
+    Returns:
+        str: 文件路径
+    """
+    return os.path.join(base_dir, "raw", "archive", f"{month}{ARCHIVE_SUFFIX}")
+
+
+def archive_key(date_str: str, key: str) -> str:
+    """归档中的条目名：日期/分区名（分区名见 snapshot_key）"""
+    return f"{date_str}/{key}"
+
+
+class MonthlyArchive:
+    """
+    按月归档读取器
+
+    文件格式：
+        第1行  头部 {"format", "version", "month", "entries": {日期/分区名: [偏移, 长度]}}
+        之后   每个分类文件的原始内容单独压缩（gzip / zstd）后依次拼接，偏移从头部之后开始计算
+
+    打开时只解析头部，读取分类时按偏移 seek 并只解压这一项。
+    """
+
+    def __init__(self, file_path: str):
+        """
+        Args:
+            file_path: 归档文件路径
+
+        Raises:
+            OSError: 文件无法打开
+            ValueError: 不是归档文件
+        """
+        self.file_path = file_path
+        with open(file_path, 'rb') as f:
+            header = json_codec.loads(f.readline())
+            self._body_start = f.tell()
+        if header.get("format") != ARCHIVE_FORMAT:
+            raise ValueError(f"不是归档文件: {file_path}")
+        self.month = header.get("month")
+        self.entries = header.get("entries", {})
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.entries
+
+    def keys(self) -> List[str]:
+        """全部条目名"""
+        return list(self.entries)
+
+    def dates(self) -> List[str]:
+        """归档中的日期（升序）"""
+        return sorted({key.split("/", 1)[0] for key in self.entries})
+
+    def read_raw(self, key: str) -> Optional[bytes]:
+        """读取条目压缩后的原始字节，不存在返回 None"""
+        if key not in self.entries:
+            return None
+        offset, length = self.entries[key]
+        with open(self.file_path, 'rb') as f:
+            f.seek(self._body_start + offset)
+            return f.read(length)
+
+    def read(self, key: str) -> Dict:
+        """读取并解析条目，不存在返回空字典"""
+        raw = self.read_raw(key)
+        return decode_json(raw) if raw is not None else {}
+
+
+def write_archive(file_path: str, month: str, entries: Dict[str, bytes]) -> bool:
+    """
+    写入按月归档（先写临时文件再替换）
+
+    Args:
+        file_path: 归档文件路径
+        month: 月份（YYYY-MM）
+        entries: 条目名 -> 已压缩的内容（见 compress_bytes）
+
+    Returns:
+        bool: 是否成功
+    """
+    index = {}
+    offset = 0
+    for key in sorted(entries):
+        index[key] = [offset, len(entries[key])]
+        offset += len(entries[key])
+    header = {"format": ARCHIVE_FORMAT, "version": ARCHIVE_VERSION, "month": month, "entries": index}
+    try:
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        tmp_path = f"{file_path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(json_codec.dumps(header))
+            f.write(b"\n")
+            for key in sorted(entries):
+                f.write(entries[key])
+        os.replace(tmp_path, file_path)
+        return True
+    except Exception as e:
+        print(f"保存归档文件失败: {e}")
+        return False
+
+
+class JsonRankingStore:
+    """按 日期/平台/分类 分文件保存榜单（默认格式，较早的日期可以从按月归档读取）"""
+
+    storage_format = "json"
+
+    def __init__(self, base_dir: str, compression: Optional[str] = None, canonical: bool = False):
+        """
+        Args:
+            base_dir: 数据根目录（其下的 raw/ 保存榜单）
+            compression: 分类文件的压缩格式（None / gzip / zstd，保存为 {分类}.json.gz 等）
+            canonical: 分类文件使用规范化布局（见 canonical_json）
+        """
+        self.base_dir = base_dir
+        self.compression = resolve_compression(compression)
+        self.canonical = canonical
+        # 写入统计：写入的文件数、内容未变化而跳过的文件数、写入的字节数
+        self.stats = {"files_written": 0, "files_skipped": 0, "bytes_written": 0}
+        self._stats_lock = threading.Lock()
+        # 月份 -> (修改时间, 归档)，归档被重写后重新读取头部
+        self._archives = {}
+
+    def _archive(self, month: str) -> Optional[MonthlyArchive]:
+        """指定月份的归档（不存在返回 None）"""
+        path = get_archive_path(month, self.base_dir)
+        try:
+            mtime = os.path.getmtime(path)
+        except OSError:
+            return None
+        cached = self._archives.get(month)
+        if cached is None or cached[0] != mtime:
+            try:
+                cached = (mtime, MonthlyArchive(path))
+            except (OSError, ValueError) as e:
+                print(f"读取归档失败: {e}")
+                return None
+            self._archives[month] = cached
+        return cached[1]
+
+    def _archived(self, date_str: str, key: str) -> Optional[MonthlyArchive]:
+        """包含指定分类的归档（没有归档返回 None）"""
+        archive = self._archive(date_str[:7])
+        if archive is not None and archive_key(date_str, key) in archive:
+            return archive
+        return None
+
+    def _count_write(self, bytes_written: int):
+        """记录一次写入（0 字节表示内容未变化、跳过写入）"""
+        with self._stats_lock:
+            if bytes_written:
+                self.stats["files_written"] += 1
+                self.stats["bytes_written"] += bytes_written
+            else:
+                self.stats["files_skipped"] += 1
+
+    def save_category(self, date_str: str, platform: str, category: str, data: Dict,
+                      country: str = None, collection: str = None) -> bool:
+        """
+        保存单个分类的榜单（内容未变化时不重写）
+
+        Returns:
+            bool: 是否成功（缓冲写入的格式在 flush 时才落盘）
+        """
+        file_path = get_data_file_path(date_str, platform, category, self.base_dir, country, collection)
+        bytes_written = save_json_if_changed(data, file_path, self.compression, self.canonical)
+        if bytes_written is None:
+            return False
+        self._count_write(bytes_written)
+        return True
+
+    def load_category(self, date_str: str, platform: str, category: str,
+                      country: str = None, collection: str = None) -> Dict:
+        """
+        加载单个分类的榜单
+
+        Returns:
+            Dict: 与保存时相同的数据，不存在返回空字典
+        """
+        file_path = get_data_file_path(date_str, platform, category, self.base_dir, country, collection)
+        if find_json_file(file_path) is None:
+            key = snapshot_key(platform, category, country, collection)
+            archive = self._archived(date_str, key)
+            if archive is not None:
+                return archive.read(archive_key(date_str, key))
+        return load_from_json(file_path)
+
+    def exists(self, date_str: str, platform: str, category: str) -> bool:
+        """指定日期的主商店分类是否有数据"""
+        if find_json_file(get_data_file_path(date_str, platform, category, self.base_dir)) is not None:
+            return True
+        return self._archived(date_str, snapshot_key(platform, category)) is not None
+
+    def list_dates(self) -> List[str]:
+        """
+        有数据的日期列表（含按月归档中的日期）
+
+        Returns:
+            List[str]: 日期列表（最新的在前）
+        """
+        raw_dir = os.path.join(self.base_dir, "raw")
+        if not os.path.isdir(raw_dir):
+            return []
+        dates = {
+            name for name in os.listdir(raw_dir)
+            if os.path.isdir(os.path.join(raw_dir, name)) and is_valid_date(name)
+        }
+        archive_dir = os.path.join(raw_dir, "archive")
+        if os.path.isdir(archive_dir):
+            for name in os.listdir(archive_dir):
+                if name.endswith(ARCHIVE_SUFFIX):
+                    archive = self._archive(name[:-len(ARCHIVE_SUFFIX)])
+                    if archive is not None:
+                        dates.update(archive.dates())
+        return sorted(dates, reverse=True)
+
+    def flush(self) -> bool:
+        """写入缓冲的数据（分文件格式立即写入，无需操作）"""
+        return True
+
+    def close(self):
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+class SnapshotRankingStore(JsonRankingStore):
+    """
+    每天一个合并快照文件
+
+    save_category 只缓存在内存中，flush 时每个日期写一次快照（保留快照中未更新的分区）；
+    读取时没有快照的日期回退到分文件格式，便于逐步迁移。
+    """
+
+    storage_format = "snapshot"
+
+    def __init__(self, base_dir: str, compression: Optional[str] = None, canonical: bool = False):
+        super().__init__(base_dir, compression, canonical)
+        self._pending = {}
+        self._lock = threading.Lock()
+
+    def save_category(self, date_str: str, platform: str, category: str, data: Dict,
+                      country: str = None, collection: str = None) -> bool:
+        with self._lock:
+            self._pending.setdefault(date_str, {})[snapshot_key(platform, category, country, collection)] = data
+        return True
+
+    def load_category(self, date_str: str, platform: str, category: str,
+                      country: str = None, collection: str = None) -> Dict:
+        key = snapshot_key(platform, category, country, collection)
+        with self._lock:
+            pending = self._pending.get(date_str, {})
+            if key in pending:
+                return pending[key]
+
+        snapshot_path = get_snapshot_path(date_str, self.base_dir)
+        if os.path.exists(snapshot_path):
+            return load_snapshot(snapshot_path, key)
+        return super().load_category(date_str, platform, category, country, collection)
+
+    def exists(self, date_str: str, platform: str, category: str) -> bool:
+        snapshot_path = get_snapshot_path(date_str, self.base_dir)
+        if os.path.exists(snapshot_path):
+            try:
+                with SnapshotReader(snapshot_path) as reader:
+                    return snapshot_key(platform, category) in reader
+            except (OSError, ValueError):
+                return False
+        return super().exists(date_str, platform, category)
+
+    def list_dates(self) -> List[str]:
+        dates = set(super().list_dates())
+        raw_dir = os.path.join(self.base_dir, "raw")
+        if os.path.isdir(raw_dir):
+            dates.update(
+                name[:-len(SNAPSHOT_SUFFIX)] for name in os.listdir(raw_dir)
+                if name.endswith(SNAPSHOT_SUFFIX) and is_valid_date(name[:-len(SNAPSHOT_SUFFIX)])
+            )
+        return sorted(dates, reverse=True)
+
+    def flush(self) -> bool:
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        success = True
+        for date_str, sections in pending.items():
+            snapshot_path = get_snapshot_path(date_str, self.base_dir)
+            if save_snapshot(sections, snapshot_path, date_str):
+                self._count_write(os.path.getsize(snapshot_path))
+            else:
+                success = False
+        return success
+
+
+# 存储格式 -> 存储类（其他模块中的存储类为 "模块:类名"，使用时才导入）
+RANKING_STORES = {
+    "json": JsonRankingStore,
+    "snapshot": SnapshotRankingStore,
+    "catalog": "utils.catalog_store:CatalogRankingStore",
+    "sqlite": "utils.sqlite_store:SqliteRankingStore",
+    "objects": "utils.object_store:ObjectRankingStore"
+}
+
+
+def open_ranking_store(base_dir: str, storage_format: str = "json", compression: Optional[str] = None,
+                       canonical: bool = False):
+    """
+    打开榜单存储
+
+    Args:
+        base_dir: 数据根目录
+        storage_format: 存储格式（见 RANKING_STORES）
+        compression: 分文件的压缩格式（None / gzip / zstd，其他格式回退读取分文件时同样识别）
+        canonical: json / objects 格式的文件使用规范化布局（见 canonical_json）
+
+    Returns:
+        榜单存储对象（save_category / load_category / exists / list_dates / flush / close）
+
+    Raises:
+        ValueError: 未知的存储格式
+    """
+    if storage_format not in RANKING_STORES:
+        raise ValueError(f"未知的存储格式: {storage_format}（可选: {', '.join(RANKING_STORES)}）")
+    store_class = RANKING_STORES[storage_format]
+    if isinstance(store_class, str):
+        module_name, class_name = store_class.split(":")
+        store_class = getattr(importlib.import_module(module_name), class_name)
+    return store_class(base_dir, compression, canonical)
+
+
+def iter_store_days(store, categories: Dict[str, Iterable[str]]) -> Iterator[Tuple[str, Dict]]:
+    """
+    按日期升序遍历存储中主商店的全部分类（重建排名立方体、应用历史等派生数据时使用）
+
+    Args:
+        store: 榜单存储（open_ranking_store 的返回值）
+        categories: 平台 -> 分类列表
+
+    Yields:
+        Tuple: (日期, {(平台, 分类): 应用列表})，没有数据的分类不包含在内
+    """
+    for date_str in sorted(store.list_dates()):
+        sections = {}
+        for platform, platform_categories in categories.items():
+            for category in platform_categories:
+                apps = store.load_category(date_str, platform, category).get("apps")
+                if apps:
+                    sections[(platform, category)] = apps
+        if sections:
+            yield date_str, sections
+
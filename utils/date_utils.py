@@ -15,17 +15,19 @@ def get_yesterday() -> str:
     return (datetime.now() - timedelta(days=1)).strftime("%Y-%m-%d")
 
 
-def get_date_before(days: int) -> str:
+def get_date_before(days: int, base_date: str = None) -> str:
     """
     获取N天前的日期字符串
 
     Args:
         days: 天数
+        base_date: 基准日期（YYYY-MM-DD），默认今天
 
     Returns:
         str: 日期字符串（YYYY-MM-DD）
     """
-    return (datetime.now() - timedelta(days=days)).strftime("%Y-%m-%d")
+    base = datetime.strptime(base_date, "%Y-%m-%d") if base_date else datetime.now()
+    return (base - timedelta(days=days)).strftime("%Y-%m-%d")
 
 
 def is_valid_date(date_str: str) -> bool:
@@ -0,0 +1,166 @@
+"""
+新上榜识别引擎
+一天的主商店榜单只加载一次（各分类文件并行读取），按 app_id 建立索引；
+同一份数据可以与多个对比日期比较，多次识别（回填多个日期、对比窗口）时已加载的日期直接复用
+"""
+
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+# 并行读取分类文件的线程数
+DEFAULT_READ_WORKERS = 8
+
+# 缓存的日期数（超出后淘汰最久未使用的日期）
+DEFAULT_CACHE_DAYS = 16
+
+# 分区：(平台, 分类)
+Section = Tuple[str, str]
+
+
+class DaySnapshot:
+    """
+    一天的主商店榜单
+    """
+
+    def __init__(self, date_str: str, sections: Dict[Section, List[Dict]]):
+        """
+        Args:
+            date_str: 日期
+            sections: 分区 -> 应用列表（没有数据的分区不包含在内）
+        """
+        self.date = date_str
+        self.sections = sections
+        # 分区 -> {app_id: 应用}
+        self.index: Dict[Section, Dict[str, Dict]] = {
+            section: {app["app_id"]: app for app in apps if app.get("app_id")}
+            for section, apps in sections.items()
+        }
+
+    def has(self, section: Section) -> bool:
+        """分区当天是否有数据"""
+        return section in self.sections
+
+    def charted_in(self, app_id: str, section: Section) -> bool:
+        """应用当天是否在该分区的榜单上"""
+        return app_id in self.index.get(section, ())
+
+
+class DetectionEngine:
+    """
+    新上榜识别引擎（线程安全）
+    """
+
+    def __init__(self, store, categories: Dict[str, Iterable[str]],
+                 read_workers: int = DEFAULT_READ_WORKERS, cache_days: int = DEFAULT_CACHE_DAYS):
+        """
+        Args:
+            store: 榜单存储（open_ranking_store 的返回值）
+            categories: 平台 -> 分类列表
+            read_workers: 并行读取分类文件的线程数
+            cache_days: 缓存的日期数
+        """
+        self.store = store
+        self.sections: List[Section] = [
+            (platform, category) for platform, platform_categories in categories.items()
+            for category in platform_categories
+        ]
+        self.read_workers = max(1, read_workers)
+        self.cache_days = max(2, cache_days)
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self._executor = None
+        # 读取统计：实际加载的日期数、命中缓存的次数
+        self.stats = {"loads": 0, "hits": 0}
+
+    def _load_apps(self, date_str: str, section: Section) -> List[Dict]:
+        return self.store.load_category(date_str, *section).get("apps") or []
+
+    def load(self, date_str: str) -> DaySnapshot:
+        """
+        加载一天的榜单（已加载的日期直接返回缓存）
+
+        Args:
+            date_str: 日期
+
+        Returns:
+            DaySnapshot: 当天的榜单和 app_id 索引
+        """
+        with self._lock:
+            snapshot = self._cache.get(date_str)
+            if snapshot is not None:
+                self._cache.move_to_end(date_str)
+                self.stats["hits"] += 1
+                return snapshot
+
+        workers = min(self.read_workers, len(self.sections))
+        if workers > 1:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="detection-read")
+            apps = list(self._executor.map(lambda section: self._load_apps(date_str, section), self.sections))
+        else:
+            apps = [self._load_apps(date_str, section) for section in self.sections]
+        snapshot = DaySnapshot(date_str, {
+            section: section_apps for section, section_apps in zip(self.sections, apps) if section_apps
+        })
+
+        with self._lock:
+            self._cache[date_str] = snapshot
+            self._cache.move_to_end(date_str)
+            while len(self._cache) > self.cache_days:
+                self._cache.popitem(last=False)
+            self.stats["loads"] += 1
+        return snapshot
+
+    def new_entries(self, date_str: str, compare_date: str) -> Dict[Section, Optional[List[Dict]]]:
+        """
+        一次遍历找出各分区的新上榜应用（当天在该分区上榜、对比日期不在该分区）
+
+        Args:
+            date_str: 日期
+            compare_date: 对比日期
+
+        Returns:
+            Dict: 分区 -> 新上榜应用列表（按当天排名顺序）；当天或对比日期没有数据的分区为 None
+        """
+        today = self.load(date_str)
+        before = self.load(compare_date)
+        result = {}
+        for section in self.sections:
+            if not today.has(section) or not before.has(section):
+                result[section] = None
+                continue
+            # 集合差在 app_id 键上完成，再按当天排名顺序取出应用
+            new_ids = today.index[section].keys() - before.index[section].keys()
+            result[section] = [app for app in today.sections[section] if app.get("app_id") in new_ids]
+        return result
+
+    def detect(self, date_str: str, compare_dates: Iterable[str]) -> Dict[str, Dict[Section, Optional[List[Dict]]]]:
+        """
+        与多个对比日期分别比较（当天的数据只加载一次）
+
+        Args:
+            date_str: 日期
+            compare_dates: 对比日期列表
+
+        Returns:
+            Dict: 对比日期 -> new_entries 的结果
+        """
+        return {compare_date: self.new_entries(date_str, compare_date) for compare_date in compare_dates}
+
+    def close(self):
+        """关闭读取线程池并清空缓存"""
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown()
+                self._executor = None
+            self._cache.clear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -0,0 +1,73 @@
+"""
+JSON 编解码模块
+安装了 orjson 时使用 orjson（编解码快数倍，直接输出 bytes），未安装时使用标准库 json。
+两种实现都输出 UTF-8、不转义非 ASCII 字符，pretty 为 2 格缩进，否则为紧凑格式；
+NaN / Infinity 两者都写为 null（标准库默认写出的 NaN 不是合法 JSON，orjson 无法读取）。
+常见数据（字符串、整数、普通小数）输出的字节相同，但浮点数的写法并不总是一致
+（如 1e16：orjson 为 1e16，标准库为 1e+16），不能依赖两种实现逐字节相同
+"""
+
+import json
+import math
+from typing import Any, Callable, Optional, Union
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+
+def dumps(data: Any, pretty: bool = False, default: Optional[Callable] = None, sort_keys: bool = False) -> bytes:
+    """
+    序列化为 JSON 字节
+
+    Args:
+        data: 要序列化的数据
+        pretty: 是否 2 格缩进（只用于需要人工查看的文件，其他一律紧凑）
+        default: 无法序列化的对象的转换函数（可选）
+        sort_keys: 是否按键排序（计算内容摘要等需要与键顺序无关的场景）
+
+    Returns:
+        bytes: UTF-8 编码的 JSON
+    """
+    if ORJSON_AVAILABLE:
+        try:
+            option = (orjson.OPT_INDENT_2 if pretty else 0) | (orjson.OPT_SORT_KEYS if sort_keys else 0)
+            return orjson.dumps(data, default=default, option=option)
+        except TypeError:
+            # orjson 不支持的数据（非字符串键、超过 64 位的整数等）交给标准库
+            pass
+    options = {"indent": 2} if pretty else {"separators": (",", ":")}
+    try:
+        text = json.dumps(data, ensure_ascii=False, allow_nan=False, default=default, sort_keys=sort_keys, **options)
+    except ValueError:
+        # 含 NaN / Infinity：与 orjson 相同写为 null
+        text = json.dumps(_finite(data), ensure_ascii=False, allow_nan=False, default=default,
+                          sort_keys=sort_keys, **options)
+    return text.encode('utf-8')
+
+
+def _finite(data: Any) -> Any:
+    """把 NaN / Infinity 替换为 None（递归处理 dict / list / tuple）"""
+    if isinstance(data, float):
+        return data if math.isfinite(data) else None
+    if isinstance(data, dict):
+        return {key: _finite(value) for key, value in data.items()}
+    if isinstance(data, (list, tuple)):
+        return [_finite(value) for value in data]
+    return data
+
+
+def loads(raw: Union[bytes, bytearray, memoryview, str]) -> Any:
+    """
+    解析 JSON（bytes 或 str）
+
+    Raises:
+        ValueError: 不是合法的 JSON（orjson.JSONDecodeError 也是 ValueError 的子类）
+    """
+    if ORJSON_AVAILABLE:
+        return orjson.loads(raw)
+    if isinstance(raw, memoryview):
+        raw = bytes(raw)
+    return json.loads(raw)
@@ -0,0 +1,160 @@
+"""
+内容寻址榜单存储模块
+分类内容（去掉日期和每个应用的抓取时间）按 SHA-256 摘要保存为对象，内容相同的分类无论哪天保存都只有一份；
+每天只保存一个引用文件，记录各分类引用的对象和被去掉的日期、抓取时间
+
+目录结构：
+    objects/{摘要前 2 位}/{摘要}.json   分类内容（按配置压缩为 .json.gz / .json.zst）
+    refs/{日期}.json                   每日引用 {"date", "sections": {分区名: {"object", "date", "timestamp" | "timestamps"}}}
+"""
+
+import os
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from utils import json_codec
+from utils.data_storage import (
+    JsonRankingStore, content_digest, find_json_file, load_from_json,
+    normalized_content, save_compressed_json, snapshot_key, write_json_atomic
+)
+from utils.date_utils import is_valid_date
+
+
+class ObjectRankingStore(JsonRankingStore):
+    """
+    内容寻址对象 + 每日引用
+
+    save_category 只缓存在内存中，flush 时写入新对象（已存在的对象直接引用）并每个日期写一次引用文件；
+    读取时没有引用文件的日期回退到分文件格式，便于逐步迁移。
+    """
+
+    storage_format = "objects"
+
+    def __init__(self, base_dir: str, compression: Optional[str] = None, canonical: bool = False):
+        super().__init__(base_dir, compression, canonical)
+        self.objects_dir = os.path.join(base_dir, "objects")
+        self.refs_dir = os.path.join(base_dir, "refs")
+        self._pending = {}
+        self._lock = threading.Lock()
+
+    def object_path(self, digest: str) -> str:
+        return os.path.join(self.objects_dir, digest[:2], f"{digest}.json")
+
+    def ref_path(self, date_str: str) -> str:
+        return os.path.join(self.refs_dir, f"{date_str}.json")
+
+    @staticmethod
+    def _split(data: Dict) -> Tuple[Dict, Dict]:
+        """分类数据 -> (对象内容, 引用中保存的日期和抓取时间)"""
+        ref = {}
+        if "date" in data:
+            ref["date"] = data["date"]
+        apps = data.get("apps") if isinstance(data.get("apps"), list) else []
+        timestamps = [app.get("timestamp") if isinstance(app, dict) else None for app in apps]
+        if any(timestamp is not None for timestamp in timestamps):
+            # 同一分类的抓取时间通常相同，只保存一次
+            if len(set(timestamps)) == 1:
+                ref["timestamp"] = timestamps[0]
+            else:
+                ref["timestamps"] = timestamps
+        return normalized_content(data, drop_date=True), ref
+
+    @staticmethod
+    def _join(content: Dict, ref: Dict) -> Dict:
+        """对象内容 + 引用 -> 分类数据"""
+        data = {"date": ref["date"], **content} if "date" in ref else content
+        apps = data.get("apps") if isinstance(data.get("apps"), list) else []
+        timestamps = ref.get("timestamps") or [ref.get("timestamp")] * len(apps)
+        for app, timestamp in zip(apps, timestamps):
+            if timestamp is not None and isinstance(app, dict):
+                app["timestamp"] = timestamp
+        return data
+
+    def save_category(self, date_str: str, platform: str, category: str, data: Dict,
+                      country: str = None, collection: str = None) -> bool:
+        with self._lock:
+            self._pending.setdefault(date_str, {})[snapshot_key(platform, category, country, collection)] = data
+        return True
+
+    def _load_refs(self, date_str: str) -> Optional[Dict]:
+        try:
+            with open(self.ref_path(date_str), 'rb') as f:
+                return json_codec.loads(f.read())
+        except (OSError, ValueError):
+            return None
+
+    def load_category(self, date_str: str, platform: str, category: str,
+                      country: str = None, collection: str = None) -> Dict:
+        key = snapshot_key(platform, category, country, collection)
+        with self._lock:
+            pending = self._pending.get(date_str, {})
+            if key in pending:
+                return pending[key]
+
+        refs = self._load_refs(date_str)
+        if refs is None:
+            return super().load_category(date_str, platform, category, country, collection)
+        ref = refs.get("sections", {}).get(key)
+        if not ref:
+            return {}
+        content = load_from_json(self.object_path(ref["object"]))
+        return self._join(content, ref) if content else {}
+
+    def exists(self, date_str: str, platform: str, category: str) -> bool:
+        refs = self._load_refs(date_str)
+        if refs is None:
+            return super().exists(date_str, platform, category)
+        return snapshot_key(platform, category) in refs.get("sections", {})
+
+    def list_dates(self) -> List[str]:
+        dates = set(super().list_dates())
+        if os.path.isdir(self.refs_dir):
+            dates.update(
+                name[:-len(".json")] for name in os.listdir(self.refs_dir)
+                if name.endswith(".json") and is_valid_date(name[:-len(".json")])
+            )
+        return sorted(dates, reverse=True)
+
+    def _save_object(self, content: Dict) -> Optional[str]:
+        """保存对象（已存在时直接引用），返回摘要；失败返回 None"""
+        digest = content_digest(content)
+        object_path = self.object_path(digest)
+        if find_json_file(object_path) is not None:
+            self._count_write(0)
+            return digest
+        if not save_compressed_json(content, object_path, self.compression, self.canonical):
+            return None
+        self._count_write(os.path.getsize(find_json_file(object_path)))
+        return digest
+
+    def flush(self) -> bool:
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            failed = {}
+            for date_str in sorted(pending):
+                try:
+                    refs = self._load_refs(date_str) or {"date": date_str, "sections": {}}
+                    before = dict(refs["sections"])
+                    for key, data in pending[date_str].items():
+                        content, ref = self._split(data)
+                        digest = self._save_object(content)
+                        if digest is None:
+                            failed.setdefault(date_str, {})[key] = data
+                            continue
+                        # 内容未变化（只有抓取时间不同）时保留原引用
+                        if before.get(key, {}).get("object") != digest:
+                            refs["sections"][key] = {"object": digest, **ref}
+
+                    # 先写对象再写引用，引用的对象一定存在；引用没有变化时不重写
+                    if refs["sections"] == before:
+                        self._count_write(0)
+                    else:
+                        self._count_write(write_json_atomic(refs, self.ref_path(date_str)))
+                except OSError as e:
+                    print(f"保存内容寻址对象失败: {e}")
+                    failed[date_str] = pending[date_str]
+
+            # 写入失败的分类放回缓冲区，下次 flush 时重试，其他分类照常保存
+            for date_str, sections in failed.items():
+                self._pending[date_str] = {**sections, **self._pending.get(date_str, {})}
+            return not failed
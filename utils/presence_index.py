@@ -0,0 +1,312 @@
+"""
+上榜位图索引模块
+每个应用在每个分区（平台/分类）上按天保存一个位图（第 i 位 = 起始日期后第 i 天是否在榜），
+"首次上榜"、"离榜至少 N 天后重新上榜"、"连续在榜 K 天"都只需要几次整数位运算
+
+目录结构：
+    presence/index.json   {"version", "start", "slots", "observed": {分区: 位图}, "apps": {app_id: {分区: 位图}}}
+                          位图保存为十六进制字符串；observed 记录分区每天是否有数据
+"""
+
+import os
+import shutil
+import threading
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from utils import json_codec
+from utils.data_storage import write_json_atomic
+
+
+PRESENCE_VERSION = 1
+INDEX_FILE = "index.json"
+
+# 识别模式：首次上榜、离榜后重新上榜、连续在榜满 K 天
+PRESENCE_MODES = ("first-seen", "reentry", "streak")
+
+
+def _ordinal(date_str: str) -> int:
+    return datetime.strptime(date_str, "%Y-%m-%d").toordinal()
+
+
+def _mask(start: int, stop: int) -> int:
+    """第 start 位到第 stop - 1 位为 1 的掩码（start 小于 0 的部分忽略）"""
+    start = max(start, 0)
+    return ((1 << (stop - start)) - 1) << start if stop > start else 0
+
+
+class PresenceIndex:
+    """
+    上榜位图索引（单写多读：爬虫写入，识别器只读）
+    """
+
+    def __init__(self, presence_dir: str):
+        """
+        Args:
+            presence_dir: 索引目录（不存在时为空索引）
+        """
+        self.presence_dir = presence_dir
+        self.index_path = os.path.join(presence_dir, INDEX_FILE)
+        self._lock = threading.Lock()
+        self._dirty = False
+
+        try:
+            with open(self.index_path, 'rb') as f:
+                index = json_codec.loads(f.read())
+        except (OSError, ValueError):
+            index = {}
+        self.start: Optional[int] = _ordinal(index["start"]) if index.get("start") else None
+        self.slots: List[str] = index.get("slots", [])
+        self.observed: Dict[str, int] = {key: int(bits, 16) for key, bits in index.get("observed", {}).items()}
+        self.apps: Dict[str, Dict[str, int]] = {
+            app_id: {key: int(bits, 16) for key, bits in app_slots.items()}
+            for app_id, app_slots in index.get("apps", {}).items()
+        }
+
+    def __len__(self):
+        return len(self.apps)
+
+    def _day(self, date_str: str) -> int:
+        """日期对应的位序号（早于起始日期时整体左移位图）"""
+        ordinal = _ordinal(date_str)
+        if self.start is None:
+            self.start = ordinal
+        elif ordinal < self.start:
+            shift = self.start - ordinal
+            self.observed = {key: bits << shift for key, bits in self.observed.items()}
+            for app_slots in self.apps.values():
+                for key in app_slots:
+                    app_slots[key] <<= shift
+            self.start = ordinal
+        return ordinal - self.start
+
+    def _position(self, date_str: str) -> Optional[int]:
+        """只读查询时日期对应的位序号（早于起始日期返回 None）"""
+        if self.start is None:
+            return None
+        day = _ordinal(date_str) - self.start
+        return day if day >= 0 else None
+
+    def add_category(self, date_str: str, platform: str, category: str, apps: List[Dict]):
+        """
+        写入一个分类一天的上榜应用（同一天重复写入时以最后一次为准，索引在 save 时写回）
+
+        Args:
+            date_str: 日期
+            platform: 平台
+            category: 分类
+            apps: 应用列表（需含 app_id）
+        """
+        key = f"{platform}/{category}"
+        with self._lock:
+            day = self._day(date_str)
+            bit = 1 << day
+            if key not in self.observed:
+                self.slots.append(key)
+            self.observed[key] = self.observed.get(key, 0) | bit
+
+            # 先清除当天该分区的旧记录（重新爬取后掉出榜单的应用）
+            for app_slots in self.apps.values():
+                if app_slots.get(key, 0) & bit:
+                    app_slots[key] &= ~bit
+            for app in apps:
+                app_id = app.get("app_id")
+                if app_id:
+                    app_slots = self.apps.setdefault(app_id, {})
+                    app_slots[key] = app_slots.get(key, 0) | bit
+            self._dirty = True
+
+    def save(self) -> bool:
+        """写回索引"""
+        with self._lock:
+            if not self._dirty:
+                return True
+            try:
+                write_json_atomic({
+                    "version": PRESENCE_VERSION,
+                    "start": datetime.fromordinal(self.start).strftime("%Y-%m-%d") if self.start else None,
+                    "slots": self.slots,
+                    "observed": {key: format(bits, "x") for key, bits in self.observed.items()},
+                    "apps": {
+                        app_id: {key: format(bits, "x") for key, bits in app_slots.items() if bits}
+                        for app_id, app_slots in self.apps.items()
+                    }
+                }, self.index_path)
+                self._dirty = False
+                return True
+            except OSError as e:
+                print(f"保存上榜位图索引失败: {e}")
+                return False
+
+    def observed_on(self, date_str: str, platform: str, category: str) -> bool:
+        """分区当天是否有数据"""
+        day = self._position(date_str)
+        return day is not None and bool(self.observed.get(f"{platform}/{category}", 0) >> day & 1)
+
+    def has_history(self, date_str: str, platform: str, category: str) -> bool:
+        """索引中该分区在当天之前是否有数据（没有时无法判断首次上榜、重新上榜和连续在榜）"""
+        day = self._position(date_str)
+        return day is not None and bool(self.observed.get(f"{platform}/{category}", 0) & _mask(0, day))
+
+    def first_seen(self, date_str: str, platform: str, category: str, app_ids: Iterable[str]) -> List[str]:
+        """
+        首次上榜：当天在该分区上榜，且此前从未出现在任何分区的榜单上
+
+        Args:
+            date_str: 日期
+            platform: 平台
+            category: 分类
+            app_ids: 候选 app_id（通常为当天该分区的榜单，保持顺序）
+
+        Returns:
+            List[str]: 符合条件的 app_id
+        """
+        day = self._position(date_str)
+        if day is None:
+            return []
+        key, before = f"{platform}/{category}", _mask(0, day)
+        result = []
+        for app_id in app_ids:
+            app_slots = self.apps.get(app_id, {})
+            if app_slots.get(key, 0) >> day & 1 and not any(bits & before for bits in app_slots.values()):
+                result.append(app_id)
+        return result
+
+    def reentered(self, date_str: str, platform: str, category: str, app_ids: Iterable[str],
+                  min_absent_days: int) -> List[str]:
+        """
+        重新上榜：当天在该分区上榜，前 N 天都不在该分区（没有数据的日期按不在榜计），且更早上过该分区的榜单
+
+        Args:
+            date_str: 日期
+            platform: 平台
+            category: 分类
+            app_ids: 候选 app_id
+            min_absent_days: 至少离榜的天数 N
+
+        Returns:
+            List[str]: 符合条件的 app_id
+        """
+        day = self._position(date_str)
+        if day is None or min_absent_days < 1:
+            return []
+        key = f"{platform}/{category}"
+        window, earlier = _mask(day - min_absent_days, day), _mask(0, day - min_absent_days)
+        result = []
+        for app_id in app_ids:
+            bits = self.apps.get(app_id, {}).get(key, 0)
+            if bits >> day & 1 and not bits & window and bits & earlier:
+                result.append(app_id)
+        return result
+
+    def streak(self, date_str: str, platform: str, category: str, app_ids: Iterable[str],
+               days: int) -> List[str]:
+        """
+        连续在榜满 K 天：截至当天在该分区连续在榜恰好 K 天（没有数据的日期不打断连续）
+
+        连续区间从当天向前延伸到最近一个有数据且不在榜的日期为止，起点是区间内第一个实际在榜的日期
+        （区间开头没有数据的日期不计入天数）。
+
+        Args:
+            date_str: 日期
+            platform: 平台
+            category: 分类
+            app_ids: 候选 app_id
+            days: 连续天数 K
+
+        Returns:
+            List[str]: 符合条件的 app_id
+        """
+        day = self._position(date_str)
+        if day is None or days < 1 or day - days + 1 < 0:
+            return []
+        key = f"{platform}/{category}"
+        unobserved = ~self.observed.get(key, 0)
+        result = []
+        for app_id in app_ids:
+            bits = self.apps.get(app_id, {}).get(key, 0)
+            # 当天必须实际在榜
+            if not bits >> day & 1:
+                continue
+            # 当天及之前最近一个“有数据且不在榜”的日期之后开始连续
+            gaps = ~(bits | unobserved) & _mask(0, day + 1)
+            run = bits & _mask(gaps.bit_length(), day + 1)
+            first = (run & -run).bit_length() - 1
+            if day - first + 1 == days:
+                result.append(app_id)
+        return result
+
+    def presence(self, app_id: str) -> Dict[str, List[str]]:
+        """
+        应用在各分区的上榜日期
+
+        Returns:
+            Dict: 分区 -> 日期列表（升序）
+        """
+        if self.start is None:
+            return {}
+        result = {}
+        for key, bits in self.apps.get(app_id, {}).items():
+            dates, day = [], 0
+            while bits:
+                if bits & 1:
+                    dates.append(datetime.fromordinal(self.start + day).strftime("%Y-%m-%d"))
+                bits >>= 1
+                day += 1
+            if dates:
+                result[key] = dates
+        return result
+
+    @classmethod
+    def build(cls, presence_dir: str, days: Iterable[Tuple[str, Dict]]) -> "PresenceIndex":
+        """
+        从全部榜单重建索引
+
+        Args:
+            presence_dir: 索引目录（已有内容会被覆盖）
+            days: (日期, {(平台, 分类): 应用列表}) 序列，见 iter_store_days
+
+        Returns:
+            PresenceIndex: 新索引
+        """
+        index = cls(presence_dir)
+        index.start, index.slots, index.observed, index.apps = None, [], {}, {}
+        for date_str, sections in days:
+            day = index._day(date_str)
+            bit = 1 << day
+            for (platform, category), apps in sections.items():
+                key = f"{platform}/{category}"
+                if key not in index.observed:
+                    index.slots.append(key)
+                index.observed[key] = index.observed.get(key, 0) | bit
+                for app in apps:
+                    app_id = app.get("app_id")
+                    if app_id:
+                        app_slots = index.apps.setdefault(app_id, {})
+                        app_slots[key] = app_slots.get(key, 0) | bit
+        index._dirty = True
+        index.save()
+        return index
+
+    @classmethod
+    def rebuild(cls, presence_dir: str, days: Iterable[Tuple[str, Dict]]) -> "PresenceIndex":
+        """
+        重建索引：先写入临时目录，完成后替换原目录
+
+        Args:
+            presence_dir: 索引目录
+            days: (日期, {(平台, 分类): 应用列表}) 序列，见 iter_store_days
+
+        Returns:
+            PresenceIndex: 新索引
+        """
+        tmp_dir = f"{presence_dir}.tmp"
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        cls.build(tmp_dir, days)
+        shutil.rmtree(presence_dir, ignore_errors=True)
+        os.replace(tmp_dir, presence_dir)
+        return cls(presence_dir)
+
+    def covers(self, date_str: str) -> bool:
+        """索引是否从该日期（或更早）开始"""
+        return self.start is not None and self.start <= _ordinal(date_str)
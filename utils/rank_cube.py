@@ -0,0 +1,383 @@
+"""
+排名立方体模块
+把主商店全部日期的榜单排名保存为 NumPy 内存映射数组，跨日期的统计（流失率、排名波动、
+在榜天数、排名上升最多的应用）直接在数组上向量化计算，不再逐个解析 JSON 文件
+
+目录结构：
+    cube/ranks.i16     int16 数组，按天追加，形状 (天, 分区容量, 应用容量)，0 表示不在榜上
+    cube/index.json    日期索引、分区（平台/分类）索引和应用索引（平台:app_id）
+
+以 (应用, 天, 分区) 访问时使用 RankCube.cube（ranks 的转置视图，不复制数据）。
+分区或应用数量超过容量时按倍数扩容并重写一次数组，其余时候每天只追加一个切片。
+"""
+
+import os
+import shutil
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from utils import json_codec
+from utils.data_storage import write_json_atomic
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+
+CUBE_VERSION = 1
+RANKS_FILE = "ranks.i16"
+INDEX_FILE = "index.json"
+
+# 初始容量，超出后翻倍
+INITIAL_APP_CAPACITY = 1024
+INITIAL_SLOT_CAPACITY = 16
+
+
+def _next_day(date_str: str) -> str:
+    return (datetime.strptime(date_str, "%Y-%m-%d") + timedelta(days=1)).strftime("%Y-%m-%d")
+
+
+def slot_key(platform: str, category: str) -> str:
+    """分区名：平台/分类（如 app_store/games）"""
+    return f"{platform}/{category}"
+
+
+class RankCube:
+    """
+    排名立方体（单写多读：爬虫追加，分析函数只读）
+    """
+
+    def __init__(self, cube_dir: str):
+        """
+        Args:
+            cube_dir: 立方体目录（不存在时为空立方体）
+
+        Raises:
+            ImportError: numpy 未安装
+        """
+        if not NUMPY_AVAILABLE:
+            raise ImportError("numpy 未安装，请运行: pip install numpy")
+        self.cube_dir = cube_dir
+        self.ranks_path = os.path.join(cube_dir, RANKS_FILE)
+        self.index_path = os.path.join(cube_dir, INDEX_FILE)
+        self._lock = threading.Lock()
+        self._ranks = None
+
+        try:
+            with open(self.index_path, 'rb') as f:
+                index = json_codec.loads(f.read())
+        except (OSError, ValueError):
+            index = {}
+        self.days = index.get("days", [])
+        self.slots = index.get("slots", [])
+        self.apps = index.get("apps", [])
+        self.app_capacity = index.get("app_capacity", INITIAL_APP_CAPACITY)
+        self.slot_capacity = index.get("slot_capacity", INITIAL_SLOT_CAPACITY)
+        self._day_index = {date_str: row for row, date_str in enumerate(self.days)}
+        self._slot_index = {key: column for column, key in enumerate(self.slots)}
+        self._app_index = {key: column for column, key in enumerate(self.apps)}
+
+    @property
+    def _slice_shape(self):
+        return self.slot_capacity, self.app_capacity
+
+    @property
+    def _slice_bytes(self) -> int:
+        return self.slot_capacity * self.app_capacity * 2
+
+    @property
+    def ranks(self) -> "np.ndarray":
+        """
+        排名数组 (天, 分区, 应用)，只读内存映射（天按追加顺序，见 chronological）
+
+        Returns:
+            np.ndarray: int16，0 表示当天不在该分区的榜单上
+        """
+        return self._memmap()[:, :len(self.slots), :len(self.apps)]
+
+    def _memmap(self) -> "np.ndarray":
+        """按容量映射的完整数组"""
+        if not self.days:
+            return np.zeros((0,) + self._slice_shape, dtype=np.int16)
+        if self._ranks is None:
+            self._ranks = np.memmap(
+                self.ranks_path, dtype=np.int16, mode='r', shape=(len(self.days),) + self._slice_shape
+            )
+        return self._ranks
+
+    def covers(self, date_str: str) -> bool:
+        """立方体是否从该日期（或更早）开始"""
+        return bool(self.days) and min(self.days) <= date_str
+
+    @property
+    def cube(self) -> "np.ndarray":
+        """按 (应用, 天, 分区) 访问的视图"""
+        return self.ranks.transpose(2, 0, 1)
+
+    def chronological(self, last_days: Optional[int] = None):
+        """
+        按日期排序的排名数组
+
+        Args:
+            last_days: 只取最近 N 天（可选）
+
+        Returns:
+            Tuple: (日期列表, 排名数组 (天, 分区, 应用))
+        """
+        order = sorted(range(len(self.days)), key=self.days.__getitem__)
+        if last_days:
+            order = order[-last_days:]
+        if not order:
+            return [], self.ranks
+        # 追加顺序已按日期排列时直接切片，不复制
+        if order == list(range(order[0], order[0] + len(order))):
+            ranks = self.ranks[order[0]:order[0] + len(order)]
+        else:
+            ranks = self.ranks[order]
+        return [self.days[row] for row in order], ranks
+
+    def _register(self, keys, index: Dict[str, int], values: List[str]):
+        for key in keys:
+            if key not in index:
+                index[key] = len(values)
+                values.append(key)
+
+    def _resize(self, slot_capacity: int, app_capacity: int):
+        """扩容并重写数组（已有数据保持原位置）"""
+        old = self._memmap()
+        resized = np.zeros((len(self.days), slot_capacity, app_capacity), dtype=np.int16)
+        resized[:, :old.shape[1], :old.shape[2]] = old
+        tmp_path = f"{self.ranks_path}.tmp"
+        resized.tofile(tmp_path)
+        os.replace(tmp_path, self.ranks_path)
+        self._ranks = None
+        self.slot_capacity = slot_capacity
+        self.app_capacity = app_capacity
+
+    def add_day(self, date_str: str, sections: Dict[str, List[Dict]]) -> bool:
+        """
+        写入一天的榜单（新日期追加一个切片；已有日期只覆盖传入的分区）
+
+        Args:
+            date_str: 日期
+            sections: 分区名（slot_key）-> 应用列表（需含 platform 对应的 app_id 和 rank）
+
+        Returns:
+            bool: 是否成功
+        """
+        with self._lock:
+            try:
+                return self._add_day(date_str, sections)
+            except OSError as e:
+                print(f"更新排名立方体失败: {e}")
+                return False
+
+    def _add_day(self, date_str: str, sections: Dict[str, List[Dict]]) -> bool:
+        # 没有 app_id 的应用无法跨日期对应，不登记（否则同一分区的这类应用都会落到 平台:None 一列）
+        sections = {
+            key: [app for app in apps if app.get("app_id") is not None]
+            for key, apps in sections.items() if key
+        }
+        self._register(sections, self._slot_index, self.slots)
+        self._register(
+            (f"{key.split('/')[0]}:{app.get('app_id')}" for key, apps in sections.items() for app in apps),
+            self._app_index, self.apps
+        )
+
+        # 超出容量时扩容（已有天数为 0 时只需要调整容量）
+        slot_capacity, app_capacity = self.slot_capacity, self.app_capacity
+        while len(self.slots) > slot_capacity:
+            slot_capacity *= 2
+        while len(self.apps) > app_capacity:
+            app_capacity *= 2
+        if (slot_capacity, app_capacity) != self._slice_shape:
+            if self.days:
+                self._resize(slot_capacity, app_capacity)
+            else:
+                self.slot_capacity, self.app_capacity = slot_capacity, app_capacity
+
+        os.makedirs(self.cube_dir, exist_ok=True)
+        row = self._day_index.get(date_str)
+        if row is None:
+            day = np.zeros(self._slice_shape, dtype=np.int16)
+        else:
+            day = np.array(self._memmap()[row])
+
+        for key, apps in sections.items():
+            platform = key.split('/')[0]
+            column = self._slot_index[key]
+            day[column, :] = 0
+            indexes = [self._app_index[f"{platform}:{app.get('app_id')}"] for app in apps]
+            day[column, indexes] = [app.get("rank") or 0 for app in apps]
+
+        # 新日期追加到文件末尾，已有日期原位覆盖
+        self._ranks = None
+        if row is None:
+            with open(self.ranks_path, 'ab') as f:
+                f.write(day.tobytes())
+            self.days.append(date_str)
+            self._day_index[date_str] = len(self.days) - 1
+        else:
+            with open(self.ranks_path, 'r+b') as f:
+                f.seek(row * self._slice_bytes)
+                f.write(day.tobytes())
+
+        # 先写数组再写索引：读取方看到的索引总能在数组中找到对应的数据
+        write_json_atomic({
+            "version": CUBE_VERSION,
+            "days": self.days,
+            "slots": self.slots,
+            "apps": self.apps,
+            "slot_capacity": self.slot_capacity,
+            "app_capacity": self.app_capacity
+        }, self.index_path)
+        return True
+
+    @classmethod
+    def rebuild(cls, cube_dir: str, days: Iterable[Tuple[str, Dict]]) -> Optional["RankCube"]:
+        """
+        从全部榜单重建立方体：先写入临时目录，完成后替换原目录
+
+        Args:
+            cube_dir: 立方体目录
+            days: (日期, {(平台, 分类): 应用列表}) 序列，见 iter_store_days
+
+        Returns:
+            Optional[RankCube]: 新立方体，写入失败返回 None（原目录保持不变）
+        """
+        tmp_dir = f"{cube_dir}.tmp"
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        cube = cls(tmp_dir)
+        for date_str, sections in days:
+            sections = {slot_key(platform, category): apps for (platform, category), apps in sections.items()}
+            if not cube.add_day(date_str, sections):
+                print(f"  ✗ {date_str}: 写入失败")
+                shutil.rmtree(tmp_dir, ignore_errors=True)
+                return None
+
+        shutil.rmtree(cube_dir, ignore_errors=True)
+        if os.path.isdir(tmp_dir):
+            os.replace(tmp_dir, cube_dir)
+        return cls(cube_dir)
+
+
+def churn_rate(cube: RankCube, last_days: Optional[int] = None) -> Dict[str, float]:
+    """
+    各分区的日均流失率：前一天在榜、第二天掉出榜单的应用占前一天在榜应用的比例
+
+    只比较相隔正好一天的两个日期，缺失的日期前后不计入（否则缺失期间的变化会算作一天的流失）。
+
+    Args:
+        cube: 排名立方体
+        last_days: 只统计最近 N 天（可选）
+
+    Returns:
+        Dict[str, float]: 分区名 -> 流失率（0~1），没有相邻两天数据的分区不返回
+    """
+    dates, ranks = cube.chronological(last_days)
+    on_chart = ranks > 0
+    before, after = on_chart[:-1], on_chart[1:]
+    adjacent = np.array(
+        [_next_day(date_str) == next_date for date_str, next_date in zip(dates, dates[1:])], dtype=bool
+    )
+    # 只统计相邻两天且两天都有数据的分区
+    valid = before.any(axis=2) & after.any(axis=2) & adjacent.reshape(-1, 1)
+    dropped = (before & ~after).sum(axis=2)
+    charted = before.sum(axis=2)
+    rates = np.where(valid, dropped / np.maximum(charted, 1), 0.0)
+    days = valid.sum(axis=0)
+    return {
+        cube.slots[column]: float(rates[:, column].sum() / days[column])
+        for column in range(len(cube.slots)) if days[column]
+    }
+
+
+def days_on_chart(cube: RankCube, last_days: Optional[int] = None, limit: int = 20) -> Dict[str, List[Dict]]:
+    """
+    各分区在榜天数最多的应用
+
+    Returns:
+        Dict[str, List[Dict]]: 分区名 -> [{app, days}]，按天数降序
+    """
+    _, ranks = cube.chronological(last_days)
+    counts = (ranks > 0).sum(axis=0)
+    return _top_per_slot(cube, counts, counts > 0, limit, "days")
+
+
+def rank_volatility(cube: RankCube, last_days: Optional[int] = None, min_days: int = 5,
+                    limit: int = 20) -> Dict[str, List[Dict]]:
+    """
+    各分区排名波动最大的应用（在榜日排名的标准差）
+
+    Args:
+        cube: 排名立方体
+        last_days: 只统计最近 N 天（可选）
+        min_days: 至少在榜的天数
+        limit: 每个分区返回的应用数
+
+    Returns:
+        Dict[str, List[Dict]]: 分区名 -> [{app, volatility, days}]，按标准差降序
+    """
+    _, ranks = cube.chronological(last_days)
+    values = ranks.astype(np.float64)
+    counts = (ranks > 0).sum(axis=0)
+    total = values.sum(axis=0)
+    squares = (values * values).sum(axis=0)
+    safe_counts = np.maximum(counts, 1)
+    variance = np.maximum(squares / safe_counts - (total / safe_counts) ** 2, 0.0)
+    volatility = np.sqrt(variance)
+    return _top_per_slot(cube, volatility, counts >= max(min_days, 2), limit, "volatility", counts)
+
+
+def top_climbers(cube: RankCube, days: int = 7, limit: int = 20) -> Dict[str, List[Dict]]:
+    """
+    各分区最近 N 天排名上升最多的应用（N 天前和最新一天都在榜）
+
+    Args:
+        cube: 排名立方体
+        days: 对比的天数间隔
+        limit: 每个分区返回的应用数
+
+    Returns:
+        Dict[str, List[Dict]]: 分区名 -> [{app, climb, from_rank, to_rank}]，按上升名次降序
+    """
+    dates, ranks = cube.chronological(days + 1)
+    if len(dates) < 2:
+        return {}
+    first, last = ranks[0].astype(np.int32), ranks[-1].astype(np.int32)
+    climb = first - last
+    mask = (first > 0) & (last > 0) & (climb > 0)
+    result = {}
+    for column, key in enumerate(cube.slots):
+        columns = np.flatnonzero(mask[column])
+        top = columns[np.argsort(-climb[column, columns], kind="stable")[:limit]]
+        if len(top):
+            result[key] = [
+                {"app": cube.apps[app], "climb": int(climb[column, app]),
+                 "from_rank": int(first[column, app]), "to_rank": int(last[column, app])}
+                for app in top
+            ]
+    return result
+
+
+def _plain(value):
+    """NumPy 标量 -> 可序列化为 JSON 的 int / float"""
+    return round(float(value), 2) if isinstance(value, np.floating) else int(value)
+
+
+def _top_per_slot(cube: RankCube, values, mask, limit: int, name: str, counts=None) -> Dict[str, List[Dict]]:
+    """每个分区按 values 降序取前 limit 个应用"""
+    result = {}
+    for column, key in enumerate(cube.slots):
+        columns = np.flatnonzero(mask[column])
+        top = columns[np.argsort(-values[column, columns], kind="stable")[:limit]]
+        if len(top):
+            result[key] = [
+                {"app": cube.apps[app], name: _plain(values[column, app]),
+                 **({"days": int(counts[column, app])} if counts is not None else {})}
+                for app in top
+            ]
+    return result
@@ -0,0 +1,213 @@
+"""
+限流工具模块
+按主机划分的自适应令牌桶：被限流（429/503）时降速并遵守 Retry-After，成功时逐步恢复
+"""
+
+import threading
+import time
+import logging
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional
+
+
+# 触发降速的响应状态码
+THROTTLE_STATUS_CODES = (429, 503)
+
+
+def parse_retry_after(value) -> Optional[float]:
+    """
+    解析 Retry-After 头（秒数或 HTTP 日期）
+
+    Args:
+        value: Retry-After 头的值
+
+    Returns:
+        Optional[float]: 需要等待的秒数，无法解析返回 None
+    """
+    if value is None or value == "":
+        return None
+
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        pass
+
+    try:
+        retry_at = parsedate_to_datetime(str(value))
+        if retry_at.tzinfo is None:
+            retry_at = retry_at.replace(tzinfo=timezone.utc)
+        return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+    except (TypeError, ValueError):
+        return None
+
+
+class TokenBucket:
+    """自适应令牌桶（线程安全）"""
+
+    def __init__(self, rate=1.0, burst=1, min_rate=None, max_rate=None,
+                 decrease_factor=0.5, increase_step=None):
+        """
+        初始化令牌桶
+
+        Args:
+            rate: 初始速率（次/秒）
+            burst: 桶容量（允许的突发请求数）
+            min_rate: 降速下限（默认初始速率的 1/10）
+            max_rate: 提速上限（默认等于初始速率）
+            decrease_factor: 被限流时的速率乘数
+            increase_step: 每次成功后增加的速率（默认初始速率的 1/10）
+        """
+        self.rate = float(rate)
+        self.burst = max(1, int(burst))
+        self.min_rate = float(min_rate if min_rate is not None else rate / 10)
+        self.max_rate = float(max_rate if max_rate is not None else rate)
+        self.decrease_factor = decrease_factor
+        self.increase_step = float(increase_step if increase_step is not None else rate / 10)
+
+        self.tokens = float(self.burst)
+        self.total_wait = 0.0
+        self.throttled_count = 0
+        self._last = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.burst, self.tokens + (now - self._last) * self.rate)
+        self._last = now
+
+    def reserve(self) -> float:
+        """
+        预占一个令牌
+
+        Returns:
+            float: 需要等待的秒数
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            self.tokens -= 1
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+            wait = max(wait, self._paused_until - now)
+            self.total_wait += wait
+            return wait
+
+    def acquire(self) -> float:
+        """
+        获取一个令牌（必要时阻塞）
+
+        Returns:
+            float: 实际等待的秒数
+        """
+        wait = self.reserve()
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    def penalize(self, retry_after: Optional[float] = None):
+        """
+        被限流时降速；有 Retry-After 时在此之前暂停发放令牌
+
+        Args:
+            retry_after: 服务端要求等待的秒数
+        """
+        with self._lock:
+            self.throttled_count += 1
+            self.rate = max(self.min_rate, self.rate * self.decrease_factor)
+            self.tokens = min(self.tokens, 0.0)
+            if retry_after:
+                self._paused_until = max(self._paused_until, time.monotonic() + retry_after)
+
+    def reward(self):
+        """请求成功后逐步提速"""
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate + self.increase_step)
+
+
+class HostRateLimiter:
+    """按主机管理令牌桶，供多个爬虫共享"""
+
+    def __init__(self, config: Optional[Dict[str, Dict]] = None, default_rate=1.0, logger=None):
+        """
+        初始化
+
+        Args:
+            config: 主机到令牌桶参数的映射（rate / burst / min_rate / max_rate）
+            default_rate: 未配置主机的默认速率（次/秒）
+            logger: 日志记录器（可选）
+        """
+        self.config = dict(config or {})
+        self.default_rate = default_rate
+        self.logger = logger or logging.getLogger(__name__)
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def bucket(self, host: str) -> TokenBucket:
+        """获取（必要时创建）指定主机的令牌桶"""
+        with self._lock:
+            if host not in self._buckets:
+                options = self.config.get(host, {"rate": self.default_rate})
+                self._buckets[host] = TokenBucket(**options)
+            return self._buckets[host]
+
+    def acquire(self, host: str) -> float:
+        """
+        请求前获取令牌
+
+        Args:
+            host: 主机名
+
+        Returns:
+            float: 等待的秒数
+        """
+        bucket = self.bucket(host)
+        wait = bucket.acquire()
+        if wait > 0:
+            self.logger.debug(f"限流 {host}: 等待 {wait:.2f} 秒，当前速率 {bucket.rate:.2f} 次/秒")
+        return wait
+
+    def on_response(self, host: str, status_code: int, retry_after=None):
+        """
+        根据响应调整速率
+
+        Args:
+            host: 主机名
+            status_code: HTTP 状态码
+            retry_after: Retry-After 头的值（可选）
+        """
+        bucket = self.bucket(host)
+        if status_code in THROTTLE_STATUS_CODES:
+            seconds = parse_retry_after(retry_after)
+            bucket.penalize(seconds)
+            message = f"{host} 返回 {status_code}，降速至 {bucket.rate:.2f} 次/秒"
+            if seconds:
+                message += f"，暂停 {seconds:.1f} 秒"
+            self.logger.warning(message)
+        elif status_code < 400:
+            bucket.reward()
+
+    def stats(self) -> Dict[str, Dict]:
+        """
+        获取各主机的当前速率和累计等待时间
+
+        Returns:
+            Dict: 主机 -> {rate, total_wait, throttled}
+        """
+        with self._lock:
+            buckets = dict(self._buckets)
+        return {
+            host: {
+                "rate": bucket.rate,
+                "total_wait": bucket.total_wait,
+                "throttled": bucket.throttled_count
+            }
+            for host, bucket in buckets.items()
+        }
+
+    def log_stats(self):
+        """将各主机的限流状态写入日志"""
+        for host, stat in self.stats().items():
+            self.logger.info(
+                f"限流 {host}: 当前速率 {stat['rate']:.2f} 次/秒，"
+                f"累计等待 {stat['total_wait']:.1f} 秒，被限流 {stat['throttled']} 次"
+            )
@@ -0,0 +1,200 @@
+"""
+重试工具模块
+带抖动的指数退避重试、按主机的熔断器、整次运行的截止时间
+"""
+
+import random
+import threading
+import time
+import logging
+from typing import Callable, Optional, Tuple, Type
+
+
+class CircuitOpenError(Exception):
+    """主机处于熔断状态，请求未发出"""
+
+
+class DeadlineExceeded(Exception):
+    """已超出本次运行的截止时间"""
+
+
+class RetryPolicy:
+    """重试策略（全抖动指数退避）"""
+
+    def __init__(self, retry_times=3, base_delay=1.0, max_delay=20.0):
+        """
+        Args:
+            retry_times: 失败后的最大重试次数
+            base_delay: 首次退避的上限（秒）
+            max_delay: 单次退避的上限（秒）
+        """
+        self.retry_times = max(0, int(retry_times))
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def backoff(self, attempt: int) -> float:
+        """
+        计算第 attempt 次失败后的等待时间
+
+        Args:
+            attempt: 已失败的次数（从0开始）
+
+        Returns:
+            float: 等待秒数
+        """
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+
+class CircuitBreaker:
+    """按主机的熔断器：连续失败达到阈值后暂停访问，冷却后放行一次试探请求"""
+
+    def __init__(self, failure_threshold=5, reset_timeout=120.0, logger=None):
+        """
+        Args:
+            failure_threshold: 连续失败多少次后熔断
+            reset_timeout: 熔断后多少秒允许试探
+            logger: 日志记录器（可选）
+        """
+        self.failure_threshold = max(1, int(failure_threshold))
+        self.reset_timeout = reset_timeout
+        self.logger = logger or logging.getLogger(__name__)
+        self._failures = {}
+        self._opened_at = {}
+        self._lock = threading.Lock()
+
+    def allow(self, host: str) -> bool:
+        """判断是否允许向该主机发送请求"""
+        with self._lock:
+            opened_at = self._opened_at.get(host)
+            if opened_at is None:
+                return True
+            if time.monotonic() - opened_at >= self.reset_timeout:
+                # 半开：放行一次试探，失败会重新计时
+                self._opened_at[host] = time.monotonic()
+                return True
+            return False
+
+    def record_success(self, host: str):
+        """记录一次成功（关闭熔断）"""
+        with self._lock:
+            if host in self._opened_at:
+                self.logger.info(f"{host} 恢复正常，解除熔断")
+            self._failures[host] = 0
+            self._opened_at.pop(host, None)
+
+    def record_failure(self, host: str):
+        """记录一次失败"""
+        with self._lock:
+            self._failures[host] = self._failures.get(host, 0) + 1
+            if self._failures[host] >= self.failure_threshold:
+                if host not in self._opened_at:
+                    self.logger.warning(
+                        f"{host} 连续失败 {self._failures[host]} 次，熔断 {self.reset_timeout:.0f} 秒"
+                    )
+                self._opened_at[host] = time.monotonic()
+
+    def is_open(self, host: str) -> bool:
+        """主机当前是否处于熔断状态"""
+        with self._lock:
+            return host in self._opened_at
+
+
+class Deadline:
+    """整次运行的截止时间（seconds 为 None 表示不限时）"""
+
+    def __init__(self, seconds: Optional[float] = None):
+        self.seconds = seconds
+        self.restart()
+
+    def restart(self):
+        """从现在开始重新计时"""
+        self._expires_at = time.monotonic() + self.seconds if self.seconds else None
+
+    def remaining(self) -> Optional[float]:
+        """剩余秒数（不限时返回 None）"""
+        if self._expires_at is None:
+            return None
+        return max(0.0, self._expires_at - time.monotonic())
+
+    def expired(self) -> bool:
+        """是否已超时"""
+        remaining = self.remaining()
+        return remaining is not None and remaining <= 0
+
+    def clamp(self, timeout: Optional[float]) -> Optional[float]:
+        """
+        将单次请求的超时时间限制在剩余时间内
+
+        Raises:
+            DeadlineExceeded: 已超时
+        """
+        remaining = self.remaining()
+        if remaining is None:
+            return timeout
+        if remaining <= 0:
+            raise DeadlineExceeded("已超出运行截止时间")
+        return remaining if timeout is None else min(timeout, remaining)
+
+
+def call_with_retry(func: Callable, host: str, policy: RetryPolicy,
+                    breaker: Optional[CircuitBreaker] = None, deadline: Optional[Deadline] = None,
+                    timeout: Optional[float] = None,
+                    retry_on: Tuple[Type[BaseException], ...] = (Exception,),
+                    should_retry: Optional[Callable] = None, logger=None):
+    """
+    带重试、熔断和截止时间地调用函数
+
+    Args:
+        func: 被调用的函数，参数为本次尝试的超时时间
+        host: 目标主机（用于熔断）
+        policy: 重试策略
+        breaker: 熔断器（可选）
+        deadline: 运行截止时间（可选）
+        timeout: 单次尝试的超时时间
+        retry_on: 需要重试的异常类型
+        should_retry: 判断返回值是否需要重试（如 5xx 响应）
+        logger: 日志记录器（可选）
+
+    Returns:
+        func 的返回值（最后一次尝试仍需重试时原样返回）
+
+    Raises:
+        CircuitOpenError: 主机处于熔断状态
+        DeadlineExceeded: 已超出截止时间
+    """
+    logger = logger or logging.getLogger(__name__)
+    attempts = policy.retry_times + 1
+
+    for attempt in range(attempts):
+        if breaker and not breaker.allow(host):
+            raise CircuitOpenError(f"{host} 处于熔断状态")
+
+        attempt_timeout = deadline.clamp(timeout) if deadline else timeout
+        is_last = attempt == attempts - 1
+
+        try:
+            result = func(attempt_timeout)
+        except retry_on as e:
+            if breaker:
+                breaker.record_failure(host)
+            if is_last:
+                raise
+            reason = str(e)
+        else:
+            if not (should_retry and should_retry(result)):
+                if breaker:
+                    breaker.record_success(host)
+                return result
+            if breaker:
+                breaker.record_failure(host)
+            if is_last:
+                return result
+            reason = f"返回 {getattr(result, 'status_code', result)}"
+
+        delay = policy.backoff(attempt)
+        if deadline:
+            remaining = deadline.remaining()
+            if remaining is not None and delay >= remaining:
+                raise DeadlineExceeded(f"{host} 重试等待超出运行截止时间")
+        logger.warning(f"{host} 第 {attempt + 1} 次请求失败（{reason}），{delay:.1f} 秒后重试")
+        time.sleep(delay)
@@ -0,0 +1,209 @@
+"""
+SQLite 榜单存储模块
+全部日期的榜单保存在一个数据库文件中，按日期/分类扫描和按 app_id 查询历史都走索引
+
+表结构：
+    sections   每个 日期/平台/分类 一行，保存除 apps 以外的分类信息
+    rankings   每个上榜应用一行：排名、app_id 和完整的应用数据
+"""
+
+import os
+import sqlite3
+import threading
+from typing import Dict, List, Optional
+
+from utils import json_codec
+from utils.data_storage import JsonRankingStore
+
+
+# 数据库文件名（位于数据根目录下）
+SQLITE_FILE = "rankings.db"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sections (
+    date TEXT NOT NULL,
+    platform TEXT NOT NULL,
+    category TEXT NOT NULL,
+    country TEXT NOT NULL DEFAULT '',
+    collection TEXT NOT NULL DEFAULT '',
+    data TEXT NOT NULL,
+    PRIMARY KEY (date, platform, category, country, collection)
+);
+
+CREATE TABLE IF NOT EXISTS rankings (
+    date TEXT NOT NULL,
+    platform TEXT NOT NULL,
+    category TEXT NOT NULL,
+    country TEXT NOT NULL DEFAULT '',
+    collection TEXT NOT NULL DEFAULT '',
+    position INTEGER NOT NULL,
+    rank INTEGER,
+    app_id TEXT,
+    data TEXT NOT NULL,
+    PRIMARY KEY (date, platform, category, country, collection, position)
+) WITHOUT ROWID;
+
+CREATE INDEX IF NOT EXISTS idx_rankings_category_date ON rankings (platform, category, date);
+CREATE INDEX IF NOT EXISTS idx_rankings_app ON rankings (app_id, date);
+"""
+
+
+def _compact(data) -> str:
+    return json_codec.dumps(data).decode('utf-8')
+
+
+class SqliteRankingStore(JsonRankingStore):
+    """
+    SQLite 数据库（WAL 模式）
+
+    save_category 只缓存在内存中，flush 时在一个事务内批量写入本次运行的全部分类；
+    读取时数据库中没有的日期回退到分文件格式，便于逐步迁移。
+    """
+
+    storage_format = "sqlite"
+
+    def __init__(self, base_dir: str, compression: Optional[str] = None, canonical: bool = False,
+                 db_path: Optional[str] = None):
+        """
+        Args:
+            base_dir: 数据根目录
+            compression: 回退读取分文件时识别的压缩格式
+            canonical: 不使用（数据库内的数据与文件布局无关）
+            db_path: 数据库文件路径（默认 {base_dir}/rankings.db）
+        """
+        super().__init__(base_dir, compression, canonical)
+        self.db_path = db_path or os.path.join(base_dir, SQLITE_FILE)
+        self._conn = None
+        self._pending = {}
+        self._lock = threading.Lock()
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        """数据库连接（首次使用时打开并建表）"""
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            # WAL：写入时不阻塞 Web 服务器和识别器的读取
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(SCHEMA)
+            self._conn = conn
+        return self._conn
+
+    def save_category(self, date_str: str, platform: str, category: str, data: Dict,
+                      country: str = None, collection: str = None) -> bool:
+        with self._lock:
+            self._pending[(date_str, platform, category, (country or "").lower(), (collection or "").lower())] = data
+        return True
+
+    def load_category(self, date_str: str, platform: str, category: str,
+                      country: str = None, collection: str = None) -> Dict:
+        key = (date_str, platform, category, (country or "").lower(), (collection or "").lower())
+        with self._lock:
+            if key in self._pending:
+                return self._pending[key]
+            row = self.conn.execute(
+                "SELECT data FROM sections WHERE date = ? AND platform = ? AND category = ? "
+                "AND country = ? AND collection = ?", key
+            ).fetchone()
+            if row is None:
+                has_date = self._has_date(date_str)
+            else:
+                apps = [json_codec.loads(app) for (app,) in self.conn.execute(
+                    "SELECT data FROM rankings WHERE date = ? AND platform = ? AND category = ? "
+                    "AND country = ? AND collection = ? ORDER BY position", key
+                )]
+
+        if row is None:
+            if has_date:
+                return {}
+            return super().load_category(date_str, platform, category, country, collection)
+
+        # 分类信息中保留了 apps 键的位置，还原后的键顺序与保存时一致
+        data = json_codec.loads(row[0])
+        if "apps" in data:
+            data["apps"] = apps
+        return data
+
+    def _has_date(self, date_str: str) -> bool:
+        return self.conn.execute("SELECT 1 FROM sections WHERE date = ? LIMIT 1", (date_str,)).fetchone() is not None
+
+    def exists(self, date_str: str, platform: str, category: str) -> bool:
+        with self._lock:
+            if self._has_date(date_str):
+                return self.conn.execute(
+                    "SELECT 1 FROM sections WHERE date = ? AND platform = ? AND category = ? "
+                    "AND country = '' AND collection = ''", (date_str, platform, category)
+                ).fetchone() is not None
+        return super().exists(date_str, platform, category)
+
+    def list_dates(self) -> List[str]:
+        dates = set(super().list_dates())
+        with self._lock:
+            dates.update(date for (date,) in self.conn.execute("SELECT DISTINCT date FROM sections"))
+        return sorted(dates, reverse=True)
+
+    def app_history(self, platform: str, app_id: str) -> List[Dict]:
+        """
+        查询应用的全部上榜记录（走 app_id 索引，不读取其他应用）
+
+        Args:
+            platform: 平台（app_store / google_play）
+            app_id: 应用ID
+
+        Returns:
+            List[Dict]: [{date, category, country, collection, rank}]，按日期升序
+        """
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT date, category, country, collection, rank FROM rankings "
+                "WHERE app_id = ? AND platform = ? ORDER BY date, category", (app_id, platform)
+            ).fetchall()
+        return [
+            {"date": date, "category": category, "country": country or None,
+             "collection": collection or None, "rank": rank}
+            for date, category, country, collection, rank in rows
+        ]
+
+    def flush(self) -> bool:
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            if not pending:
+                return True
+            sections = []
+            rankings = []
+            for key, data in pending.items():
+                section = {name: (None if name == "apps" else value) for name, value in data.items()}
+                sections.append(key + (_compact(section),))
+                rankings.extend(
+                    key + (position, app.get("rank"), app.get("app_id"), _compact(app))
+                    for position, app in enumerate(data.get("apps", []))
+                )
+            try:
+                # 一次运行的全部分类在同一个事务中写入
+                with self.conn:
+                    self.conn.executemany(
+                        "DELETE FROM rankings WHERE date = ? AND platform = ? AND category = ? "
+                        "AND country = ? AND collection = ?", list(pending)
+                    )
+                    self.conn.executemany(
+                        "INSERT OR REPLACE INTO sections (date, platform, category, country, collection, data) "
+                        "VALUES (?, ?, ?, ?, ?, ?)", sections
+                    )
+                    self.conn.executemany(
+                        "INSERT INTO rankings (date, platform, category, country, collection, position, "
+                        "rank, app_id, data) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", rankings
+                    )
+                # 按写入的 JSON 数据量统计（不含索引和页面开销）
+                self._count_write(sum(len(row[-1].encode('utf-8')) for row in sections + rankings))
+                return True
+            except sqlite3.Error as e:
+                print(f"保存到SQLite失败: {e}")
+                return False
+
+    def close(self):
+        self.flush()
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
@@ -0,0 +1,90 @@
+"""
+磁盘 TTL 缓存模块
+以 JSON 文件持久化的键值缓存，条目超过有效期后视为不存在
+"""
+
+import os
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from utils import json_codec
+
+
+class TTLCache:
+    """带有效期的磁盘缓存（线程安全）"""
+
+    def __init__(self, file_path: str, ttl: float):
+        """
+        初始化缓存并加载已有内容
+
+        Args:
+            file_path: 缓存文件路径
+            ttl: 有效期（秒）
+        """
+        self.file_path = file_path
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._entries = self._load()
+        self._dirty = False
+
+    def _load(self) -> Dict[str, Dict]:
+        try:
+            with open(self.file_path, 'rb') as f:
+                data = json_codec.loads(f.read())
+            return data if isinstance(data, dict) else {}
+        except (OSError, ValueError):
+            return {}
+
+    def get(self, key: str) -> Optional[Any]:
+        """
+        读取未过期的缓存值
+
+        Returns:
+            缓存值，不存在或已过期返回 None
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and time.time() - entry.get("cached_at", 0) < self.ttl:
+                self.hits += 1
+                return entry.get("value")
+            self.misses += 1
+            return None
+
+    def set(self, key: str, value: Any):
+        """写入缓存值（调用 save 后持久化）"""
+        with self._lock:
+            self._entries[key] = {"value": value, "cached_at": time.time()}
+            self._dirty = True
+
+    def save(self) -> bool:
+        """
+        清理过期条目并写回磁盘（原子替换）
+
+        Returns:
+            bool: 是否成功
+        """
+        with self._lock:
+            if not self._dirty:
+                return True
+            now = time.time()
+            self._entries = {
+                key: entry for key, entry in self._entries.items()
+                if now - entry.get("cached_at", 0) < self.ttl
+            }
+            try:
+                os.makedirs(os.path.dirname(self.file_path), exist_ok=True)
+                tmp_path = f"{self.file_path}.tmp"
+                with open(tmp_path, 'wb') as f:
+                    f.write(json_codec.dumps(self._entries))
+                os.replace(tmp_path, self.file_path)
+                self._dirty = False
+                return True
+            except OSError as e:
+                print(f"保存缓存文件失败: {e}")
+                return False
+
+    def __len__(self):
+        return len(self._entries)